@@ -0,0 +1,305 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+# Adiciona a pasta /src/ pro PYTHONPATH
+sys.path.append("src/")
+
+import headless
+import pygame
+
+import lattice
+import moves
+import reference
+import rider
+import utilities
+from deck import Deck
+from state import GameState
+from config import *
+
+# Tamanhos dos históricos sintéticos, em segmentos por rider
+SIZES = (10, 50, 200, 1000)
+
+# Quanto tempo, no mínimo, cada repetição de uma medida deve levar
+MIN_REPEAT_TIME = 0.05
+
+
+def synthetic_riders(size, bot_number=4, seed=0):
+    """
+    Build riders whose paths already have a given number of segments.
+
+    The paths are random walks over the lattice with the vectors of the deck,
+    kept inside the board. They cross each other freely, as only their length
+    matters for timing.
+
+    Parameters
+    ----------
+    size : int
+        The number of segments of each rider's path.
+    bot_number : int, optional
+        The number of riders. Defaults to 4.
+    seed : int, optional
+        The seed of the walks. Defaults to 0.
+
+    Returns
+    -------
+    tuple
+        The riders, with their bitboards up to date, and the deck they drew from.
+    """
+    generator = random.Random(seed)
+    deck = Deck(CARDS_PATH, (CARD_X, CARD_Y))
+    vectors = [tuple(vector) for vector in moves.CARD_VECTORS.tolist()]
+    riders = []
+
+    for number in range(1, bot_number + 1):
+        bot = rider.Bot(number, (GRID_X / 2 - 1, GRID_Y / 2 - 2), (RIDER_X, RIDER_Y), deck)
+        vertex = bot._lattice_path[-1]
+
+        for foo in range(size):
+            # Sorteia até achar um vetor que não saia do tabuleiro
+            while True:
+                card = generator.choice(vectors)
+                end = (vertex[0] + card[0], vertex[1] + card[1])
+
+                if not lattice.check_border_collision(end):
+                    break
+
+            point = lattice.to_pixel(end)
+            point = (round(point[0]), round(point[1]))
+
+            bot.rect.center = point
+            bot._commit_segment(point)
+            bot._last_card = card
+            vertex = end
+
+        bot.mask.center = bot.rect.center
+        bot.clicked_card = generator.choice(vectors)
+        riders.append(bot)
+
+    return pygame.sprite.Group(riders), deck
+
+
+def measure(function, repeat=5):
+    """
+    Time a function, running it enough times for the clock to be reliable.
+
+    Parameters
+    ----------
+    function : callable
+        The function, called without arguments.
+    repeat : int, optional
+        The number of measurements. Defaults to 5.
+
+    Returns
+    -------
+    dict
+        The best and median time of a single call, in microseconds, and the
+        number of calls in each measurement.
+    """
+    # Descobre quantas chamadas cabem em MIN_REPEAT_TIME
+    number = 1
+
+    while True:
+        start = time.perf_counter()
+
+        for foo in range(number):
+            function()
+
+        if time.perf_counter() - start >= MIN_REPEAT_TIME:
+            break
+
+        number *= 2
+
+    timings = []
+
+    for foo in range(repeat):
+        start = time.perf_counter()
+
+        for foo in range(number):
+            function()
+
+        timings.append((time.perf_counter() - start) / number * 1e6)
+
+    return {"best_us": min(timings), "median_us": statistics.median(timings), "calls": number}
+
+
+def cases(riders, deck):
+    """
+    Return the functions timed on a board.
+
+    Parameters
+    ----------
+    riders : pygame.sprite.Group
+        The riders of the board, the first one being the one that moves.
+    deck : Deck
+        The deck the riders drew from.
+
+    Returns
+    -------
+    dict
+        A function without arguments for each benchmark name.
+    """
+    player, enemy = riders.sprites()[:2]
+    state = GameState.capture(riders.sprites(), deck, turn=1)
+    card = player.clicked_card
+
+    # As regras em pixels de antes do reticulado, com as máscaras que cada rider guardava
+    enemy_paths = [bot._path for bot in riders if bot is not player]
+    enemy_masks = [reference.path_masks(path)[0] for path in enemy_paths]
+    masks = reference.path_masks(player._path)
+    start = player._path[-1]
+    end = (start[0] + card[0] * DISTANCE, start[1] - card[1] * DISTANCE)
+    line = reference.line_mask(start, end)
+
+    # Com o rider fora do tabuleiro nenhuma linha o toca, e as funções que
+    # param na primeira colisão precisam testar todas (o pior caso)
+    player.mask.center = (-RIDER_X, -RIDER_Y)
+
+    return {
+        "reference.check_line_collision": lambda: reference.check_line_collision(
+            player.mask, player._path, enemy_paths, card, player._last_card
+        ),
+        "reference.check_line_cross": lambda: reference.check_line_cross(
+            line, masks, enemy_masks, card, player._last_card
+        ),
+        "reference.hide_mask_origin": lambda: reference.hide_mask_origin(enemy_masks[0]),
+        "reference.line_mask": lambda: reference.line_mask(start, end),
+        "check_riders_collision": lambda: utilities.check_riders_collision(player, enemy),
+        "moves.evaluate_moves": lambda: moves.evaluate_moves(riders, player),
+        "moves.resolve_move": lambda: moves.resolve_move(riders, player),
+        "GameState.collision": lambda: state.collision(card),
+        "GameState.collision[timed]": lambda: state.collision(card, timed=True),
+    }
+
+
+def run(sizes=SIZES, repeat=5, seed=0):
+    """
+    Time every case on boards of each size.
+
+    Parameters
+    ----------
+    sizes : iterable, optional
+        The number of segments of each rider's path. Defaults to SIZES.
+    repeat : int, optional
+        The number of measurements of each case. Defaults to 5.
+    seed : int, optional
+        The seed of the synthetic paths. Defaults to 0.
+
+    Returns
+    -------
+    dict
+        The environment of the run and, for each case and size, its timings.
+    """
+    results = {}
+
+    for size in sizes:
+        riders, deck = synthetic_riders(size, seed=seed)
+
+        for name, function in cases(riders, deck).items():
+            results.setdefault(name, {})[str(size)] = measure(function, repeat)
+
+            print(
+                "{:<32} {:>5} segments: {:>12.2f} us".format(
+                    name, size, results[name][str(size)]["best_us"]
+                )
+            )
+
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Print the ratio between the current timings and a saved baseline.
+
+    Parameters
+    ----------
+    current : dict
+        The results of this run.
+    baseline : dict
+        The results of the baseline run.
+    threshold : float
+        The ratio above which a case counts as a regression.
+
+    Returns
+    -------
+    list
+        The (case, size, ratio) of every regression.
+    """
+    regressions = []
+
+    for name, sizes in current["results"].items():
+        for size, timing in sizes.items():
+            old = baseline["results"].get(name, {}).get(size)
+
+            # Casos novos não têm com o que comparar
+            if old is None:
+                print("{:<32} {:>5} segments: new".format(name, size))
+                continue
+
+            ratio = timing["best_us"] / old["best_us"]
+            flag = "  REGRESSION" if ratio > threshold else ""
+
+            print(
+                "{:<32} {:>5} segments: {:>10.2f} -> {:>10.2f} us ({:.2f}x){}".format(
+                    name, size, old["best_us"], timing["best_us"], ratio, flag
+                )
+            )
+
+            if flag:
+                regressions.append((name, size, ratio))
+
+    return regressions
+
+
+def main():
+    """
+    Run the collision benchmarks, save them and optionally compare them with a baseline.
+
+    Returns
+    -------
+    None
+    """
+    parser = argparse.ArgumentParser(description="Time Vectrun's collision checks on synthetic boards.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="segments per rider")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="measurements of each case")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the synthetic paths")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="file with the results")
+    parser.add_argument("-c", "--compare", help="baseline results to compare with")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    headless.init_headless()
+
+    current = run(args.sizes, args.repeat, args.seed)
+
+    with open(args.output, "w") as file:
+        json.dump(current, file, indent=2)
+
+    regressions = []
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+        print()
+        regressions = compare(current, baseline, args.threshold)
+
+    pygame.quit()
+
+    # Sai com erro se algo ficou mais lento que o permitido
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import os
+import sys
+
+# Não é necessário abrir uma janela para gerar o pacote
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+# Adiciona a pasta /src/ pro PYTHONPATH
+sys.path.append("src/")
+
+from src import bundle
+from config import *
+
+# Inicializa apenas o necessário para converter as texturas
+pygame.display.init()
+pygame.display.set_mode((1, 1))
+
+# Gera o pacote com as cartas e as motos já redimensionadas
+count = bundle.write_bundle()
+size = os.path.getsize(BUNDLE_PATH)
+
+print("Packed", count, "textures into", BUNDLE_PATH, "(" + str(size // 1024) + " KiB)")
+
+pygame.quit()
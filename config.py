@@ -1,14 +1,19 @@
+import os
+
 # Define caminho de todas as pastas que usaremos
-ASSET_PATH = "assets\\"
-IMG_MANUAL_PATH = ASSET_PATH + "manual\img\\"
-TEXTURE_PATH = ASSET_PATH + "textures\\"
-MUSIC_PATH = ASSET_PATH + "music\\"
-SOUND_PATH = ASSET_PATH + "sound\\"
-FONTS_PATH = ASSET_PATH + "fonts\\"
+ASSET_PATH = "assets" + os.sep
+IMG_MANUAL_PATH = ASSET_PATH + "manual" + os.sep + "img" + os.sep
+TEXTURE_PATH = ASSET_PATH + "textures" + os.sep
+MUSIC_PATH = ASSET_PATH + "music" + os.sep
+SOUND_PATH = ASSET_PATH + "sound" + os.sep
+FONTS_PATH = ASSET_PATH + "fonts" + os.sep
+
+TEXTURE_MENU_PATH = TEXTURE_PATH + "menu" + os.sep
+CARDS_PATH = TEXTURE_PATH + "cards" + os.sep
+RIDER_PATH = TEXTURE_PATH + "rider" + os.sep
 
-TEXTURE_MENU_PATH = TEXTURE_PATH + "menu\\"
-CARDS_PATH = TEXTURE_PATH + "cards\\"
-RIDER_PATH = TEXTURE_PATH + "rider\\"
+# Pacote com as texturas já redimensionadas (gerado por bundle_assets.py)
+BUNDLE_PATH = TEXTURE_PATH + "textures.bundle"
 
 # Tamanho da tela
 WIDTH = 1000
@@ -24,6 +29,12 @@ BORDER = 7
 RIDER_X = 50
 RIDER_Y = 25
 
+# Número de quadros da animação de morte
+DEATH_FRAMES = 8
+
+# Semente das partidas (None sorteia uma nova a cada partida, mostrada no canto da tela)
+GAME_SEED = None
+
 # Tamanho da carta
 CARD_X = 150
 CARD_Y = 100
@@ -46,6 +57,65 @@ BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 RED = (186, 63, 73)
 
+# Tempo máximo, em segundos, até exibir o menu principal
+STARTUP_BUDGET = 1.0
+SHOW_STARTUP_TIMES = False
+
+# Texturas convertidas por quadro, na thread principal, depois de lidas em segundo plano
+LOAD_BATCH = 8
+
+# Taxa de quadros dos menus e do jogo
+MENU_FPS = 30
+GAME_FPS = 30
+
+# Tempo máximo, em ms, que um menu parado dorme esperando eventos
+IDLE_TIMEOUT = 500
+
+# Intervalo mínimo, em ms, entre dois cliques
+CLICK_DEBOUNCE = 170
+
+# Memória máxima, em bytes, dos textos renderizados guardados
+TEXT_CACHE_BYTES = 8 * 1024 * 1024
+
 # Número de efeitos sonoros
 SOUND_NUMBER = 4
 VOLUME_START = 0.3
+
+# Como os bots escolhem as cartas: "safe" sorteia entre as que não colidem,
+# "territory" fica com a que deixa mais território e "mcts" faz uma busca de Monte Carlo
+BOT_POLICY = "safe"
+
+# Tempo, em segundos, da busca de cada jogada e limite de turnos de cada simulação
+SEARCH_BUDGET = 0.05
+SEARCH_PLAYOUT_TURNS = 40
+
+# Peso da exploração na escolha dos ramos da busca
+SEARCH_EXPLORATION = 0.7
+
+# Processos que dividem a busca (com 1 ela roda no próprio processo), limitados
+# para não ocupar a máquina toda durante o jogo, e quanto do tempo da busca fica
+# reservado para enviar o estado e juntar os resultados
+SEARCH_WORKERS = min(4, os.cpu_count() or 1)
+SEARCH_MARGIN = 0.005
+
+# Bytes da memória compartilhada onde o estado de cada busca é escrito uma vez
+SEARCH_STATE_SIZE = 2**18
+
+# Semente das chaves de Zobrist e número de posições da tabela de transposição
+ZOBRIST_SEED = 0x5EED
+TRANSPOSITION_SIZE = 2**16
+
+# Com dois riders vivos e esta fração dos vértices do tabuleiro coberta pelas
+# linhas, os bots "mcts" tentam resolver o fim da partida com expectimax
+ENDGAME_CROWDING = 0.05
+
+# Limite de nós e tempo, em segundos, de cada resolução do fim da partida, que
+# roda junto da busca, antes dela
+ENDGAME_NODES = 20000
+ENDGAME_BUDGET = 0.025
+
+# Mostra no terminal as estatísticas de cada busca dos bots
+SHOW_SEARCH_STATS = False
+
+# Quanto tempo, em segundos, cada quadro espera pela busca feita em segundo plano
+THINK_POLL = 0.001
@@ -0,0 +1,171 @@
+import argparse
+import os
+import sys
+import time
+
+# Usa os drivers "dummy" do SDL: nenhuma janela é aberta e não há som
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+# Adiciona a pasta /src/ pro PYTHONPATH
+sys.path.append("src/")
+
+import bundle
+import game
+import search
+from config import *
+
+
+class HeadlessControl:
+    """
+    Minimal replacement for StateControl in matches without a window.
+
+    Attributes
+    ----------
+    playing : bool
+        Flag indicating if the match is still running.
+    winner : int
+        The number of the rider that won, or 0 if nobody won.
+    """
+
+    def __init__(self):
+        """
+        Initialize the HeadlessControl object.
+
+        Returns
+        -------
+        None
+        """
+        self.playing = True
+        self.winner = 0
+
+
+def run_match(seed, bot_number=4, max_turns=1000, policies=None):
+    """
+    Run a full bot-only match without drawing, sounds or frame cap.
+
+    Parameters
+    ----------
+    seed : int
+        The seed of the match.
+    bot_number : int, optional
+        The number of bots, up to 4. Defaults to 4.
+    max_turns : int, optional
+        The number of turns after which the match is stopped. Defaults to 1000.
+    policies : list, optional
+        The policy of each seat, repeated over the seats. Defaults to None, which
+        uses BOT_POLICY.
+
+    Returns
+    -------
+    dict
+        The seed, winner (0 if nobody won), number of turns and frames, wall time
+        of the match and, when bots searched, their playouts per second.
+    """
+    control = HeadlessControl()
+
+    # O pool da busca é criado aqui, na thread principal, e não pelo Thinker
+    if "mcts" in (policies or [BOT_POLICY]):
+        search.worker_pool()
+
+    start = time.perf_counter()
+
+    grid = game.GridGame(
+        TEXTURE_PATH + "grid.png",
+        (0, 0),
+        (GRID_X, GRID_Y),
+        bot_number,
+        0,
+        control,
+        human=False,
+        seed=seed,
+        policies=policies,
+    )
+
+    # Roda o jogo quadro a quadro, sem desenhar nem esperar
+    frames = 0
+
+    while control.playing and grid._all_riders and grid._game_turn < max_turns:
+        grid.update()
+        frames += 1
+
+    result = {
+        "seed": seed,
+        "winner": control.winner,
+        "turns": grid._game_turn,
+        "frames": frames,
+        "wall_time": time.perf_counter() - start,
+    }
+
+    # Vazão das buscas, somando todos os bots que usaram MCTS
+    searches = [stats for bot in grid._riders for stats in bot.search_log]
+
+    if searches:
+        result["playouts_per_second"] = sum(stats["playouts"] for stats in searches) / sum(
+            stats["elapsed"] for stats in searches
+        )
+
+    return result
+
+
+def init_headless():
+    """
+    Initialize only the parts of pygame needed by a headless match.
+
+    Returns
+    -------
+    None
+    """
+    # O display "dummy" fornece a fila de eventos e os timers, mas o mixer não é iniciado
+    pygame.display.init()
+
+    # Usa o pacote de texturas, se existir, para não decodificar os PNGs
+    bundle.load_bundle()
+
+
+def main():
+    """
+    Run headless matches and print a summary of each one.
+
+    Returns
+    -------
+    None
+    """
+    parser = argparse.ArgumentParser(description="Run bot-only Vectrun matches without a window.")
+    parser.add_argument("-n", "--matches", type=int, default=1, help="number of matches")
+    parser.add_argument("-b", "--bots", type=int, default=4, help="number of bots (2 to 4)")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the first match")
+    parser.add_argument("--max-turns", type=int, default=1000, help="turn limit of each match")
+    parser.add_argument("-p", "--policy", nargs="+", choices=("safe", "territory", "mcts"), help="policy of each seat")
+    args = parser.parse_args()
+
+    init_headless()
+
+    total = time.perf_counter()
+
+    for index in range(args.matches):
+        result = run_match(args.seed + index, args.bots, args.max_turns, args.policy)
+
+        print(
+            "match {}: seed {}, winner {}, {} turns, {:.3f} s{}".format(
+                index + 1,
+                result["seed"],
+                result["winner"] or "none",
+                result["turns"],
+                result["wall_time"],
+                ", {:.0f} playouts/s".format(result["playouts_per_second"])
+                if "playouts_per_second" in result
+                else "",
+            )
+        )
+
+    print("{} matches in {:.3f} s".format(args.matches, time.perf_counter() - total))
+
+    search.close_pool()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
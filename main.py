@@ -7,15 +7,16 @@ sys.path.append("src/")
 # Importa todo o pacote de src/
 from src import state_control
 
-# Inicializa
-pygame.init()
+# Os processos da busca paralela importam este arquivo sem abrir outra janela
+if __name__ == "__main__":
+    # Inicializa
+    pygame.init()
 
-# Cria o jogo
-game = state_control.StateControl()
+    # Cria o jogo
+    game = state_control.StateControl()
 
-# Começa o jogo
-game.start()
+    # Começa o jogo
+    game.start()
 
-# Quando retornar, fecha tudo
-pygame.quit()
-sys.exit()
+    # Quando retornar, fecha tudo
+    game.quit()
@@ -1 +1 @@
-__all__ = ["deck", "rider", "menu", "game", "utilities", "state_control"]
+__all__ = ["deck", "rider", "menu", "game", "utilities", "state_control", "textures", "bundle", "fonts", "scheduler", "trail", "lattice", "bitboard", "moves", "state", "search", "thinker", "zobrist", "territory", "endgame", "reference"]
@@ -0,0 +1,555 @@
+import functools
+import math
+
+import lattice
+from config import *
+
+# Maior coordenada, em módulo, de um vértice dentro do tabuleiro
+RADIUS = int((GRID_X / 2 - BORDER) // DISTANCE)
+SIDE = 2 * RADIUS + 1
+
+# Direções primitivas das arestas (sem repetir sentidos opostos)
+DIRECTIONS = tuple(
+    (x, y)
+    for x in range(0, 5)
+    for y in range(-4, 5)
+    if math.gcd(x, y) == 1 and (x > 0 or y > 0)
+)
+DIRECTION_INDEX = {direction: index for index, direction in enumerate(DIRECTIONS)}
+
+# As arestas têm uma margem em volta do tabuleiro, para que deslocar uma
+# máscara nunca leve uma aresta de uma coluna para a seguinte
+PADDING = 8
+WIDTH = SIDE + 2 * PADDING
+
+
+def vertex_bit(vertex):
+    """
+    Return the bit of a lattice vertex.
+
+    Parameters
+    ----------
+    vertex : tuple
+        The integer vertex (i, j).
+
+    Returns
+    -------
+    int
+        The bit of the vertex, or 0 if it lies outside the board.
+    """
+    if abs(vertex[0]) > RADIUS or abs(vertex[1]) > RADIUS:
+        return 0
+
+    return 1 << ((vertex[0] + RADIUS) * SIDE + vertex[1] + RADIUS)
+
+
+def edge_bit(start, step):
+    """
+    Return the bit of the lattice edge between two neighbouring vertices of a line.
+
+    Parameters
+    ----------
+    start : tuple
+        The first vertex of the edge.
+    step : tuple
+        The primitive vector from the first to the last vertex.
+
+    Returns
+    -------
+    int
+        The bit of the edge, or 0 if it does not lie inside the board.
+    """
+    end = (start[0] + step[0], start[1] + step[1])
+
+    if not vertex_bit(start) or not vertex_bit(end):
+        return 0
+
+    return __edge_bit(start, step)
+
+
+def crossing_mask(start, step):
+    """
+    Return the edges that properly cross a lattice edge, away from any vertex.
+
+    Parameters
+    ----------
+    start : tuple
+        The first vertex of the edge.
+    step : tuple
+        The primitive vector of the edge.
+
+    Returns
+    -------
+    int
+        The bits of every edge inside the board that crosses it.
+    """
+    # O cruzamento não muda com translações: desloca o da aresta na origem
+    return __translate(__origin_crossings(step), start) & VALID_EDGES
+
+
+@functools.lru_cache(maxsize=None)
+def segment_masks(start, card):
+    """
+    Return the vertices and edges of a move.
+
+    Parameters
+    ----------
+    start : tuple
+        The vertex where the move starts.
+    card : tuple
+        The vector of the move.
+
+    Returns
+    -------
+    tuple
+        The bits of the vertices the move passes through and of its edges.
+    """
+    steps = math.gcd(card[0], card[1])
+
+    if not steps:
+        return (vertex_bit(start), 0)
+
+    step = (card[0] // steps, card[1] // steps)
+    vertices = vertex_bit(start)
+    edges = 0
+
+    for index in range(steps):
+        vertex = (start[0] + index * step[0], start[1] + index * step[1])
+
+        vertices |= vertex_bit((vertex[0] + step[0], vertex[1] + step[1]))
+        edges |= edge_bit(vertex, step)
+
+    return (vertices, edges)
+
+
+@functools.lru_cache(maxsize=None)
+def move_masks(start, card):
+    """
+    Return the vertices, edges and crossed edges of a move.
+
+    Parameters
+    ----------
+    start : tuple
+        The vertex where the move starts.
+    card : tuple
+        The vector of the move.
+
+    Returns
+    -------
+    tuple
+        The bits of the vertices the move passes through, of its edges, and of
+        every edge it properly crosses.
+    """
+    vertices, edges = segment_masks(start, card)
+    steps = math.gcd(card[0], card[1])
+    crossings = 0
+
+    if steps:
+        step = (card[0] // steps, card[1] // steps)
+
+        for index in range(steps):
+            vertex = (start[0] + index * step[0], start[1] + index * step[1])
+            crossings |= crossing_mask(vertex, step)
+
+    return (vertices, edges, crossings)
+
+
+def move_crossings(card):
+    """
+    Return the edges properly crossed by a move leaving the central vertex.
+
+    Unlike move_masks, edges outside the board are kept, so the mask can be
+    shifted to any other start vertex.
+
+    Parameters
+    ----------
+    card : tuple
+        The vector of the move.
+
+    Returns
+    -------
+    int
+        The bits of the crossed edges.
+    """
+    steps = math.gcd(card[0], card[1])
+    step = (card[0] // steps, card[1] // steps)
+    mask = 0
+
+    for index in range(steps):
+        mask |= __translate(__origin_crossings(step), (index * step[0], index * step[1]))
+
+    return mask
+
+
+class TrailBoard:
+    """
+    Bitboard of the lattice vertices and edges covered by a rider's trail.
+
+    The board keeps the union of its segments after each one was added, so
+    occupancy checks are a single AND, the board without its last segment is
+    free and retracting a segment is a pop. The integers are immutable, which
+    makes copies cheap.
+
+    It takes the place of the pixel mask of the trail: the last segment, which
+    the rider's next move starts from, is left out by skip_last instead of being
+    kept in a separate mask, the shared central vertex is left out by the query
+    instead of erased from a copy, and the board takes the same memory however
+    long the trail is.
+
+    Methods
+    -------
+    push(self, start, end)
+        Add a segment to the board.
+    pop(self)
+        Remove the last segment added.
+    vertices(self, skip_last=False)
+        Return the bits of the covered vertices.
+    edges(self, skip_last=False)
+        Return the bits of the covered edges.
+    occupied(self, vertex)
+        Check if a vertex is covered.
+    copy(self)
+        Return an independent copy of the board.
+    """
+
+    def __init__(self):
+        """
+        Initialize the TrailBoard object.
+
+        Returns
+        -------
+        None
+        """
+        # União acumulada dos segmentos (a posição k tem os k primeiros)
+        self.__vertices = [0]
+        self.__edges = [0]
+
+    def __len__(self):
+        """
+        Return the number of segments on the board.
+
+        Returns
+        -------
+        int
+            The number of segments.
+        """
+        return len(self.__vertices) - 1
+
+    def push(self, start, end):
+        """
+        Add a segment to the board.
+
+        Parameters
+        ----------
+        start : tuple
+            The first vertex of the segment.
+        end : tuple
+            The last vertex of the segment.
+
+        Returns
+        -------
+        None
+        """
+        # Só os vértices e arestas ficam no tabuleiro; os cruzamentos são do movimento
+        vertices, edges = segment_masks(start, (end[0] - start[0], end[1] - start[1]))
+
+        self.__vertices.append(self.__vertices[-1] | vertices)
+        self.__edges.append(self.__edges[-1] | edges)
+
+    def pop(self):
+        """
+        Remove the last segment added.
+
+        Returns
+        -------
+        None
+        """
+        if len(self):
+            self.__vertices.pop()
+            self.__edges.pop()
+
+    def vertices(self, skip_last=False):
+        """
+        Return the bits of the covered vertices.
+
+        Parameters
+        ----------
+        skip_last : bool, optional
+            Whether the last segment is left out. Defaults to False.
+
+        Returns
+        -------
+        int
+            The bits of the vertices.
+        """
+        return self.__vertices[-2 if skip_last and len(self) else -1]
+
+    def edges(self, skip_last=False):
+        """
+        Return the bits of the covered edges.
+
+        Parameters
+        ----------
+        skip_last : bool, optional
+            Whether the last segment is left out. Defaults to False.
+
+        Returns
+        -------
+        int
+            The bits of the edges.
+        """
+        return self.__edges[-2 if skip_last and len(self) else -1]
+
+    def occupied(self, vertex):
+        """
+        Check if a vertex is covered by the trail.
+
+        Parameters
+        ----------
+        vertex : tuple
+            The integer vertex (i, j).
+
+        Returns
+        -------
+        bool
+            True if the vertex is covered, False otherwise.
+        """
+        return bool(self.__vertices[-1] & vertex_bit(vertex))
+
+    def copy(self):
+        """
+        Return an independent copy of the board.
+
+        Returns
+        -------
+        TrailBoard
+            The copy.
+        """
+        board = TrailBoard.__new__(TrailBoard)
+        board.__vertices = self.__vertices.copy()
+        board.__edges = self.__edges.copy()
+
+        return board
+
+
+def check_move_collision(players_group, rider, card=None):
+    """
+    Check if moving a rider with a card crosses any trail, using the riders' bitboards.
+
+    It follows the same rules as lattice.check_move_collision: the other riders'
+    trails, the rider's own trail but its last segment, going back over the last
+    vector and, on the first move, the shared central vertex being ignored.
+
+    Parameters
+    ----------
+    players_group : pygame.sprite.Group
+        Group containing all the riders.
+    rider : Rider
+        The rider that moves.
+    card : Card, optional
+        The card of the move. Defaults to None, which uses the rider's clicked card.
+
+    Returns
+    -------
+    bool
+        True if the move crosses a trail or goes back over the last one, False otherwise.
+    """
+    if not card:
+        card = rider.clicked_card
+
+    vertices, edges, crossings = move_masks(rider._lattice_path[-1], (card[0], card[1]))
+
+    # No primeiro movimento a origem é compartilhada por todos
+    if len(rider._lattice_path) == 2:
+        vertices &= ~vertex_bit((0, 0))
+
+    for enemy in players_group:
+        if enemy is rider:
+            continue
+
+        if enemy._board.vertices() & vertices or enemy._board.edges() & crossings:
+            return True
+
+    # Linhas do próprio rider, menos a última (de onde ele parte)
+    if (
+        rider._board.vertices(skip_last=True) & vertices
+        or rider._board.edges(skip_last=True) & crossings
+    ):
+        return True
+
+    return lattice.last_vector_collision(card, rider._last_card)
+
+
+def check_vertex_collision(players_group, rider):
+    """
+    Check if a rider standing on a vertex touches any trail, using the riders' bitboards.
+
+    Parameters
+    ----------
+    players_group : pygame.sprite.Group
+        Group containing all the riders.
+    rider : Rider
+        The rider.
+
+    Returns
+    -------
+    bool
+        True if the vertex lies on another rider's trail or on its own older segments, False otherwise.
+    """
+    bit = vertex_bit(rider._lattice_path[-1])
+
+    for enemy in players_group:
+        if enemy is not rider and enemy._board.vertices() & bit:
+            return True
+
+    return bool(rider._board.vertices(skip_last=True) & bit)
+
+
+def __cross(vector_1, vector_2):
+    """
+    Return the cross product of two plane vectors.
+
+    Parameters
+    ----------
+    vector_1 : tuple
+        The first vector.
+    vector_2 : tuple
+        The second vector.
+
+    Returns
+    -------
+    int
+        The z coordinate of the cross product.
+    """
+    return vector_1[0] * vector_2[1] - vector_1[1] * vector_2[0]
+
+
+def __side(origin, direction, point):
+    """
+    Return on which side of a line a point lies.
+
+    Parameters
+    ----------
+    origin : tuple
+        A point of the line.
+    direction : tuple
+        The direction of the line.
+    point : tuple
+        The point.
+
+    Returns
+    -------
+    int
+        Positive on the left, negative on the right and 0 on the line.
+    """
+    return __cross(direction, (point[0] - origin[0], point[1] - origin[1]))
+
+
+def __edge_bit(start, step):
+    """
+    Return the bit of a lattice edge, without checking if it lies inside the board.
+
+    Parameters
+    ----------
+    start : tuple
+        The first vertex of the edge.
+    step : tuple
+        The primitive vector from the first to the last vertex.
+
+    Returns
+    -------
+    int
+        The bit of the edge.
+    """
+    # A aresta é guardada a partir do vértice de onde sai a direção canônica
+    if step not in DIRECTION_INDEX:
+        start = (start[0] + step[0], start[1] + step[1])
+        step = (-step[0], -step[1])
+
+    vertex = (start[0] + RADIUS + PADDING) * WIDTH + start[1] + RADIUS + PADDING
+
+    return 1 << (vertex * len(DIRECTIONS) + DIRECTION_INDEX[step])
+
+
+def __translate(mask, vector):
+    """
+    Move every edge of a mask by a lattice vector.
+
+    Parameters
+    ----------
+    mask : int
+        The bits of the edges.
+    vector : tuple
+        The integer vector (i, j).
+
+    Returns
+    -------
+    int
+        The bits of the moved edges.
+    """
+    shift = (vector[0] * WIDTH + vector[1]) * len(DIRECTIONS)
+
+    if shift >= 0:
+        return mask << shift
+
+    return mask >> -shift
+
+
+@functools.lru_cache(maxsize=None)
+def __origin_crossings(step):
+    """
+    Return the edges that properly cross the edge leaving the central vertex.
+
+    Parameters
+    ----------
+    step : tuple
+        The primitive vector of the edge.
+
+    Returns
+    -------
+    int
+        The bits of the crossing edges, including the ones outside the board.
+    """
+    mask = 0
+
+    for other in DIRECTIONS:
+        # Arestas paralelas não se cruzam
+        if not __cross(step, other):
+            continue
+
+        # Só as arestas cujas caixas se sobrepõem podem cruzar
+        for x in range(min(0, step[0]) - max(other[0], 0), max(0, step[0]) - min(other[0], 0) + 1):
+            for y in range(min(0, step[1]) - max(other[1], 0), max(0, step[1]) - min(other[1], 0) + 1):
+                other_end = (x + other[0], y + other[1])
+
+                # Cruzam se cada uma separar as pontas da outra
+                if (
+                    __side((0, 0), step, (x, y)) * __side((0, 0), step, other_end) < 0
+                    and __side((x, y), other, (0, 0)) * __side((x, y), other, step) < 0
+                ):
+                    mask |= __edge_bit((x, y), other)
+
+    return mask
+
+
+def __valid_edges():
+    """
+    Return every edge with both vertices inside the board.
+
+    Returns
+    -------
+    int
+        The bits of the edges.
+    """
+    mask = 0
+
+    for x in range(-RADIUS, RADIUS + 1):
+        for y in range(-RADIUS, RADIUS + 1):
+            for step in DIRECTIONS:
+                mask |= edge_bit((x, y), step)
+
+    return mask
+
+
+# Arestas que existem dentro do tabuleiro
+VALID_EDGES = __valid_edges()
@@ -0,0 +1,244 @@
+import json
+import mmap
+import os
+import struct
+
+import pygame
+
+from textures import TextureCache, to_display_format
+from config import *
+
+# Cabeçalho do arquivo: assinatura, versão e tamanho do índice
+BUNDLE_MAGIC = b"VRBUNDLE"
+BUNDLE_VERSION = 1
+HEADER = struct.Struct("<8sII")
+
+
+def bundle_entries():
+    """
+    List the textures that go into the bundle.
+
+    Returns
+    -------
+    list
+        Tuples (image_path, scale_size) of every card and rider texture.
+    """
+    entries = []
+
+    # Todas as cartas-vetores
+    for number in range(1, 81):
+        entries.append((CARDS_PATH + "card_" + str(number) + ".png", (CARD_X, CARD_Y)))
+
+    # As motos de cada jogador e os quadros da animação de morte
+    for number in range(1, 5):
+        entries.append((RIDER_PATH + "rider_" + str(number) + ".png", (RIDER_X, RIDER_Y)))
+
+    for stage in range(DEATH_FRAMES):
+        entries.append(
+            (RIDER_PATH + "rider_dead_" + str(stage) + ".png", (RIDER_X, RIDER_Y))
+        )
+
+    return entries
+
+
+def write_bundle(bundle_path=BUNDLE_PATH, entries=None):
+    """
+    Write the pre-scaled RGBA pixels of the textures into a single packed file.
+
+    The textures are loaded and scaled exactly as the game does at runtime, so
+    a display mode must already be set.
+
+    Parameters
+    ----------
+    bundle_path : str, optional
+        The path of the bundle file. Defaults to BUNDLE_PATH.
+    entries : list, optional
+        Tuples (image_path, scale_size) to pack. Defaults to bundle_entries().
+
+    Returns
+    -------
+    int
+        The number of packed textures.
+    """
+    if entries is None:
+        entries = bundle_entries()
+
+    index = []
+    blobs = []
+    offset = 0
+
+    for image_path, scale_size in entries:
+        # Carrega e redimensiona como o jogo faria
+        surface = pygame.image.load(image_path).convert_alpha()
+        surface = pygame.transform.smoothscale(surface, scale_size)
+        pixels = pygame.image.tobytes(surface, "RGBA")
+
+        # Guarda os dados do arquivo original para detectar se ficou obsoleto
+        source = os.stat(image_path)
+
+        index.append(
+            {
+                "path": image_path,
+                "size": list(scale_size),
+                "offset": offset,
+                "length": len(pixels),
+                "source_size": source.st_size,
+                "source_mtime": source.st_mtime_ns,
+            }
+        )
+        blobs.append(pixels)
+        offset += len(pixels)
+
+    index = json.dumps({"entries": index}).encode("utf-8")
+
+    # Escreve em um arquivo temporário e só então o substitui
+    temp_path = bundle_path + ".tmp"
+
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(index)))
+        file.write(index)
+
+        for pixels in blobs:
+            file.write(pixels)
+
+    os.replace(temp_path, bundle_path)
+
+    return len(blobs)
+
+
+def read_bundle(bundle_path=BUNDLE_PATH, entries=None):
+    """
+    Read the pixels of the bundled textures, without creating any surface.
+
+    Only the file is touched, so it may run on a background thread; the
+    surfaces are then built on the main thread with bundle_surface.
+    Entries whose source PNG changed, or whose size no longer matches the
+    configuration, are skipped and will be loaded from the loose PNGs instead.
+
+    Parameters
+    ----------
+    bundle_path : str, optional
+        The path of the bundle file. Defaults to BUNDLE_PATH.
+    entries : list, optional
+        Tuples (image_path, scale_size) expected in the bundle. Defaults to bundle_entries().
+
+    Returns
+    -------
+    list
+        Tuples (image_path, scale_size, pixels) with the RGBA bytes of each texture.
+    """
+    if entries is None:
+        entries = bundle_entries()
+
+    expected = {image_path: tuple(scale_size) for image_path, scale_size in entries}
+
+    # Sem o pacote, o jogo usa as imagens avulsas
+    try:
+        file = open(bundle_path, "rb")
+    except OSError:
+        return []
+
+    textures = []
+
+    with file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        # Verifica se o cabeçalho é válido
+        if len(buffer) < HEADER.size:
+            return []
+
+        magic, version, index_size = HEADER.unpack_from(buffer)
+
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            return []
+
+        index = json.loads(buffer[HEADER.size : HEADER.size + index_size])
+        data_start = HEADER.size + index_size
+
+        for entry in index["entries"]:
+            if not __is_fresh(entry, expected):
+                continue
+
+            # Copia os bytes para poder fechar o mapa
+            start = data_start + entry["offset"]
+            pixels = buffer[start : start + entry["length"]]
+            textures.append((entry["path"], tuple(entry["size"]), pixels))
+
+    return textures
+
+
+def bundle_surface(pixels, scale_size):
+    """
+    Build the surface of a bundled texture, in the pixel format of the display.
+
+    Must run on the main thread, as it converts the surface.
+
+    Parameters
+    ----------
+    pixels : bytes
+        The RGBA bytes of the texture.
+    scale_size : tuple
+        The width and height of the texture.
+
+    Returns
+    -------
+    pygame.Surface
+        The surface, which owns its pixels.
+    """
+    surface = pygame.image.frombuffer(pixels, scale_size, "RGBA")
+    converted = to_display_format(surface)
+
+    # Sem display, a cópia desvincula a superfície dos bytes
+    return surface.copy() if converted is surface else converted
+
+
+def load_bundle(bundle_path=BUNDLE_PATH, entries=None):
+    """
+    Load the bundled textures straight into the TextureCache.
+
+    Parameters
+    ----------
+    bundle_path : str, optional
+        The path of the bundle file. Defaults to BUNDLE_PATH.
+    entries : list, optional
+        Tuples (image_path, scale_size) expected in the bundle. Defaults to bundle_entries().
+
+    Returns
+    -------
+    int
+        The number of textures loaded from the bundle.
+    """
+    textures = read_bundle(bundle_path, entries)
+
+    for image_path, scale_size, pixels in textures:
+        TextureCache().insert(image_path, scale_size, bundle_surface(pixels, scale_size))
+
+    return len(textures)
+
+
+def __is_fresh(entry, expected):
+    """
+    Check if a bundle entry still matches its source PNG and the configuration.
+
+    Parameters
+    ----------
+    entry : dict
+        The entry of the bundle index.
+    expected : dict
+        The expected scale size of each image path.
+
+    Returns
+    -------
+    bool
+        True if the entry can be used, False otherwise.
+    """
+    if expected.get(entry["path"]) != tuple(entry["size"]):
+        return False
+
+    try:
+        source = os.stat(entry["path"])
+    except OSError:
+        return False
+
+    return (
+        source.st_size == entry["source_size"]
+        and source.st_mtime_ns == entry["source_mtime"]
+    )
@@ -87,6 +87,216 @@ class Card(Entity):
             return False
 
 
+class DrawDistribution:
+    """
+    Distribution of the next card drawn from a pile of vector cards.
+
+    The pile is kept as the count of each vector, and every tracked set of
+    vectors keeps how many of its cards are left, so the chance that the next
+    draw is a given vector, or a card of a tracked set, costs O(1). Removing a
+    card only updates the sets it belongs to; refilling the pile, which happens
+    once per reshuffle, counts them again.
+
+    Attributes
+    ----------
+    total : int
+        The number of cards in the pile.
+
+    Methods
+    -------
+    __init__(self, values=())
+        Initialize a DrawDistribution object.
+    __len__(self)
+        Return the number of cards in the pile.
+    reset(self, values)
+        Replace the cards of the pile.
+    remove(self, value)
+        Take a card out of the pile.
+    track(self, name, values)
+        Start counting the cards of a set of vectors left in the pile.
+    untrack(self, name)
+        Stop counting the cards of a set.
+    count(self, value)
+        Return the number of cards of a vector left in the pile.
+    vector_probability(self, value)
+        Return the chance that the next draw is a vector.
+    probability(self, name)
+        Return the chance that the next draw is a card of a tracked set.
+    """
+
+    def __init__(self, values=()):
+        """
+        Initialize a DrawDistribution object.
+
+        Parameters
+        ----------
+        values : iterable, optional
+            The vectors of the cards in the pile. Defaults to an empty pile.
+
+        Returns
+        -------
+        None
+        """
+        self.total = 0
+
+        self.__counts = {}
+        self.__sets = {}  # Nome do conjunto -> [cartas restantes, vetores]
+        self.__memberships = {}  # Vetor -> nomes dos conjuntos que o contêm
+
+        self.reset(values)
+
+    def __len__(self):
+        """
+        Return the number of cards in the pile.
+
+        Returns
+        -------
+        int
+            The number of cards.
+        """
+        return self.total
+
+    def reset(self, values):
+        """
+        Replace the cards of the pile.
+
+        Parameters
+        ----------
+        values : iterable
+            The vectors of the cards in the pile.
+
+        Returns
+        -------
+        None
+        """
+        counts = {}
+
+        for value in values:
+            value = (value[0], value[1])
+            counts[value] = counts.get(value, 0) + 1
+
+        self.__counts = counts
+        self.total = sum(counts.values())
+
+        for entry in self.__sets.values():
+            entry[0] = sum(counts.get(value, 0) for value in entry[1])
+
+    def remove(self, value):
+        """
+        Take a card out of the pile.
+
+        Parameters
+        ----------
+        value : tuple
+            The vector of the card, which must be in the pile.
+
+        Returns
+        -------
+        None
+        """
+        value = (value[0], value[1])
+
+        self.__counts[value] -= 1
+        self.total -= 1
+
+        for name in self.__memberships.get(value, ()):
+            self.__sets[name][0] -= 1
+
+    def track(self, name, values):
+        """
+        Start counting the cards of a set of vectors left in the pile.
+
+        Tracking a name again replaces its set.
+
+        Parameters
+        ----------
+        name : hashable
+            The name of the set, used to ask for its probability.
+        values : iterable
+            The vectors of the set.
+
+        Returns
+        -------
+        None
+        """
+        self.untrack(name)
+
+        values = frozenset((value[0], value[1]) for value in values)
+        self.__sets[name] = [sum(self.__counts.get(value, 0) for value in values), values]
+
+        for value in values:
+            self.__memberships.setdefault(value, []).append(name)
+
+    def untrack(self, name):
+        """
+        Stop counting the cards of a set.
+
+        Parameters
+        ----------
+        name : hashable
+            The name of the set. Unknown names are ignored.
+
+        Returns
+        -------
+        None
+        """
+        entry = self.__sets.pop(name, None)
+
+        if entry is None:
+            return
+
+        for value in entry[1]:
+            self.__memberships[value].remove(name)
+
+    def count(self, value):
+        """
+        Return the number of cards of a vector left in the pile.
+
+        Parameters
+        ----------
+        value : tuple
+            The vector.
+
+        Returns
+        -------
+        int
+            The number of cards.
+        """
+        return self.__counts.get((value[0], value[1]), 0)
+
+    def vector_probability(self, value):
+        """
+        Return the chance that the next draw is a vector.
+
+        Parameters
+        ----------
+        value : tuple
+            The vector.
+
+        Returns
+        -------
+        float
+            The probability, or 0.0 if the pile is empty.
+        """
+        return self.count(value) / self.total if self.total else 0.0
+
+    def probability(self, name):
+        """
+        Return the chance that the next draw is a card of a tracked set.
+
+        Parameters
+        ----------
+        name : hashable
+            The name given to the set in track.
+
+        Returns
+        -------
+        float
+            The probability, or 0.0 if the pile is empty.
+        """
+        return self.__sets[name][0] / self.total if self.total else 0.0
+
+
 class Deck(Entity):
     """
     Represents a deck of cards.
@@ -97,18 +307,20 @@ class Deck(Entity):
         A list of Card objects representing the cards in the deck.
     drawn_cards : list
         A list of Card objects representing the cards that have been drawn from the deck and are in play.
+    rng : random.Random
+        The random number generator used to shuffle the deck.
 
     Methods
     -------
-    __init__(self, card_path, scale_size)
+    __init__(self, card_path, scale_size, rng=None)
         Initializes a Deck object.
     shuffle_deck(self)
         Shuffles the deck of cards.
-    draw_card(self)
+    draw_card(self, value=None)
         Draws a card from the deck.
     """
 
-    def __init__(self, card_path, scale_size):
+    def __init__(self, card_path, scale_size, rng=None):
         """
         Initializes a Deck object.
 
@@ -118,6 +330,9 @@ class Deck(Entity):
             The path to the directory containing the card images.
         scale_size : tuple
             A tuple representing the scale size of the cards.
+        rng : random.Random, optional
+            The random number generator of the match. Defaults to None, which
+            creates an unseeded one.
 
         Returns
         -------
@@ -125,6 +340,9 @@ class Deck(Entity):
         """
         super().__init__(card_path + "card_back.png", (0, 0), (0, 0))
 
+        # Gerador da partida, para que o embaralhamento possa ser repetido
+        self.rng = rng if rng is not None else random.Random()
+
         self.cards = []
         self.drawn_cards = []  # Cartas que foram tiradas do deck e estão em jogo
 
@@ -160,25 +378,43 @@ class Deck(Entity):
         None
         """
         if not self.cards:
-            random.shuffle(self.drawn_cards)
+            self.rng.shuffle(self.drawn_cards)
             self.cards = self.drawn_cards.copy()
             self.drawn_cards.clear()
         else:
-            random.shuffle(self.cards)
+            self.rng.shuffle(self.cards)
 
-    def draw_card(self):
+    def draw_card(self, value=None):
         """
         Draws a card from the deck.
 
         If the deck is empty, it is shuffled again before drawing a card.
 
+        Parameters
+        ----------
+        value : tuple, optional
+            The vector of the card to draw, as chosen by the game state. Defaults to
+            None, which draws the top of the deck.
+
         Returns:
             Card: The card that was drawn from the deck.
         """
+        if value is None:
+            if not self.cards:
+                self.shuffle_deck()
+
+            card = self.cards.pop(0)
+            self.drawn_cards.append(card)
+
+            return card
+
+        # A ordem é a do estado do jogo, que já embaralhou se precisou
         if not self.cards:
-            self.shuffle_deck()
+            self.cards = self.drawn_cards.copy()
+            self.drawn_cards.clear()
 
-        card = self.cards.pop(0)
+        card = next(card for card in self.cards if card.value == value)
+        self.cards.remove(card)
         self.drawn_cards.append(card)
 
         return card
@@ -0,0 +1,501 @@
+import math
+import time
+
+import bitboard
+import zobrist
+from deck import DrawDistribution
+from config import *
+
+# Valores de um estado para o rider que resolve: derrota, empate e vitória
+LOSS = 0.0
+DRAW = 0.5
+WIN = 1.0
+
+# Tipos de valor guardados na tabela: exato, ou só um limite inferior ou superior
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Profundidade das entradas que não dependem do horizonte da busca
+SOLVED = 1 << 30
+
+
+def crowded(state):
+    """
+    Check if a state is an endgame small enough to solve.
+
+    Parameters
+    ----------
+    state : GameState
+        The state.
+
+    Returns
+    -------
+    bool
+        True if exactly two riders are alive and their trails cover at least
+        ENDGAME_CROWDING of the board's vertices.
+    """
+    if state.alive.count(True) != 2:
+        return False
+
+    covered = 0
+
+    for index, flag in enumerate(state.alive):
+        if flag:
+            covered |= state.vertices[index]
+
+    return covered.bit_count() >= ENDGAME_CROWDING * bitboard.SIDE**2
+
+
+class EndgameSolver:
+    """
+    Expectimax solver of two-rider endgames, with alpha-beta-style pruning.
+
+    The rider to move maximizes its value (1 for a win, 0.5 when both die, 0
+    for a loss) and the rival minimizes it. The solver only knows what its rider
+    sees: a card drawn is dealt when its rider is about to choose, as a chance
+    node over the cards that may still be drawn, weighted by their
+    DrawDistribution, and the rival's hand stays hidden. Every hand of the
+    rival is as likely among the cards not seen, and the rival plays the best
+    card of its hand, so its move is worth the expected minimum of the values of
+    those cards. Chance nodes are pruned with Star1: the values are bounded, so
+    the cards not dealt yet bound the expected value.
+
+    The search deepens one move at a time until no branch reaches the horizon,
+    where a state is worth a draw, or until the node or time limit. States are
+    memoized in a TranspositionTable by their Zobrist hash, the hands and the
+    cards left, with the depth they were searched to. The collisions of the
+    moves are kept in a table of their own.
+
+    Attributes
+    ----------
+    node_limit : int
+        The number of nodes after which a solve stops.
+    budget : float
+        The wall-clock time, in seconds, after which a solve stops.
+    table : TranspositionTable
+        The values found, kept from one solve to the next.
+    collisions : TranspositionTable
+        The collisions of the moves tried, kept from one solve to the next.
+
+    Methods
+    -------
+    solve(self, state, cancel=None)
+        Find the best cards of the rider to move.
+    __value(self, state, depth, alpha, beta)
+        Return the value of a state where a rider chooses a card.
+    __respond(self, state, depth)
+        Return the expected value of the move of the rival, whose hand is hidden.
+    __play(self, state, card, depth, alpha, beta)
+        Return the value of playing a card.
+    __deal(self, state, depth, alpha, beta)
+        Return the expected value of the card drawn by the rider to move.
+    __out_of_limits(self)
+        Check if the solve ran out of nodes or time, or was cancelled.
+    __hide(state, rider)
+        Put the cards of a rider's hand back among the unknown ones.
+    __key(state)
+        Return the hash of a state, with its hands and the cards left.
+    """
+
+    def __init__(self, node_limit=ENDGAME_NODES, budget=ENDGAME_BUDGET, table=None):
+        """
+        Initialize the EndgameSolver object.
+
+        Parameters
+        ----------
+        node_limit : int, optional
+            The number of nodes after which a solve stops. Defaults to ENDGAME_NODES.
+        budget : float, optional
+            The time, in seconds, after which a solve stops. Defaults to ENDGAME_BUDGET.
+        table : TranspositionTable, optional
+            The table of the values. Defaults to None, which creates one.
+
+        Returns
+        -------
+        None
+        """
+        self.node_limit = node_limit
+        self.budget = budget
+        self.table = table if table is not None else zobrist.TranspositionTable()
+        self.collisions = zobrist.TranspositionTable()
+
+        # Estado de cada resolução
+        self.__player = None
+        self.__nodes = 0
+        self.__deadline = 0.0
+        self.__cancel = None
+        self.__stopped = False
+        self.__horizon = 0
+
+    def solve(self, state, cancel=None):
+        """
+        Find the best cards of the rider to move.
+
+        The result is the one of the deepest search finished within the limits.
+
+        Parameters
+        ----------
+        state : GameState
+            The state, with two riders alive, which is not changed.
+        cancel : threading.Event, optional
+            An event that stops the solve at once. Defaults to None.
+
+        Returns
+        -------
+        tuple
+            The vectors of the cards with the best value (empty if the search
+            told none of the cards apart, or finished no depth) and the
+            statistics of the solve (nodes, depth, value, whether it is exact,
+            and elapsed time).
+        """
+        start = time.perf_counter()
+
+        self.__player = state.current
+        self.__nodes = 0
+        self.__deadline = start + self.budget
+        self.__cancel = cancel
+        self.__stopped = False
+
+        state = state.clone(territory=False)
+        hand = sorted(set(state.hands[self.__player]))
+
+        # A mão do rival é uma das que podem sair das cartas que o rider não viu
+        for index, flag in enumerate(state.alive):
+            if flag and index != self.__player:
+                self.__hide(state, index)
+
+        best = []
+        stats = {"nodes": 0, "depth": 0, "value": None, "exact": False}
+        depth = 0
+
+        while not stats["exact"]:
+            depth += 1
+            self.__horizon = 0
+
+            # Uma janela um pouco abaixo do melhor valor mantém os empates
+            values = {}
+            alpha = LOSS
+
+            for card in hand:
+                values[card] = self.__play(state, card, depth, alpha, WIN)
+                alpha = max(alpha, values[card] - 1e-9)
+
+            if self.__stopped:
+                break
+
+            value = max(values.values())
+            best = [card for card in hand if values[card] >= value - 1e-9]
+
+            stats.update(depth=depth, value=value, exact=not self.__horizon)
+
+        stats["nodes"] = self.__nodes
+        stats["elapsed"] = time.perf_counter() - start
+
+        # Se todas as cartas valem o mesmo, a busca não ajuda a escolher
+        if len(best) == len(hand):
+            best = []
+
+        return best, stats
+
+    def __value(self, state, depth, alpha, beta):
+        """
+        Return the value of a state where a rider chooses a card.
+
+        Parameters
+        ----------
+        state : GameState
+            The state.
+        depth : int
+            The number of moves left before the horizon.
+        alpha : float
+            The value the solving rider is already sure of.
+        beta : float
+            The value its rival is already sure of.
+
+        Returns
+        -------
+        float
+            The value for the solving rider, or a bound of it outside (alpha, beta).
+        """
+        if state.finished():
+            if state.alive[self.__player]:
+                return WIN
+
+            return LOSS if any(state.alive) else DRAW
+
+        if self.__out_of_limits():
+            return DRAW
+
+        if not depth:
+            self.__horizon += 1
+            return DRAW
+
+        rider = state.current
+        maximizing = rider == self.__player
+
+        # A carta pescada só é revelada quando o rider vai jogar
+        if maximizing and None in state.hands[rider]:
+            return self.__deal(state, depth, alpha, beta)
+
+        key = self.__key(state)
+        entry = self.table.get(key)
+
+        if entry is not None and entry[2] >= depth:
+            value, bound, entry_depth = entry
+
+            if entry_depth != SOLVED:
+                self.__horizon += 1
+
+            if bound == EXACT:
+                return value
+            if bound == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+
+            if alpha >= beta:
+                return value
+
+        window = (alpha, beta)
+        horizon = self.__horizon
+
+        if maximizing:
+            best = LOSS
+
+            for card in sorted(set(state.hands[rider])):
+                value = self.__play(state, card, depth, alpha, beta)
+                best = max(best, value)
+                alpha = max(alpha, value)
+
+                if alpha >= beta:
+                    break
+        else:
+            best = self.__respond(state, depth)
+
+        # Um resultado interrompido pelos limites não é guardado
+        if self.__stopped:
+            return best
+
+        if best <= window[0]:
+            bound = UPPER
+        elif best >= window[1]:
+            bound = LOWER
+        else:
+            bound = EXACT
+
+        searched = depth if self.__horizon != horizon else SOLVED
+        self.table.put(key, (best, bound, searched), searched)
+
+        return best
+
+    def __respond(self, state, depth):
+        """
+        Return the expected value of the move of the rival, whose hand is hidden.
+
+        Each card that may be in the hand is played once. The rival keeps the
+        card with the lowest value, so the i-th lowest of the n cards is played
+        when it is in the hand and the lower ones are not, with probability
+        C(n - 1 - i, k - 1) / C(n, k) for a hand of k cards.
+
+        Parameters
+        ----------
+        state : GameState
+            The state, with the rival to move and its hand hidden.
+        depth : int
+            The number of moves left before the horizon.
+
+        Returns
+        -------
+        float
+            The expected value for the solving rider.
+        """
+        rider = state.current
+        size = len(state.hands[rider])
+        cards = sorted(set(state.deck))
+
+        if len(cards) < size:
+            self.__horizon += 1
+            return DRAW
+
+        # Sem janela, pois cada valor pesa na média e não só o menor
+        values = []
+
+        for card in cards:
+            child = state.clone(territory=False)
+            child.hands[rider][child.hands[rider].index(None)] = card
+            child.deck.remove(card)
+
+            values.append(self.__play(child, card, depth, LOSS, WIN))
+
+            if self.__stopped:
+                return DRAW
+
+        values.sort()
+        total = math.comb(len(values), size)
+
+        return sum(
+            value * math.comb(len(values) - 1 - index, size - 1) / total
+            for index, value in enumerate(values)
+        )
+
+    def __play(self, state, card, depth, alpha, beta):
+        """
+        Return the value of playing a card.
+
+        Parameters
+        ----------
+        state : GameState
+            The state, with the card in the hand of the rider to move.
+        card : tuple
+            The vector of the card.
+        depth : int
+            The number of moves left before the horizon, this one included.
+        alpha : float
+            The value the solving rider is already sure of.
+        beta : float
+            The value its rival is already sure of.
+
+        Returns
+        -------
+        float
+            The value of the state after the move.
+        """
+        child = state.clone(territory=False)
+
+        if not child.collision(card, table=self.collisions):
+            # Com o deck no fim, as cartas reembaralhadas incluiriam as ainda
+            # desconhecidas, então a busca para ali
+            if len(child.deck) <= sum(hand.count(None) for hand in child.hands):
+                self.__horizon += 1
+                return DRAW
+
+            # A carta pescada fica desconhecida e o deck, com as que podem sair
+            child.deck.insert(0, None)
+
+        child.step(card, table=self.collisions)
+
+        return self.__value(child, depth - 1, alpha, beta)
+
+    def __deal(self, state, depth, alpha, beta):
+        """
+        Return the expected value of the card drawn by the rider to move.
+
+        Parameters
+        ----------
+        state : GameState
+            The state, with an unknown card (None) in the hand of the rider to move.
+        depth : int
+            The number of moves left before the horizon.
+        alpha : float
+            The value the solving rider is already sure of.
+        beta : float
+            The value its rival is already sure of.
+
+        Returns
+        -------
+        float
+            The expected value, or a bound of it outside (alpha, beta).
+        """
+        rider = state.current
+        distribution = DrawDistribution(state.deck)
+
+        # Star1: o que falta sortear vale entre LOSS e WIN
+        done = 0.0
+        left = 1.0
+
+        for card in sorted(set(state.deck)):
+            probability = distribution.vector_probability(card)
+            left -= probability
+
+            child = state.clone(territory=False)
+            child.hands[rider][child.hands[rider].index(None)] = card
+            child.drawn[child.drawn.index(None)] = card
+            child.deck.remove(card)
+
+            value = self.__value(
+                child,
+                depth,
+                max(LOSS, (alpha - done - left * WIN) / probability),
+                min(WIN, (beta - done - left * LOSS) / probability),
+            )
+            done += probability * value
+
+            if done + left * WIN <= alpha:
+                return done + left * WIN
+
+            if done + left * LOSS >= beta:
+                return done + left * LOSS
+
+        return done
+
+    def __out_of_limits(self):
+        """
+        Check if the solve ran out of nodes or time, or was cancelled.
+
+        Returns
+        -------
+        bool
+            True if the solve must stop.
+        """
+        self.__nodes += 1
+
+        # O relógio é consultado só de vez em quando
+        if self.__nodes >= self.node_limit or (
+            not self.__nodes % 16 and time.perf_counter() > self.__deadline
+        ):
+            self.__stopped = True
+
+        if self.__cancel is not None and self.__cancel.is_set():
+            self.__stopped = True
+
+        return self.__stopped
+
+    @staticmethod
+    def __hide(state, rider):
+        """
+        Put the cards of a rider's hand back among the unknown ones.
+
+        Parameters
+        ----------
+        state : GameState
+            The state, which is changed.
+        rider : int
+            The rider, by its position in the turn order.
+
+        Returns
+        -------
+        None
+        """
+        hand = state.hands[rider]
+
+        state.deck.extend(card for card in hand if card is not None)
+        state.hands[rider] = [None] * len(hand)
+
+    @staticmethod
+    def __key(state):
+        """
+        Return the hash of a state, with its hands and the cards left.
+
+        Parameters
+        ----------
+        state : GameState
+            The state.
+
+        Returns
+        -------
+        int
+            The 64-bit key.
+        """
+        key = state.zobrist
+
+        for index, hand in enumerate(state.hands):
+            if state.alive[index]:
+                for card in hand:
+                    key ^= zobrist.hand_key(index, card)
+
+        for card in state.deck:
+            if card is not None:
+                key ^= zobrist.pool_key(card)
+
+        return key
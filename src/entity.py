@@ -1,6 +1,8 @@
 import pygame
 from abc import ABCMeta
 
+from textures import TextureCache
+
 
 class Entity(pygame.sprite.WeakSprite, metaclass=ABCMeta):
     """
@@ -8,6 +10,7 @@ class Entity(pygame.sprite.WeakSprite, metaclass=ABCMeta):
 
     This class inherits from pygame.sprite.Sprite and serves as a base class for all game entities.
     It provides common functionality such as loading and scaling images, as well as updating the entity's state.
+    Images come from the shared TextureCache, so each texture is decoded only once per process.
 
     Attributes
     ----------
@@ -43,8 +46,7 @@ class Entity(pygame.sprite.WeakSprite, metaclass=ABCMeta):
         None
         """
         super().__init__()
-        self.image = pygame.image.load(image_path).convert_alpha()
-        self.image = pygame.transform.smoothscale(self.image, scale_size)
+        self.image = TextureCache().load(image_path, scale_size)
         self.rect = self.image.get_rect(topleft=x_y)
 
     def update(self):
@@ -0,0 +1,211 @@
+import functools
+import textwrap
+from collections import OrderedDict
+
+import pygame
+
+import utilities
+from config import *
+
+
+@utilities.Singleton
+class FontRegistry:
+    """
+    Registry of loaded fonts, so each (font, size) pair is opened only once.
+
+    Methods
+    -------
+    get(self, font_name, size)
+        Return the font, loading it if needed.
+    """
+
+    def __init__(self):
+        """
+        Initialize the FontRegistry object.
+
+        Returns
+        -------
+        None
+        """
+        self.__fonts = {}
+
+    def get(self, font_name, size):
+        """
+        Return the font, loading it if needed.
+
+        Parameters
+        ----------
+        font_name : str
+            The name or path of the font file.
+        size : int
+            The size of the font.
+
+        Returns
+        -------
+        pygame.font.Font
+            The shared font object.
+        """
+        key = (font_name, size)
+
+        if key not in self.__fonts:
+            self.__fonts[key] = pygame.font.Font(font_name, size)
+
+        return self.__fonts[key]
+
+
+@utilities.Singleton
+class TextCache:
+    """
+    LRU cache of rendered text surfaces.
+
+    Rendering is only done the first time a text is drawn with a given font,
+    size and color; the least recently used surfaces are dropped once the
+    cache exceeds its memory cap.
+
+    Attributes
+    ----------
+    max_bytes : int
+        The maximum memory, in bytes, used by the cached surfaces.
+    hits : int
+        Number of texts served from the cache.
+    misses : int
+        Number of texts that had to be rendered.
+
+    Methods
+    -------
+    render(self, font_name, text, size, color)
+        Return the rendered text, rendering it if needed.
+    hit_rate(self)
+        Return the fraction of requests served from the cache.
+    clear(self)
+        Remove every cached surface.
+    """
+
+    def __init__(self, max_bytes=TEXT_CACHE_BYTES):
+        """
+        Initialize the TextCache object.
+
+        Parameters
+        ----------
+        max_bytes : int, optional
+            The maximum memory, in bytes, used by the cached surfaces. Defaults to TEXT_CACHE_BYTES.
+
+        Returns
+        -------
+        None
+        """
+        self.max_bytes = max_bytes
+        self.__surfaces = OrderedDict()
+        self.__bytes = 0
+
+        # Contadores de uso
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font_name, text, size, color):
+        """
+        Return the rendered text, rendering it if needed.
+
+        Parameters
+        ----------
+        font_name : str
+            The name or path of the font file.
+        text : str
+            The text to render.
+        size : int
+            The size of the font.
+        color : tuple
+            The color of the text.
+
+        Returns
+        -------
+        pygame.Surface
+            The shared surface with the text, which must not be drawn upon.
+        """
+        key = (text, size, tuple(color), font_name)
+
+        # Se já estiver renderizado, o marca como usado recentemente
+        surface = self.__surfaces.get(key)
+
+        if surface is not None:
+            self.__surfaces.move_to_end(key)
+            self.hits += 1
+
+            return surface
+
+        self.misses += 1
+
+        surface = FontRegistry().get(font_name, size).render(text, True, color)
+        self.__surfaces[key] = surface
+        self.__bytes += self.__size_of(surface)
+
+        # Remove os menos usados até respeitar o limite de memória
+        while self.__bytes > self.max_bytes and len(self.__surfaces) > 1:
+            old_key, old_surface = self.__surfaces.popitem(last=False)
+            self.__bytes -= self.__size_of(old_surface)
+
+        return surface
+
+    def hit_rate(self):
+        """
+        Return the fraction of requests served from the cache.
+
+        Returns
+        -------
+        float
+            The hit rate, between 0 and 1.
+        """
+        total = self.hits + self.misses
+
+        if not total:
+            return 0.0
+
+        return self.hits / total
+
+    def clear(self):
+        """
+        Remove every cached surface.
+
+        Returns
+        -------
+        None
+        """
+        self.__surfaces.clear()
+        self.__bytes = 0
+
+    @staticmethod
+    def __size_of(surface):
+        """
+        Return the memory used by a surface.
+
+        Parameters
+        ----------
+        surface : pygame.Surface
+            The surface.
+
+        Returns
+        -------
+        int
+            The size of its pixels, in bytes.
+        """
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+@functools.lru_cache(maxsize=64)
+def wrap_text(text, max_line_length):
+    """
+    Split a text into lines, remembering the result for the next frames.
+
+    Parameters
+    ----------
+    text : str
+        The text to split.
+    max_line_length : int
+        The maximum number of characters per line.
+
+    Returns
+    -------
+    tuple
+        The lines of the text.
+    """
+    return tuple(textwrap.wrap(text, width=max_line_length))
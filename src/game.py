@@ -1,10 +1,16 @@
 import pygame
+import random
 import sys
 
 from entity import *
 from rider import *
 from deck import *
+import moves
 import utilities
+from fonts import TextCache
+from state import GameState
+from thinker import Thinker
+from trail import TrailLayer
 from config import *
 
 
@@ -29,6 +35,10 @@ class GridGame(Entity):
         The number of bots in the game.
     next_menu : str
         The next menu to be displayed.
+    seed : int
+        The seed of the match, which replays it when passed back.
+    _rng : random.Random
+        The random number generator of the match, used by the deck and the bots.
     _game_turn : int
         The current turn of the game.
     _mov_stage : int
@@ -43,6 +53,23 @@ class GridGame(Entity):
         The group of bots.
     _all_riders : Group
         The group of all riders.
+    _trail_layer : TrailLayer
+        The board with the committed trails already drawn.
+    _riders : list
+        The riders in turn order, indexed like the game state.
+    _state : GameState
+        The rules of the match: every card is played on it first and the sprites
+        follow its results.
+    _outcome : tuple or None
+        The move being animated: its rider, the length of its path when the move
+        started, the pixel where it started, the card and the collision found by
+        the game state.
+    _thinker : Thinker
+        The worker thread where the searching bots choose their cards.
+    _thinking : Bot or None
+        The bot whose turn waits for the search in the background.
+    _hovered : tuple or None
+        The turn and the card of the last look ahead from the hovered card.
 
     Methods
     -------
@@ -52,6 +79,8 @@ class GridGame(Entity):
         Update the game state.
     draw(self, screen)
         Draw the game elements on the screen.
+    restart_player(self)
+        Recreate the player for this game.
     choice_preview(self, screen)
         Preview the selected card and its path on the screen.
     __preview_selected_card(card, screen)
@@ -70,13 +99,34 @@ class GridGame(Entity):
         Perform the movement of the next player in the game.
     __first_turn_collision(self)
         Verifies if any rider has collided during the first turn.
-    check_collision(self, rider)
-        Check for collisions between the rider and the game elements.
+    __play_card(self, rider, card)
+        Play a card on the game state and start animating its move.
+    __think_ahead(self, state)
+        Start the search of the rider to move in a state, if it is a searching bot.
+    __hover_ahead(self)
+        Start the search of the next bot as if the hovered card were played.
+    __collect_thought(self)
+        Play the card of the waiting bot once its search is over.
+    __move_progress(outcome)
+        Return how far along its move the rider of an outcome is.
+    __check_outcome(self, outcome)
+        Apply the collision of a move once the animation reaches it.
     __kill_rider(self, rider)
         Kills the specified rider and advances the turn.
     """
 
-    def __init__(self, image_path, x_y, scale_size, bot_number, volume, state_control):
+    def __init__(
+        self,
+        image_path,
+        x_y,
+        scale_size,
+        bot_number,
+        volume,
+        state_control,
+        human=True,
+        seed=None,
+        policies=None,
+    ):
         """
         Initializes the Game object.
 
@@ -90,6 +140,18 @@ class GridGame(Entity):
             The scale size of the game object.
         bot_number : int
             The number of bots in the game.
+        volume : float
+            The volume of the sound effects.
+        state_control : StateControl
+            The object that receives the playing and winner states.
+        human : bool, optional
+            Whether the first rider is controlled by the player. Defaults to True.
+            Without a human, up to 4 bots play among themselves from the start.
+        seed : int, optional
+            The seed of the match. Defaults to None, which picks a random one.
+        policies : list, optional
+            The policy of each bot, repeated when there are more bots than
+            policies. Defaults to None, which uses BOT_POLICY.
 
         Returns
         -------
@@ -104,47 +166,88 @@ class GridGame(Entity):
         self._mov_stage = -1
         self._clicked = False
 
+        # Todo sorteio da partida (deck e bots) sai de um gerador com semente
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self._rng = random.Random(self.seed)
+
         # Cria o deck
-        self._deck = Deck(CARDS_PATH, (CARD_X, CARD_Y))
+        self._deck = Deck(CARDS_PATH, (CARD_X, CARD_Y), self._rng)
 
-        # Cria o jogador
-        self._player = Player(
-            1, (GRID_X / 2 - 1, GRID_Y / 2 - 2), (RIDER_X, RIDER_Y), self._deck
-        )
+        # Cria o jogador (sem humano, o grupo vazio age como um jogador morto)
+        if human:
+            self._player = Player(
+                1, (GRID_X / 2 - 1, GRID_Y / 2 - 2), (RIDER_X, RIDER_Y), self._deck
+            )
+        else:
+            self._player = pygame.sprite.GroupSingle()
 
-        # Cria os bots
+        # Cria os bots, numerados depois do jogador
         __bot_list = []
+        __first_bot = 2 if human else 1
+        __policies = policies or [BOT_POLICY]
 
         for bot in range(bot_number):
             __bot_list.append(
                 Bot(
-                    bot + 2,
+                    bot + __first_bot,
                     (GRID_X / 2 - 1, GRID_Y / 2 - 2),
                     (RIDER_X, RIDER_Y),
                     self._deck,
+                    __policies[bot % len(__policies)],
                 )
             )
 
         self._bots = pygame.sprite.OrderedUpdates(__bot_list[::-1])
 
         # Grupo com todos personagens animados (bots e player)
-        self._all_riders = pygame.sprite.Group(
-            (self._player.sprite()), self._bots.sprites()[::-1]
-        )
+        __rider_list = self._bots.sprites()[::-1]
+
+        if human:
+            __rider_list.insert(0, self._player.sprite())
+
+        self._all_riders = pygame.sprite.Group(__rider_list)
+
+        # Camada com o tabuleiro e as linhas já percorridas
+        self._trail_layer = TrailLayer(self.image, self.rect)
+
+        for rider in self._all_riders.sprites():
+            self._trail_layer.track(rider)
+
+        # Estado do jogo, sem sprites, onde cada carta é jogada antes de ser animada
+        self._riders = self._all_riders.sprites()
+        self._state = GameState.capture(self._riders, self._deck)
+
+        # Colisão do movimento em andamento, calculada uma vez ao escolher a carta
+        self._outcome = None
+
+        # Os bots que buscam pensam numa thread, enquanto o jogo segue desenhando
+        self._thinker = Thinker()
+        self._thinking = None
+        self._hovered = None
 
         # Carrega efeitos sonoros pra memória
         self.volume = volume
         self.sound = []
 
-        for index in range(SOUND_NUMBER):
-            archive = "sound_" + str(index) + ".ogg"
-            sound = pygame.mixer.Sound(SOUND_PATH + archive)
-            sound.set_volume(self.volume / 2)
-            self.sound.append(sound)
-
-        # Cria um canal para tocar os efeitos sonoros
-        self.channel = pygame.mixer.Channel(1)
-        self.channel.set_volume(self.volume)
+        # Sem mixer (como em partidas headless) o jogo fica em silêncio
+        if not pygame.mixer.get_init():
+            self.sound = [utilities.SilentSound()] * SOUND_NUMBER
+            self.channel = utilities.SilentSound()
+        else:
+            for index in range(SOUND_NUMBER):
+                archive = "sound_" + str(index) + ".ogg"
+                sound = pygame.mixer.Sound(SOUND_PATH + archive)
+                sound.set_volume(self.volume / 2)
+                self.sound.append(sound)
+
+            # Cria um canal para tocar os efeitos sonoros
+            self.channel = pygame.mixer.Channel(1)
+            self.channel.set_volume(self.volume)
+
+        # Sem humano, os bots começam a jogar imediatamente
+        if not human:
+            self._clicked = True
+            self.__next_player_movement()
 
     def update(self):
         """
@@ -162,6 +265,7 @@ class GridGame(Entity):
         # Eventos principais deste menu
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                self._thinker.shutdown()
                 self.channel.stop()
                 pygame.quit()
                 sys.exit()
@@ -169,6 +273,7 @@ class GridGame(Entity):
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.state_control.playing = False
+                    self._thinker.shutdown()
                     self.channel.stop()
                     return
 
@@ -185,24 +290,43 @@ class GridGame(Entity):
             # E então retorna ao state_control as informações pertinentes
             self.state_control.winner = self._all_riders.sprites()[0]._number
             self.state_control.playing = False
+            self._thinker.shutdown()
             self.channel.stop()
             return
 
+        # Enquanto o humano escolhe, o próximo bot já pensa na carta sob o mouse
+        if not self._clicked and self._player:
+            self.__hover_ahead()
+
+        # A vez de um bot que ainda pensa só começa quando a busca acabar
+        if self._thinking:
+            self.__collect_thought()
+
         # Se tiver clicado, roda o movimento do jogador ou dos bots e testa colisão
-        if self._clicked and self._all_riders:
+        if self._clicked and self._all_riders and not self._thinking:
             rider = self._all_riders.sprites()[self._mov_stage]
 
-            # Só movimenta se o jogador estiver vivo
-            if rider.state_alive:
+            # Só movimenta se o jogador estiver vivo e com uma carta escolhida
+            # (quando dois morrem juntos, a vez fica parada até o fim das animações)
+            if rider.state_alive and rider.clicked_card != (0, 0):
+                # Guarda antes de mover, pois ao terminar o próximo já escolhe a carta
+                outcome = self._outcome
+
                 self.move_player(rider)
-                self.check_collision(rider)
+                self.__check_outcome(outcome)
 
         # Verifica se alguém morreu e roda sua animação
-        for rider in self._all_riders:
+        removed = 0
+
+        for index, rider in enumerate(self._all_riders.sprites()):
             if not rider.state_alive:
                 # Quando acabar continua a rodada
                 if rider.update_death():
-                    self._mov_stage -= 1
+                    # Só recua a vez se o morto já tiver jogado neste turno
+                    if index - removed <= self._mov_stage:
+                        self._mov_stage -= 1
+
+                    removed += 1
                     self.__end_death()
 
         return False
@@ -220,14 +344,8 @@ class GridGame(Entity):
         -------
             None
         """
-        # Desenha o tabuleiro no layer mais baixo
-        screen.blit(self.image, self.rect)
-
-        # Desenha as linhas dos riders
-        for rider in self._all_riders.sprites():
-            pygame.draw.lines(
-                screen, rider._color, False, rider._path + [rider.rect.center], width=6
-            )
+        # Desenha o tabuleiro e as linhas dos riders no layer mais baixo
+        self._trail_layer.draw(screen, self._all_riders.sprites())
 
         # Desenha o contorno e as cartas
         if self._player:
@@ -243,6 +361,38 @@ class GridGame(Entity):
             if not rider.state_alive:
                 screen.blit(rider.last_image, rider.last_rect)
 
+        # Mostra a semente, para que a partida possa ser repetida
+        text = TextCache().render(
+            pygame.font.get_default_font(), "seed " + str(self.seed), 16, WHITE
+        )
+        screen.blit(text, text.get_rect(center=((GRID_X + WIDTH) / 2, HEIGHT - 20)))
+
+    def restart_player(self):
+        """
+        Recreate the player for this game, since Player is a singleton that outlives matches.
+
+        Returns
+        -------
+        None
+        """
+        # Para de desenhar a linha do jogador antigo
+        self._trail_layer.untrack(self._player.sprite())
+
+        self._player.restart(self._deck)
+        self._trail_layer.track(self._player.sprite())
+
+        # O jogador volta a ser o primeiro a jogar
+        temp_riders = self._all_riders.sprites()
+        self._all_riders = pygame.sprite.OrderedUpdates(self._player, temp_riders)
+        self._mov_stage = -1
+
+        # O estado passa a ter o novo jogador, e o que foi pensado antes não vale
+        self._riders = self._all_riders.sprites()
+        self._state = GameState.capture(self._riders, self._deck)
+        self._thinker.cancel()
+        self._thinking = None
+        self._hovered = None
+
     def choice_preview(self, screen):
         """
         Preview the selected card and its path on the screen.
@@ -450,12 +600,22 @@ class GridGame(Entity):
         # Caso contrário, prepara o jogo para rodar mais uma animação
         next_player = self._all_riders.sprites()[self._mov_stage]
 
+        # Quem morreu no primeiro turno só espera a animação de morte acabar, e
+        # com um só rider vivo a partida já acabou
+        if not next_player.state_alive or self._state.finished():
+            return
+
+        # Bots que buscam esperam a thread, sem travar os quadros
+        if not card and self.__searches(next_player):
+            self._thinking = next_player
+            self.__collect_thought()
+            return
+
         # Se não tiver passado uma carta, faz o rider escolher (em geral um bot)
         if not card:
-            card = next_player.choose_card(self._all_riders)
+            card = next_player.choose_card(self._all_riders, self._state)
 
-        # Atualiza o estado do próximo jogador
-        next_player.select_card(card)
+        self.__play_card(next_player, card)
 
         # Toca o som de movimento indefinidamente
         self.channel.play(self.sound[1], -1)
@@ -471,57 +631,223 @@ class GridGame(Entity):
         -------
             None
         """
-        # Verifica se alguém colidiu no primeiro turno
-        for rider in self._all_riders.sprites()[::-1]:
-            # Testa apenas colisão com as linhas pois é impossivel colidir com fronteira
-            if (
-                utilities.check_line_collision(self._all_riders, rider)
-                and self._game_turn
-            ):
+        # O estado já removeu quem terminou o primeiro turno sobre uma linha
+        for index, rider in enumerate(self._riders):
+            if rider.state_alive and not self._state.alive[index]:
                 rider.kill_rider()
                 self.sound[0].play()
-                continue
 
-    def check_collision(self, rider):
+    def __play_card(self, rider, card):
         """
-        Check for collisions between the rider and the game elements.
+        Play a card on the game state and start animating its move.
+
+        The state finds, once, where the move collides, and which card the rider
+        draws if it survives.
 
         Parameters
         ----------
-            rider (Rider): The rider object to check for collisions.
+        rider : Rider
+            The rider that moves.
+        card : Card
+            The card played.
 
         Returns
         -------
             None
         """
-        # Testa colisão com a fronteira
-        if utilities.check_border_collision(rider.rect.center):
-            rider.kill_rider()
-            self.sound[0].play()
+        index = self._state.current
+        collision = self._state.step(card, self._rng, timed=True)
+
+        # Só quem sobrevive pesca a carta que o estado tirou do deck
+        draw = None if collision else self._state.hands[index][-1]
+        rider.select_card(card, draw)
+
+        # O estado identifica os riders pela posição na ordem de jogo
+        if collision and collision[2] is not None:
+            collision = collision[:2] + (self._riders[collision[2]],)
+
+        self._outcome = (rider, len(rider._path), rider.rect.center, card, collision)
+
+        # O próximo já pode pensar durante a animação deste movimento
+        self.__think_ahead(self._state)
+
+    @staticmethod
+    def __searches(rider):
+        """
+        Check if a rider chooses its cards with a search.
+
+        Parameters
+        ----------
+        rider : Rider
+            The rider.
+
+        Returns
+        -------
+        bool
+            True for bots with the "mcts" policy, False otherwise.
+        """
+        return getattr(rider, "policy", None) == "mcts"
+
+    def __think_ahead(self, state):
+        """
+        Start the search of the rider to move in a state, if it is a searching bot.
+
+        Parameters
+        ----------
+        state : GameState
+            The state, which may be the real one or a guess of what comes next.
+
+        Returns
+        -------
+        None
+        """
+        if state.finished():
             return
 
-        # Verifica se colidiram entre si
-        temp_group = self._all_riders.copy()
-        temp_group.remove(rider)
+        rider = self._riders[state.current]
 
-        for enemy in temp_group:
-            if utilities.check_riders_collision(rider, enemy) and self._game_turn:
-                rider.kill_rider()
-                enemy.kill_rider()
-                self.channel.play(self.sound[0])
-                return
+        if not rider.state_alive or not self.__searches(rider):
+            return
 
-        # Testa colisão com as linhas
-        if utilities.check_line_collision(self._all_riders, rider) and self._game_turn:
-            rider.kill_rider()
-            self.sound[0].play()
+        # A semente depende só da partida, do bot e do turno, e não de quando a busca começou
+        rng = random.Random("{}:{}:{}".format(self.seed, rider._number, state.turn))
+        self._thinker.start(rider, state, rng)
+
+    def __hover_ahead(self):
+        """
+        Start the search of the next bot as if the hovered card were played.
+
+        Returns
+        -------
+        None
+        """
+        card = self.__card_clicked()
+
+        if not card:
+            return
+
+        # Enquanto o mouse fica na mesma carta, o palpite já foi feito
+        hovered = (self._state.turn, card)
+
+        if hovered == self._hovered:
+            return
+
+        self._hovered = hovered
+
+        # Joga a carta numa cópia; se o deck for embaralhado o palpite não vale,
+        # e a chave diferente faz a busca recomeçar na vez do bot
+        state = self._state.clone()
+        state.step(card, random.Random(self.seed))
+        self.__think_ahead(state)
+
+    def __collect_thought(self):
+        """
+        Play the card of the waiting bot once its search is over.
+
+        Returns
+        -------
+        None
+        """
+        # Começa a busca se nada foi pensado para este estado
+        self.__think_ahead(self._state)
+        thought = self._thinker.result(self._state)
+
+        if thought is None:
+            return
+
+        rider = self._thinking
+        self._thinking = None
+
+        card = rider.choose_card(self._all_riders, self._state, thought)
+        self.__play_card(rider, card)
+
+        # Toca o som de movimento indefinidamente
+        self.channel.play(self.sound[1], -1)
+
+    @staticmethod
+    def __move_progress(outcome):
+        """
+        Return how far along its move the rider of an outcome is.
+
+        Parameters
+        ----------
+        outcome : tuple
+            The outcome of the move.
+
+        Returns
+        -------
+        float
+            The parametric time of the rider's position, 1 once the move is over.
+        """
+        rider, length, start, card, collision = outcome
+
+        # O movimento acabou quando o ponto final entrou no _path
+        if len(rider._path) != length:
+            return 1
+
+        vector = (card[0] * DISTANCE, -card[1] * DISTANCE)
+        offset = (rider.rect.centerx - start[0], rider.rect.centery - start[1])
+
+        progress = (offset[0] * vector[0] + offset[1] * vector[1]) / (
+            vector[0] ** 2 + vector[1] ** 2
+        )
+
+        # A dois pixels do alvo o movimento para, então o rider já chegou
+        axis = 0 if card[0] else 1
+
+        if abs(vector[axis]) * (1 - progress) <= 2:
+            return 1
+
+        return progress
+
+    def __check_outcome(self, outcome):
+        """
+        Apply the collision of a move once the animation reaches it.
+
+        Parameters
+        ----------
+        outcome : tuple or None
+            The outcome of the move.
+
+        Returns
+        -------
+            None
+        """
+        if outcome is None or outcome[4] is None:
+            return
+
+        rider = outcome[0]
+        time, cause, other = outcome[4]
+
+        if not rider.state_alive or self.__move_progress(outcome) < time:
             return
-        
+
+        rider.kill_rider()
+
+        # Colidiram entre si
+        if cause == moves.RIDER:
+            other.kill_rider()
+            self.channel.play(self.sound[0])
+        else:
+            self.sound[0].play()
+
     def __end_death(self):
         # Termina a rodada se não houver mais nenhuma animação ocorrendo
         for rider in self._all_riders.sprites():
             if not rider.state_alive:
                 return
 
-        # Se todos que sobraram estiverem vivos, continua a partida
-        self.__next_player_movement()
+        # Quem ainda está se movendo passa a vez ao terminar (como quando a
+        # morte foi no primeiro turno, durante o movimento do próximo)
+        riders = self._all_riders.sprites()
+
+        if 0 <= self._mov_stage < len(riders) and riders[self._mov_stage].clicked_card not in (
+            None,
+            (0, 0),
+        ):
+            return
+
+        # Se todos que sobraram estiverem vivos, continua a partida (a menos que
+        # a vez já esteja com um bot pensando)
+        if not self._thinking:
+            self.__next_player_movement()
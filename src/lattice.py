@@ -0,0 +1,378 @@
+from fractions import Fraction
+
+import utilities
+from config import *
+
+# Posição, em pixels, do vértice central do tabuleiro (de onde todos partem)
+ORIGIN = (GRID_X / 2 - 1, GRID_Y / 2 - 2)
+
+# Limites do tabuleiro em coordenadas do reticulado (os mesmos de utilities)
+BOUNDS = (
+    ((BORDER - ORIGIN[0]) / DISTANCE, (GRID_X - BORDER - ORIGIN[0]) / DISTANCE),
+    ((ORIGIN[1] - GRID_Y + BORDER) / DISTANCE, (ORIGIN[1] - BORDER) / DISTANCE),
+)
+
+
+def to_lattice(point):
+    """
+    Convert a position on the board, in pixels, to the nearest lattice vertex.
+
+    Parameters
+    ----------
+    point : tuple
+        The position (x, y) in pixels.
+
+    Returns
+    -------
+    tuple
+        The integer vertex (i, j), with j growing upwards like the cards.
+    """
+    return (
+        round((point[0] - ORIGIN[0]) / DISTANCE),
+        round((ORIGIN[1] - point[1]) / DISTANCE),
+    )
+
+
+def to_pixel(vertex):
+    """
+    Convert a lattice vertex to its position on the board, in pixels.
+
+    Parameters
+    ----------
+    vertex : tuple
+        The integer vertex (i, j).
+
+    Returns
+    -------
+    tuple
+        The position (x, y) in pixels.
+    """
+    return (ORIGIN[0] + vertex[0] * DISTANCE, ORIGIN[1] - vertex[1] * DISTANCE)
+
+
+def check_border_collision(vertex):
+    """
+    Check if a lattice vertex lies outside the board.
+
+    Parameters
+    ----------
+    vertex : tuple
+        The integer vertex (i, j).
+
+    Returns
+    -------
+    bool
+        True if the vertex collides with the borders, False otherwise.
+    """
+    return utilities.check_border_collision(to_pixel(vertex))
+
+
+def contact_interval(start, end, seg_start, seg_end):
+    """
+    Find where a move touches a segment, using exact integer arithmetic.
+
+    Parameters
+    ----------
+    start : tuple
+        The vertex where the move starts.
+    end : tuple
+        The vertex where the move ends.
+    seg_start : tuple
+        The first vertex of the segment.
+    seg_end : tuple
+        The last vertex of the segment.
+
+    Returns
+    -------
+    tuple or None
+        The first and last parametric times (Fractions between 0 and 1) along the move
+        in which it touches the segment, or None if they do not touch.
+    """
+    move = (end[0] - start[0], end[1] - start[1])
+    segment = (seg_end[0] - seg_start[0], seg_end[1] - seg_start[1])
+    offset = (seg_start[0] - start[0], seg_start[1] - start[1])
+
+    denominator = __cross(move, segment)
+
+    # Retas concorrentes: no máximo um ponto em comum
+    if denominator:
+        t = __cross(offset, segment)
+        u = __cross(offset, move)
+
+        # Traz tudo para denominador positivo antes de comparar
+        if denominator < 0:
+            denominator, t, u = -denominator, -t, -u
+
+        if 0 <= t <= denominator and 0 <= u <= denominator:
+            time = Fraction(t, denominator)
+            return (time, time)
+
+        return None
+
+    # Movimento parado: basta saber se o ponto está no segmento
+    if move == (0, 0):
+        if __cross(segment, offset) or not __between(start, seg_start, seg_end):
+            return None
+
+        return (Fraction(0), Fraction(0))
+
+    # Paralelas: só há contato se forem colineares
+    if __cross(move, offset) or __cross(move, (seg_end[0] - start[0], seg_end[1] - start[1])):
+        return None
+
+    # Projeta o segmento no movimento e intersecta com [0, 1]
+    length = __dot(move, move)
+    first = __dot(offset, move)
+    last = __dot((seg_end[0] - start[0], seg_end[1] - start[1]), move)
+
+    low = max(0, min(first, last))
+    high = min(length, max(first, last))
+
+    if low > high:
+        return None
+
+    return (Fraction(low, length), Fraction(high, length))
+
+
+def segments_touch(start, end, seg_start, seg_end, ignore=None):
+    """
+    Check if a move touches a segment.
+
+    Parameters
+    ----------
+    start : tuple
+        The vertex where the move starts.
+    end : tuple
+        The vertex where the move ends.
+    seg_start : tuple
+        The first vertex of the segment.
+    seg_end : tuple
+        The last vertex of the segment.
+    ignore : tuple, optional
+        A vertex where touching does not count. Defaults to None.
+
+    Returns
+    -------
+    bool
+        True if they touch anywhere but at ignore, False otherwise.
+    """
+    interval = contact_interval(start, end, seg_start, seg_end)
+
+    if interval is None:
+        return False
+
+    # Se tocarem em um único ponto, verifica se ele deve ser ignorado
+    if ignore is not None and interval[0] == interval[1]:
+        time = interval[0]
+        point = (
+            start[0] + time * (end[0] - start[0]),
+            start[1] + time * (end[1] - start[1]),
+        )
+
+        return point != tuple(ignore)
+
+    return True
+
+
+def last_vector_collision(card, last_card):
+    """
+    Check if a card goes back over the previous one.
+
+    Parameters
+    ----------
+    card : tuple
+        The current vector (x, y).
+    last_card : tuple
+        The previous vector (x, y).
+
+    Returns
+    -------
+    bool
+        True if the vectors are parallel and opposite, False otherwise.
+    """
+    return __cross(card, last_card) == 0 and __dot(card, last_card) < 0
+
+
+def trail_segments(rider, skip_last=False):
+    """
+    Iterate over the committed segments of a rider, in lattice coordinates.
+
+    Parameters
+    ----------
+    rider : Rider
+        The rider.
+    skip_last : bool, optional
+        Whether the last committed segment, where the rider now stands, is skipped. Defaults to False.
+
+    Yields
+    ------
+    tuple
+        The first and last vertex of each segment.
+    """
+    yield from path_segments(rider._lattice_path, skip_last)
+
+
+def path_segments(path, skip_last=False):
+    """
+    Iterate over the committed segments of a lattice path.
+
+    Parameters
+    ----------
+    path : list
+        The vertices of the path, starting with the two copies of the origin riders are created with.
+    skip_last : bool, optional
+        Whether the last segment is skipped. Defaults to False.
+
+    Yields
+    ------
+    tuple
+        The first and last vertex of each segment.
+    """
+    stop = len(path) - 1 if skip_last else len(path)
+
+    # O primeiro segmento é apenas o ponto de partida e não conta
+    for index in range(2, stop):
+        yield path[index - 1], path[index]
+
+
+def check_move_collision(players_group, rider, card=None):
+    """
+    Check if moving a rider with a card crosses any trail, like utilities.check_line_cross.
+
+    The move is tested as a whole against the committed trails of the other riders
+    and against the rider's own trail except its last segment. While the rider has
+    not moved yet, touching the other trails at the central vertex is ignored, since
+    every trail starts there.
+
+    Parameters
+    ----------
+    players_group : pygame.sprite.Group
+        Group containing all the riders.
+    rider : Rider
+        The rider that moves.
+    card : Card, optional
+        The card of the move. Defaults to None, which uses the rider's clicked card.
+
+    Returns
+    -------
+    bool
+        True if the move crosses a trail or goes back over the last one, False otherwise.
+    """
+    if not card:
+        card = rider.clicked_card
+
+    start = rider._lattice_path[-1]
+    end = (start[0] + card[0], start[1] + card[1])
+
+    # No primeiro movimento a origem é compartilhada por todos
+    ignore = (0, 0) if len(rider._lattice_path) == 2 else None
+
+    for enemy in players_group:
+        if enemy is rider:
+            continue
+
+        for segment in trail_segments(enemy):
+            if segments_touch(start, end, *segment, ignore=ignore):
+                return True
+
+    # Linhas do próprio rider, menos a última (de onde ele parte)
+    for segment in trail_segments(rider, skip_last=True):
+        if segments_touch(start, end, *segment):
+            return True
+
+    return last_vector_collision(card, rider._last_card)
+
+
+def check_vertex_collision(players_group, rider):
+    """
+    Check if a rider standing on a vertex touches any trail, like utilities.check_line_collision.
+
+    Parameters
+    ----------
+    players_group : pygame.sprite.Group
+        Group containing all the riders.
+    rider : Rider
+        The rider.
+
+    Returns
+    -------
+    bool
+        True if the vertex lies on another rider's trail or on its own older segments, False otherwise.
+    """
+    vertex = rider._lattice_path[-1]
+
+    for enemy in players_group:
+        if enemy is rider:
+            continue
+
+        for segment in trail_segments(enemy):
+            if segments_touch(vertex, vertex, *segment):
+                return True
+
+    for segment in trail_segments(rider, skip_last=True):
+        if segments_touch(vertex, vertex, *segment):
+            return True
+
+    return False
+
+
+def __cross(vector_1, vector_2):
+    """
+    Return the cross product of two plane vectors.
+
+    Parameters
+    ----------
+    vector_1 : tuple
+        The first vector.
+    vector_2 : tuple
+        The second vector.
+
+    Returns
+    -------
+    int
+        The z coordinate of the cross product.
+    """
+    return vector_1[0] * vector_2[1] - vector_1[1] * vector_2[0]
+
+
+def __dot(vector_1, vector_2):
+    """
+    Return the dot product of two plane vectors.
+
+    Parameters
+    ----------
+    vector_1 : tuple
+        The first vector.
+    vector_2 : tuple
+        The second vector.
+
+    Returns
+    -------
+    int
+        The dot product.
+    """
+    return vector_1[0] * vector_2[0] + vector_1[1] * vector_2[1]
+
+
+def __between(point, seg_start, seg_end):
+    """
+    Check if a point collinear to a segment lies within its bounding box.
+
+    Parameters
+    ----------
+    point : tuple
+        The point.
+    seg_start : tuple
+        The first vertex of the segment.
+    seg_end : tuple
+        The last vertex of the segment.
+
+    Returns
+    -------
+    bool
+        True if the point is within the segment, False otherwise.
+    """
+    return (
+        min(seg_start[0], seg_end[0]) <= point[0] <= max(seg_start[0], seg_end[0])
+        and min(seg_start[1], seg_end[1]) <= point[1] <= max(seg_start[1], seg_end[1])
+    )
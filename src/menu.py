@@ -3,7 +3,7 @@ from config import *
 from entity import *
 from texts import *
 from game import *
-import textwrap
+from fonts import TextCache, wrap_text
 
 
 class Button(Entity):
@@ -90,6 +90,8 @@ class Menu(Entity):
         The button that was selected.
     buttons_group : Group
         The group of buttons for the menu.
+    redraw : bool
+        Indicates whether the next frame must be drawn even without events.
 
     Methods
     -------
@@ -97,6 +99,8 @@ class Menu(Entity):
         Initializes a Menu object.
     draw_text(self, text, size, x, y)
         Draw text on the screen.
+    next_frame(self)
+        Wait for the next frame and check if it must be drawn.
     update(self)
         Update the state of the menu.
     verify(self)
@@ -140,6 +144,8 @@ class Menu(Entity):
         self.run_display = True
         self.button_clicked = False
         self.selected_button = None
+        self.redraw = True
+        self.__events = []
 
         # Cria um grupo para os sprites
         self.buttons_group = pygame.sprite.Group()
@@ -163,13 +169,42 @@ class Menu(Entity):
         -------
         None
         """
-        self.font_name = pygame.font.get_default_font()
-        font = pygame.font.Font(self.font_name, size)
-        text_surface = font.render(text, True, WHITE)
+        # O texto só é renderizado na primeira vez que aparece
+        text_surface = TextCache().render(pygame.font.get_default_font(), text, size, WHITE)
         text_rect = text_surface.get_rect()
         text_rect.center = (x, y)
         self.state_control.screen.blit(text_surface, text_rect)
 
+    def next_frame(self):
+        """
+        Wait for the next frame and check if it must be drawn.
+
+        The frame rate is capped and, while nothing happens, the menu sleeps on
+        the event queue instead of redrawing the same screen. It only sleeps
+        once every texture of the game is loaded.
+
+        Returns
+        -------
+        bool
+            True if the frame must be drawn, False otherwise.
+        """
+        scheduler = self.state_control.scheduler
+        scheduler.tick(MENU_FPS)
+
+        # Aproveita o quadro para terminar algumas texturas do jogo
+        loading = not self.state_control.finish_assets(LOAD_BATCH)
+
+        # Na primeira exibição desenha sem esperar, e enquanto houver texturas
+        # para terminar não dorme na fila, senão elas só andariam a cada IDLE_TIMEOUT
+        timeout = 0 if self.redraw or loading else IDLE_TIMEOUT
+        self.__events = scheduler.wait_events(timeout)
+
+        if self.redraw or self.__events:
+            self.redraw = False
+            return True
+
+        return False
+
     def update(self):
         """
         Update the state of the menu.
@@ -179,8 +214,13 @@ class Menu(Entity):
         None
         """
         pygame.display.update()
+        self.state_control.mark("first_menu_frame")
         self.state_control.reset_keys()
 
+        # Ao sair do menu, a próxima exibição deve ser desenhada
+        if not self.run_display:
+            self.redraw = True
+
     def verify(self):
         """
         Verify the state of the menu.
@@ -189,7 +229,8 @@ class Menu(Entity):
         -------
         None
         """
-        self.state_control.check_events()
+        self.state_control.check_events(self.__events)
+        self.__events = []
         self.choice_preview(self.state_control.screen)
         self.check_input()
 
@@ -215,13 +256,12 @@ class Menu(Entity):
                 # Desenha o contorno
                 self.__preview_selected_button(button, screen)
 
-                # Verifica se o botão esquerdo do mouse é pressionado
-                mouse_clicked = pygame.mouse.get_pressed()[0]
+                # Verifica se o botão esquerdo do mouse foi clicado
+                clicked = self.state_control.MOUSE_CLICKED or self.state_control.START_KEY
 
-                if mouse_clicked or self.state_control.START_KEY:
+                # Ignora cliques repetidos sem travar o laço
+                if clicked and self.state_control.scheduler.debounce("click"):
                     self.state_control.BUTTON_CLICKED = True
-                    # Delay para evitar cliques indesejados
-                    pygame.time.delay(170)
                     return None
 
     @staticmethod
@@ -366,6 +406,10 @@ class MainMenu(Menu):
         """
         self.run_display = True
         while self.run_display:
+            # Só desenha quando algo mudar
+            if not self.next_frame():
+                continue
+
             # Preenche o fundo
             self.state_control.screen.fill(BLACK)
 
@@ -539,6 +583,10 @@ class OptionsMenu(Menu):
         """
         self.run_display = True
         while self.run_display:
+            # Só desenha quando algo mudar
+            if not self.next_frame():
+                continue
+
             self.state_control.screen.fill(BLACK)
 
             # Verifica as entradas e interação com os botões
@@ -597,8 +645,7 @@ class OptionsMenu(Menu):
             click = "full.png"
 
         # Cria a imagem
-        img = pygame.image.load(TEXTURE_MENU_PATH + "square_" + click).convert_alpha()
-        img = pygame.transform.smoothscale(img, (50, 50))
+        img = TextureCache().load(TEXTURE_MENU_PATH + "square_" + click, (50, 50))
 
         # E altera
         exec("self.btn_vol_" + str(num) + ".image = img", None, locals())
@@ -694,6 +741,10 @@ class CreditsMenu(Menu):
         """
         self.run_display = True
         while self.run_display:
+            # Só desenha quando algo mudar
+            if not self.next_frame():
+                continue
+
             # Exibe o plano de fundo da tela
             self.state_control.screen.blit(
                 self.background_image.image, self.background_image.rect
@@ -847,6 +898,10 @@ class ResultScreen(Menu):
         """
         self.run_display = True
         while self.run_display:
+            # Só desenha quando algo mudar
+            if not self.next_frame():
+                continue
+
             self.state_control.screen.fill(BLACK)
 
             # Verifica as entradas e interação com os botões
@@ -989,6 +1044,10 @@ class TutorialScreen(Menu):
         """
         self.run_display = True
         while self.run_display:
+            # Só desenha quando algo mudar
+            if not self.next_frame():
+                continue
+
             self.state_control.screen.fill(BLACK)
 
             # Verifica as entradas e interação com os botões
@@ -1072,13 +1131,13 @@ class TutorialScreen(Menu):
                 self.state_control.first_time = False
 
     def draw_large_text(self, text, size, x, y, max_line_length):
-        lines = textwrap.wrap(text, width=max_line_length)
+        lines = wrap_text(text, max_line_length)
         y_offset = 0
 
         for line in lines:
-            text_surface = pygame.font.Font(
-                pygame.font.get_default_font(), size
-            ).render(line, True, WHITE)
+            text_surface = TextCache().render(
+                pygame.font.get_default_font(), line, size, WHITE
+            )
             text_rect = text_surface.get_rect()
             text_rect.center = (x, y + y_offset)
             self.state_control.screen.blit(text_surface, text_rect)
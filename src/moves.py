@@ -0,0 +1,314 @@
+import functools
+
+import numpy as np
+
+import bitboard
+import lattice
+import utilities
+from config import *
+
+# Resultados possíveis de um movimento, na ordem em que são testados
+SAFE = 0
+BORDER = 1
+TRAIL = 2
+REVERSE = 3
+RIDER = 4
+
+# Todos os vetores do baralho, na mesma ordem das cartas
+CARD_VECTORS = np.array(
+    [(x, y) for y in range(-4, 5) for x in range(-4, 5) if (x, y) != (0, 0)],
+    dtype=np.int64,
+)
+CARD_INDEX = {tuple(vector): index for index, vector in enumerate(CARD_VECTORS.tolist())}
+
+# Margem em volta do tabuleiro de vértices, para indexar sem sair da matriz
+MARGIN = 8
+VERTEX_SIDE = bitboard.SIDE + 2 * MARGIN
+
+# Quantidade de bits usados pelas arestas (com a folga do bitboard)
+EDGE_BITS = bitboard.WIDTH * bitboard.WIDTH * len(bitboard.DIRECTIONS)
+
+
+@functools.lru_cache(maxsize=None)
+def __card_tables():
+    """
+    Build, for every card, the vertices and crossed edges of its move from the central vertex.
+
+    The tables are built on the first evaluation, not on import, so the
+    processes that never evaluate moves (such as the search workers) do not
+    pay for them.
+
+    Returns
+    -------
+    tuple
+        An array (80, 5, 2) with the vertices of each move, repeated to a fixed
+        length, and an array (80, K) with the crossed edge bits, also repeated.
+    """
+    vertices = []
+    crossings = []
+
+    for x, y in CARD_VECTORS.tolist():
+        steps = np.gcd(x, y)
+        step = (x // steps, y // steps)
+
+        vertices.append([(index * step[0], index * step[1]) for index in range(steps + 1)])
+
+        # Posição de cada bit cruzado (em relação ao bit zero)
+        mask = bitboard.move_crossings((x, y))
+        crossings.append([bit for bit, digit in enumerate(reversed(bin(mask)[2:])) if digit == "1"])
+
+    # Completa as listas repetindo o último valor, o que não muda o resultado
+    length = max(len(row) for row in vertices)
+    vertices = [row + [row[-1]] * (length - len(row)) for row in vertices]
+
+    length = max(len(row) for row in crossings)
+    crossings = [row + [row[-1]] * (length - len(row)) for row in crossings]
+
+    return np.array(vertices, dtype=np.int64), np.array(crossings, dtype=np.int64)
+
+
+def evaluate_moves(players_group, rider, cards=None):
+    """
+    Evaluate many moves of a rider at once, with the same rules as Bot's preview.
+
+    The trails of every rider are read once from their bitboards and all the
+    moves are tested together with NumPy.
+
+    Parameters
+    ----------
+    players_group : pygame.sprite.Group
+        Group containing all the riders.
+    rider : Rider
+        The rider that moves.
+    cards : iterable, optional
+        The cards (or vectors) to evaluate. Defaults to None, which evaluates
+        every vector of the deck in CARD_VECTORS order.
+
+    Returns
+    -------
+    numpy.ndarray
+        The outcome of each move: SAFE, BORDER, TRAIL, REVERSE or RIDER.
+    """
+    if cards is None:
+        rows = np.arange(len(CARD_VECTORS))
+    else:
+        rows = np.array([CARD_INDEX[(card[0], card[1])] for card in cards], dtype=np.int64)
+
+    vectors = CARD_VECTORS[rows]
+    move_vertices, move_crossings = __card_tables()
+    start = rider._lattice_path[-1]
+    first_move = len(rider._lattice_path) == 2
+
+    # Une as linhas de todos (as próprias sem a última)
+    vertices = rider._board.vertices(skip_last=True)
+    edges = rider._board.edges(skip_last=True)
+
+    for enemy in players_group:
+        if enemy is not rider:
+            vertices |= enemy._board.vertices()
+            edges |= enemy._board.edges()
+
+    # No primeiro movimento a origem é compartilhada por todos
+    if first_move:
+        vertices &= ~bitboard.vertex_bit((0, 0))
+
+    vertex_grid = np.zeros((VERTEX_SIDE, VERTEX_SIDE), dtype=bool)
+    vertex_grid[MARGIN:-MARGIN, MARGIN:-MARGIN] = __unpack(
+        vertices, bitboard.SIDE * bitboard.SIDE
+    ).reshape(bitboard.SIDE, bitboard.SIDE)
+    edge_bits = __unpack(edges, EDGE_BITS)
+
+    outcome = np.full(len(rows), SAFE, dtype=np.int8)
+
+    # Ordem inversa de prioridade, para que a mais importante prevaleça
+    enemies = [enemy for enemy in players_group if enemy is not rider]
+
+    if not first_move and any(
+        utilities.check_riders_collision(rider, enemy) for enemy in enemies
+    ):
+        outcome[:] = RIDER
+
+    # Ir contra o último vetor
+    last = rider._last_card
+    cross = vectors[:, 0] * last[1] - vectors[:, 1] * last[0]
+    dot = vectors[:, 0] * last[0] + vectors[:, 1] * last[1]
+    outcome[(cross == 0) & (dot < 0)] = REVERSE
+
+    # Passar por um vértice ocupado ou cruzar uma aresta ocupada
+    points = move_vertices[rows] + np.array(start) + bitboard.RADIUS + MARGIN
+    touches = vertex_grid[points[..., 0], points[..., 1]].any(axis=1)
+
+    shift = (start[0] * bitboard.WIDTH + start[1]) * len(bitboard.DIRECTIONS)
+    touches |= edge_bits[move_crossings[rows] + shift].any(axis=1)
+    outcome[touches] = TRAIL
+
+    # Sair do tabuleiro
+    end = vectors + np.array(start)
+    outcome[(np.abs(end) > bitboard.RADIUS).any(axis=1)] = BORDER
+
+    return outcome
+
+
+def resolve_move(players_group, rider, card=None, lines=True):
+    """
+    Find the first collision of a move, so the animation does not need to test it every frame.
+
+    The rules are the ones of the pixel checks in utilities: leaving the board, running
+    into another rider, touching a committed trail (the rider's own but the last
+    segment) and going back over the last vector. When two of them happen at the
+    same time, they are chosen in that order.
+
+    Parameters
+    ----------
+    players_group : pygame.sprite.Group
+        Group containing all the riders.
+    rider : Rider
+        The rider that moves.
+    card : Card, optional
+        The card of the move. Defaults to None, which uses the rider's clicked card.
+    lines : bool, optional
+        Whether riders and trails are tested, which is not the case on the first turn.
+        Defaults to True.
+
+    Returns
+    -------
+    tuple or None
+        The parametric time (between 0 and 1) of the first collision, its cause
+        (BORDER, RIDER, TRAIL or REVERSE) and the rider hit, if any. None if the
+        move is safe.
+    """
+    if not card:
+        card = rider.clicked_card
+
+    enemies = [
+        (enemy, enemy.state_alive, enemy._lattice_path)
+        for enemy in players_group
+        if enemy is not rider
+    ]
+
+    return first_collision(
+        rider._lattice_path, card, rider._last_card, enemies, rider=rider, lines=lines
+    )
+
+
+def first_collision(path, card, last_card, enemies, rider=None, lines=True):
+    """
+    Find the first collision of a move over plain lattice paths.
+
+    Parameters
+    ----------
+    path : list
+        The lattice path of the rider that moves, ending where the move starts.
+    card : tuple
+        The vector of the move.
+    last_card : tuple
+        The vector of the rider's previous move.
+    enemies : iterable
+        A (key, alive, path) for each other rider. Only alive riders block the way
+        with their bodies, but every path counts as a trail.
+    rider : object, optional
+        What is reported when the rider hits its own trail. Defaults to None.
+    lines : bool, optional
+        Whether riders and trails are tested. Defaults to True.
+
+    Returns
+    -------
+    tuple or None
+        The parametric time of the first collision, its cause and the key of the
+        rider hit, if any. None if the move is safe.
+    """
+    start = path[-1]
+    end = (start[0] + card[0], start[1] + card[1])
+
+    # Cada colisão é (tempo, prioridade, causa, rider atingido)
+    found = []
+
+    time = __border_time(start, (card[0], card[1]))
+
+    if time is not None:
+        found.append((time, 0, BORDER, None))
+
+    if lines:
+        for key, alive, enemy_path in enemies:
+            # Só os vivos param no caminho, os outros estão recolhendo a linha
+            if alive:
+                position = enemy_path[-1]
+                interval = lattice.contact_interval(start, end, position, position)
+
+                if interval:
+                    found.append((interval[0], 1, RIDER, key))
+
+            for segment in lattice.path_segments(enemy_path):
+                interval = lattice.contact_interval(start, end, *segment)
+
+                if interval:
+                    found.append((interval[0], 2, TRAIL, key))
+
+        # Linhas do próprio rider, menos a última (de onde ele parte)
+        for segment in lattice.path_segments(path, skip_last=True):
+            interval = lattice.contact_interval(start, end, *segment)
+
+            if interval:
+                found.append((interval[0], 2, TRAIL, rider))
+
+        # Voltar pelo último vetor mata assim que o movimento começa
+        if lattice.last_vector_collision(card, last_card):
+            found.append((0, 2, REVERSE, None))
+
+    if not found:
+        return None
+
+    time, priority, cause, other = min(found, key=lambda item: item[:2])
+
+    return (time, cause, other)
+
+
+def __border_time(start, card):
+    """
+    Return when a move leaves the board.
+
+    Parameters
+    ----------
+    start : tuple
+        The vertex where the move starts.
+    card : tuple
+        The vector of the move.
+
+    Returns
+    -------
+    float or None
+        The parametric time in which the move crosses the border, or None if it
+        ends inside the board.
+    """
+    times = []
+
+    for axis, (low, high) in enumerate(lattice.BOUNDS):
+        end = start[axis] + card[axis]
+
+        if end > high:
+            times.append((high - start[axis]) / card[axis])
+        elif end < low:
+            times.append((low - start[axis]) / card[axis])
+
+    return min(times, default=None)
+
+
+def __unpack(value, length):
+    """
+    Convert the bits of an integer into a boolean array.
+
+    Parameters
+    ----------
+    value : int
+        The bits.
+    length : int
+        The length of the array.
+
+    Returns
+    -------
+    numpy.ndarray
+        The array, where position k holds bit k.
+    """
+    data = np.frombuffer(value.to_bytes((length + 7) // 8, "little"), dtype=np.uint8)
+
+    return np.unpackbits(data, bitorder="little")[:length].astype(bool)
@@ -0,0 +1,188 @@
+import pygame
+
+from config import *
+
+# Posição, em pixels, do vértice central do tabuleiro (de onde todos partem)
+ORIGIN = (GRID_X / 2 - 1, GRID_Y / 2 - 2)
+
+
+def line_mask(start, end):
+    """
+    Create the board-sized mask of a trail segment, like the old Rider._get_line_mask.
+
+    Parameters
+    ----------
+    start : tuple
+        The start point of the segment, in pixels.
+    end : tuple
+        The end point of the segment, in pixels.
+
+    Returns
+    -------
+    pygame.mask.Mask
+        The mask, as large as the board, with the segment drawn 6 pixels wide.
+    """
+    temp_surf = pygame.Surface((GRID_X, GRID_Y))
+    temp_surf.set_colorkey(BLACK)
+
+    pygame.draw.line(temp_surf, WHITE, start, end, width=6)
+
+    return pygame.mask.from_surface(temp_surf)
+
+
+def path_masks(path):
+    """
+    Build the trail masks a rider used to keep, from its path in pixels.
+
+    Parameters
+    ----------
+    path : list
+        The points of the path, like Rider._path, whose committed segments start
+        at its second point.
+
+    Returns
+    -------
+    tuple
+        The mask with every segment (the old line_mask) and the mask without the
+        last one (the old _last_line_mask).
+    """
+    mask = line_mask((-10, -10), (-10, -10))
+    last_mask = mask
+
+    for index in range(2, len(path)):
+        last_mask = mask.copy()
+        mask.draw(line_mask(path[index - 1], path[index]), (0, 0))
+
+    return mask, last_mask
+
+
+def last_vector_collision(card, last_card):
+    """
+    Check if a card goes back over the previous one, with the old rule.
+
+    Parameters
+    ----------
+    card : tuple
+        The current vector (x, y).
+    last_card : tuple
+        The previous vector (x, y).
+
+    Returns
+    -------
+    bool
+        True if the vectors are proportional with opposite signs, False otherwise.
+    """
+    # Se algum valor de (x, y) for 0 verifica apenas o outro valor
+    if not card[0] and not last_card[0]:
+        return card[1] * last_card[1] < 0
+
+    if not card[1] and not last_card[1]:
+        return card[0] * last_card[0] < 0
+
+    # Se nenhum for, verifica se são proporcionais
+    if card[0] != 0 and card[1] != 0:
+        return last_card[0] / card[0] == last_card[1] / card[1] and last_card[0] / card[0] < 0
+
+    return False
+
+
+def check_line_collision(rect, path, enemy_paths, card, last_card):
+    """
+    Check if a rider touches a trail, like the old utilities.check_line_collision.
+
+    The rider's rectangle is clipped against every segment of the other riders'
+    paths and against its own segments but the last one.
+
+    Parameters
+    ----------
+    rect : pygame.Rect
+        The collision rectangle of the rider.
+    path : list
+        The rider's path, in pixels.
+    enemy_paths : list
+        The paths of the other riders, in pixels.
+    card : tuple
+        The vector of the move.
+    last_card : tuple
+        The vector of the previous move.
+
+    Returns
+    -------
+    bool
+        True if there is a collision, False otherwise.
+    """
+    for enemy_path in enemy_paths:
+        for index in range(2, len(enemy_path)):
+            if rect.clipline(enemy_path[index - 1], enemy_path[index]):
+                return True
+
+    # No caso de colidir com as próprias linhas
+    for index in range(2, len(path) - 1):
+        if rect.clipline(path[index - 1], path[index]):
+            return True
+
+    return last_vector_collision(card, last_card)
+
+
+def check_line_cross(line, masks, enemy_masks, card, last_card):
+    """
+    Check if a move crosses a trail, like the old utilities.check_line_cross.
+
+    Parameters
+    ----------
+    line : pygame.mask.Mask
+        The mask of the move, from line_mask.
+    masks : tuple
+        The rider's own masks, from path_masks.
+    enemy_masks : list
+        The masks with every segment of each other rider.
+    card : tuple
+        The vector of the move.
+    last_card : tuple
+        The vector of the previous move.
+
+    Returns
+    -------
+    bool
+        True if the move crosses a trail or goes back over the last one, False otherwise.
+    """
+    # No primeiro movimento todas as linhas saem da origem, que é escondida
+    first_move = not masks[0].get_at((int(ORIGIN[0]), int(ORIGIN[1])))
+
+    for enemy_mask in enemy_masks:
+        if first_move:
+            enemy_mask = hide_mask_origin(enemy_mask)
+
+        if line.overlap(enemy_mask, (0, 0)):
+            return True
+
+    # Linhas do próprio rider, menos a última (de onde ele parte)
+    if line.overlap(masks[1], (0, 0)):
+        return True
+
+    return last_vector_collision(card, last_card)
+
+
+def hide_mask_origin(mask):
+    """
+    Return a copy of a trail mask with the region around the origin erased.
+
+    Parameters
+    ----------
+    mask : pygame.mask.Mask
+        The trail mask.
+
+    Returns
+    -------
+    pygame.mask.Mask
+        The copy, without the origin.
+    """
+    new_mask = mask.copy()
+
+    # Cria uma pequena máscara entorno da origem
+    origin_mask = pygame.mask.Mask((RIDER_X, RIDER_Y), fill=True)
+    size = origin_mask.get_size()
+
+    new_mask.erase(origin_mask, (GRID_X / 2 - size[0] / 2, GRID_Y / 2 - size[1] / 2))
+
+    return new_mask
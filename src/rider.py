@@ -2,7 +2,14 @@ import pygame
 import random
 
 from entity import *
+import bitboard
+import endgame
+import lattice
+import moves
+import search
 import utilities
+import zobrist
+from territory import TerritoryMap
 from config import *
 
 
@@ -16,6 +23,10 @@ class Rider(Entity):
         The number of the player.
     _path : list
         A list of the rider's positions.
+    _lattice_path : list
+        The vertices of _path on the board lattice.
+    _board : TrailBoard
+        The lattice vertices and edges covered by the committed trail.
     _velocity : float
         The velocity of the rider.
     _hand : pygame.sprite.Group
@@ -32,10 +43,11 @@ class Rider(Entity):
         The last card that the rider clicked.
     mask : pygame.rect.Rect
         The mask of the rider.
-    line_mask : pygame.mask.Mask
-        The line mask of the rider.
-    _last_line_mask : pygame.mask.Mask
-        The last line mask of the rider.
+    _death_frames : dict
+        The death animation frames, shared by all riders and indexed by flip.
+    trail_observers : list
+        Objects notified with segment_added and segment_removed whenever a
+        segment is committed to or retracted from _path.
 
     Methods
     -------
@@ -49,12 +61,17 @@ class Rider(Entity):
         Set temporary variables that save code in movement.
     __reset_movement(self, deck)
         Resets the movement of the rider.
-    _get_line_mask(color,start, end)
-        Create a line mask based on the given color, start, and end points.
+    _commit_segment(self, point)
+        Append a point to the rider's path and notify the trail observers.
+    _retract_segment(self)
+        Remove the last point of the rider's path and notify the trail observers.
     select_card(self, card)
         Select a card for the rider.
     """
 
+    # Quadros da animação de morte, montados uma única vez
+    _death_frames = {}
+
     def __init__(self, number, x_y, scale_size, deck):
         """
         Initialize a Rider object.
@@ -84,6 +101,9 @@ class Rider(Entity):
         # Atributos adicionais
         self._number = number
         self._path = [x_y, x_y]
+        self._lattice_path = [lattice.to_lattice(x_y)] * 2
+        self._board = bitboard.TrailBoard()
+        self.trail_observers = []
         self.__velocity = 1 / 2
         self.__flipped = False
 
@@ -110,14 +130,15 @@ class Rider(Entity):
         self.__timer = 0
         self.state_alive = True
         self.clicked_card = None
+        self.__next_draw = None
         self._last_card = (0, 0)
         self.clock = None
 
         # Máscaras para colisões mais precisas
         self.mask = pygame.rect.Rect(x_y, (RIDER_X / 5 - 2, RIDER_Y / 5 - 1))
 
-        self.line_mask = self._get_line_mask(self._color, (-10, -10), (-10, -10))
-        self._last_line_mask = self.line_mask
+        # Prepara a animação de morte para que morrer não acesse o disco
+        self._load_death_frames()
 
     def update(self):
         """
@@ -133,16 +154,36 @@ class Rider(Entity):
         None
         """
         # Muda a imagem do rider dependendo do estágio da animação
-        archive = "rider_dead_" + str(self.__death_stage) + ".png"
+        # Se estiver virada, usa a versão espelhada
+        self.last_image = self._death_frames[self.__flipped][self.__death_stage]
+
+        self.__death_stage += 1
 
-        self.last_image = pygame.image.load(RIDER_PATH + archive).convert_alpha()
-        self.last_image = pygame.transform.scale(self.last_image, (RIDER_X, RIDER_Y))
+    @classmethod
+    def _load_death_frames(cls):
+        """
+        Build the death animation frames, if not built yet.
 
-        # Se estiver virada, atualiza de acordo
-        if self.__flipped:
-            self.last_image = pygame.transform.flip(self.last_image, True, False)
+        The frames are the same for every rider, so both the normal and the
+        mirrored sequences are built only once and indexed during the animation.
 
-        self.__death_stage += 1
+        Returns
+        -------
+        dict
+            The lists of frames indexed by whether the rider is flipped.
+        """
+        if not cls._death_frames:
+            for flipped in (False, True):
+                cls._death_frames[flipped] = [
+                    TextureCache().load(
+                        RIDER_PATH + "rider_dead_" + str(stage) + ".png",
+                        (RIDER_X, RIDER_Y),
+                        flipped,
+                    )
+                    for stage in range(DEATH_FRAMES)
+                ]
+
+        return cls._death_frames
 
     def move_rider(self, deck, backward=False):
         """
@@ -180,7 +221,7 @@ class Rider(Entity):
                 self.__reset_movement(deck)
             else:
                 self.__reset_backward()
-                del self._path[-1]
+                self._retract_segment()
 
             return False
 
@@ -279,8 +320,8 @@ class Rider(Entity):
         # Retorna _timer para 0
         self.__timer = 0
 
-        # Pesca uma nova carta e adiciona à mão
-        card = deck.draw_card()
+        # Pesca uma nova carta (a que o estado do jogo já tirou, se houver) e adiciona à mão
+        card = deck.draw_card(self.__next_draw)
         card.rect.topleft = self.clicked_card.rect.topleft
 
         self._hand.add(card)
@@ -290,44 +331,48 @@ class Rider(Entity):
         self._last_card = self.clicked_card
         self.clicked_card = (0, 0)
 
-        # Salva a posição final do jogador no seu _path
-        self._path.append(self.rect.center)
-
-        # Cria uma mascára para a linha e a adiciona em line_mask
-        temp_mask = self._get_line_mask(self._color, self._path[-2], self._path[-1])
-
-        self._last_line_mask = self.line_mask.copy()
-        self.line_mask.draw(temp_mask, (0, 0))
+        # Salva a posição final do jogador no seu _path (e no tabuleiro das linhas)
+        self._commit_segment(self.rect.center)
 
-    @staticmethod
-    def _get_line_mask(color, start, end):
+    def _commit_segment(self, point):
         """
-        Create a line mask based on the given color, start, and end points.
+        Append a point to the rider's path and notify the trail observers.
 
         Parameters
         ----------
-        color : str
-            The color of the line.
-        start : tuple
-            The starting point of the line.
-        end : tuple
-            The ending point of the line.
+        point : tuple
+            The end point of the new segment.
 
         Returns
         -------
-        pygame.mask.Mask
-            The line mask.
+        None
+        """
+        self._path.append(point)
+        self._lattice_path.append(lattice.to_lattice(point))
+        self._board.push(self._lattice_path[-2], self._lattice_path[-1])
+
+        for observer in self.trail_observers:
+            observer.segment_added(self, self._path[-2], self._path[-1])
 
+    def _retract_segment(self):
         """
-        # Cria uma superfície em preto
-        temp_surf = pygame.Surface((GRID_X, GRID_Y))
-        temp_surf.set_colorkey((0, 0, 0))
+        Remove the last point of the rider's path and notify the trail observers.
 
-        # Desenha a linha e retorna a máscara
-        pygame.draw.line(temp_surf, color, start, end, width=6)
-        return pygame.mask.from_surface(temp_surf)
+        Returns
+        -------
+        None
+        """
+        end = self._path.pop()
+        self._lattice_path.pop()
+
+        # O primeiro segmento é só a origem e nunca entra no tabuleiro
+        if len(self._lattice_path) >= 2:
+            self._board.pop()
+
+        for observer in self.trail_observers:
+            observer.segment_removed(self, self._path[-1], end)
 
-    def select_card(self, card):
+    def select_card(self, card, draw=None):
         """
         Select a card for the rider.
 
@@ -335,12 +380,16 @@ class Rider(Entity):
         ----------
         card : tuple
             The card that the rider clicked.
+        draw : tuple, optional
+            The vector of the card drawn when the move ends. Defaults to None,
+            which draws the top of the deck.
 
         Returns
         -------
         None
         """
         self.clicked_card = card
+        self.__next_draw = draw
 
         self.__player_target = self.rect.center
         self.__player_target = (
@@ -364,7 +413,7 @@ class Rider(Entity):
 
     def update_death(self):
         # Quando acabar os eventos de clock, apaga a imagem do rider
-        if self.__death_stage == 8:
+        if self.__death_stage == DEATH_FRAMES:
             self.__remove_rider()
 
         # Remove parte da linha
@@ -424,9 +473,10 @@ class Rider(Entity):
         self.image = pygame.Surface((1, 1))
         self.image.set_colorkey((0, 0, 0))
 
-        # Cria um clock interno
+        # Cria um clock interno, com um evento para cada quadro da animação
+        # depois do primeiro, que já foi mostrado acima
         self.clock = pygame.USEREVENT + self._number
-        pygame.time.set_timer(self.clock, 100, 7)
+        pygame.time.set_timer(self.clock, 100, DEATH_FRAMES - 1)
 
 
 @utilities.Singleton
@@ -573,6 +623,10 @@ class Bot(Rider):
         The number of the player.
     _path : list
         A list of the rider's positions.
+    _lattice_path : list
+        The vertices of _path on the board lattice.
+    _board : TrailBoard
+        The lattice vertices and edges covered by the committed trail.
     _velocity : float
         The velocity of the rider.
     _hand : pygame.sprite.Group
@@ -589,10 +643,18 @@ class Bot(Rider):
         The last card that the rider clicked.
     mask : pygame.rect.Rect
         The mask of the rider.
-    line_mask : pygame.mask.Mask
-        The line mask of the rider.
-    _last_line_mask : pygame.mask.Mask
-        The last line mask of the rider.
+    _rng : random.Random
+        The random number generator of the match, shared with the deck.
+    policy : str
+        How the bot chooses its cards: "safe", "territory" or "mcts".
+    search_log : list
+        The statistics of each search made by the bot.
+    _table : TranspositionTable or None
+        The collisions found by the bot's searches, kept from one move to the
+        next (only with the "mcts" policy).
+    _endgame : EndgameSolver
+        The solver that takes over the policy when two riders are left on a
+        crowded board.
 
     Methods
     -------
@@ -606,13 +668,23 @@ class Bot(Rider):
         Set temporary variables that save code in movement.
     __reset_movement(self, deck)
         Resets the movement of the rider.
-    _get_line_mask(color,start, end)
-        Create a line mask based on the given color, start, and end points.
     select_card(self, card)
         Select a card for the rider.
+    think(self, state, rng, cancel=None)
+        Search the card to play in a state.
+    choose_card(self, all_riders, state=None, thought=None)
+        Choose a card from the rider's hand.
+    __solve_endgame(self, state, rng, cancel=None)
+        Return the card of the endgame solver, if it is sure of it.
+    __claim_territory(self, state)
+        Return the safe card that leaves the bot the largest territory.
+    __search_report(self, stats)
+        Return a line with the statistics of a search, for debugging.
+    __endgame_report(self, stats)
+        Return a line with the statistics of an endgame solve, for debugging.
     """
 
-    def __init__(self, number, x_y, scale_size, deck):
+    def __init__(self, number, x_y, scale_size, deck, policy=BOT_POLICY):
         """
         Initializes a Rider object.
 
@@ -624,6 +696,9 @@ class Bot(Rider):
             The initial position of the rider as a tuple of (x, y) coordinates.
         scale_size : float
             The scale size of the rider.
+        policy : str, optional
+            How the bot chooses its cards: "safe", "territory" or "mcts".
+            Defaults to BOT_POLICY.
 
         Returns
         -------
@@ -631,14 +706,59 @@ class Bot(Rider):
         """
         super().__init__(number, x_y, scale_size, deck)
 
-    def choose_card(self, all_riders):
+        # Os bots sorteiam com o mesmo gerador do deck, o da partida
+        self._rng = deck.rng
+        self.policy = policy
+        self.search_log = []
+        self._table = zobrist.TranspositionTable() if policy == "mcts" else None
+        self._endgame = endgame.EndgameSolver()
+
+    def think(self, state, rng, cancel=None):
         """
-        Choose a card from the rider's hand based on the preview movement.
+        Search the card to play in a state.
+
+        Only the state is read, never the sprites, so the search may run on
+        another thread while the game goes on. With SEARCH_WORKERS above 1 the
+        playouts are spread over a process pool. Where endgame.crowded holds,
+        the endgame solver is tried first, and its card is played if the solve
+        is exact or proves a win.
+
+        Parameters
+        ----------
+        state : GameState
+            The state of the match, with this bot to move.
+        rng : random.Random
+            The random number generator of the search.
+        cancel : threading.Event, optional
+            An event that stops the search early. Defaults to None.
+
+        Returns
+        -------
+        tuple
+            The vector of the card and the statistics of the search, as returned
+            by search.parallel_search, or of the solve, as returned by
+            EndgameSolver.solve.
+        """
+        vector, stats = self.__solve_endgame(state, rng, cancel)
+
+        if vector is not None:
+            return vector, stats
+
+        return search.parallel_search(state, rng, cancel=cancel, table=self._table)
+
+    def choose_card(self, all_riders, state=None, thought=None):
+        """
+        Choose a card from the rider's hand.
 
         Parameters
         ----------
         all_riders : list
             A list of all riders in the game.
+        state : GameState, optional
+            The state of the match, with this bot to move. Defaults to None.
+        thought : tuple, optional
+            The result of think for this state, already computed in the
+            background. Defaults to None, which searches now if needed.
 
         Returns
         -------
@@ -647,64 +767,199 @@ class Bot(Rider):
 
         Notes
         -----
-        This method iterates through each card in the rider's hand and checks if the preview movement is valid or not.
-        If a card's movement is valid, it is added to the choices list.
-        If there are valid choices, a random card is returned from the choices list.
+        With the "mcts" policy and a state, the card comes from think. With the
+        other policies and a state, the endgame solver is tried first, and with
+        the "territory" policy, the card comes from the territory left after each
+        safe card.
+        Otherwise every card in the hand is evaluated at once by moves.evaluate_moves,
+        with the same rules as the game's collisions.
+        If there are safe choices, a random card is returned from the choices list.
         If there are no valid choices, a random card from the rider's hand is returned.
         """
-        choices = []
+        hand = self._hand.sprites()
 
-        # Laceia cada carta e decide se o movimento é válido ou não
-        for card in self._hand.sprites():
-            # Se for, adiciona à lista choices
-            if self.__preview_movement(card, all_riders):
-                choices.append(card)
+        if self.policy == "mcts" and state is not None:
+            # A busca tem seu próprio gerador, pois o número de simulações varia
+            # com o tempo e não pode mudar os sorteios da partida
+            if thought is None:
+                thought = self.think(state, random.Random(self._rng.getrandbits(64)))
+
+            vector, stats = thought
+
+            # Só as buscas entram no registro; uma resolução conta nós, não simulações
+            if "nodes" in stats:
+                if SHOW_SEARCH_STATS:
+                    print(self.__endgame_report(stats))
+            else:
+                self.search_log.append(stats)
+
+                if SHOW_SEARCH_STATS:
+                    print(self.__search_report(stats))
+
+            for card in hand:
+                if card.value == vector:
+                    return card
+
+        # Nas buscas o solver já foi tentado por think; nas outras políticas os
+        # empates são sorteados pelo hash do estado, sem mudar os sorteios da partida
+        if self.policy != "mcts" and state is not None:
+            vector, stats = self.__solve_endgame(state, random.Random(state.zobrist))
+
+            if stats is not None and SHOW_SEARCH_STATS:
+                print(self.__endgame_report(stats))
+
+            for card in hand:
+                if card.value == vector:
+                    return card
+
+        if self.policy == "territory" and state is not None:
+            vector = self.__claim_territory(state)
+
+            for card in hand:
+                if card.value == vector:
+                    return card
+
+        # Avalia todas as cartas de uma só vez e fica com as seguras
+        outcome = moves.evaluate_moves(all_riders, self, hand)
+        choices = [card for card, result in zip(hand, outcome) if result == moves.SAFE]
 
         # Se algum for válido, retorna um entre eles
         if choices:
-            return random.choice(choices)
+            return self._rng.choice(choices)
         # Se não houver nenhum, qualquer carta da mão valerá
         else:
-            return random.choice(self._hand.sprites())
+            return self._rng.choice(hand)
 
-    def __preview_movement(self, card, all_riders):
+    def __solve_endgame(self, state, rng, cancel=None):
         """
-        Calculate the preview movement of the rider based on the given card.
+        Return the card of the endgame solver, if it is sure of it.
+
+        The solver only runs where endgame.crowded holds, and its card is only
+        played if the solve is exact or proves a win.
 
         Parameters
         ----------
-        card : tuple
-            A tuple representing the movement card (x, y).
-        all_riders : list
-            A list of all riders in the game.
+        state : GameState
+            The state of the match, with this bot to move.
+        rng : random.Random
+            The random number generator that breaks ties between the best cards.
+        cancel : threading.Event, optional
+            An event that stops the solve early. Defaults to None.
 
         Returns
         -------
-        bool
-            True if the preview movement is valid, False otherwise.
+        tuple
+            The vector of the card, or None if the policy must choose, and the
+            statistics of the solve, or None if the solver did not run.
         """
-        # Pega o ponto inicial e final do vetor
-        start = self._path[-1]
-        end = (start[0] + card[0] * DISTANCE, start[1] - card[1] * DISTANCE)
+        if not endgame.crowded(state):
+            return None, None
 
-        # Se for colidir com as fronteiras retorna
-        if utilities.check_border_collision(end):
-            return False
+        vectors, stats = self._endgame.solve(state, cancel)
 
-        # Cria uma máscara para testar colisões futuras desta linha
-        line_mask = self._get_line_mask(self._color, start, end)
+        # Além do horizonte o solver só estima, e aí a política decide melhor
+        if vectors and (stats["exact"] or stats["value"] == endgame.WIN):
+            return rng.choice(vectors), stats
 
-        # Se for colidir com as linhas de outrem retorna
-        if utilities.check_line_cross(all_riders, self, line_mask, card):
-            return False
+        return None, stats
+
+    def __claim_territory(self, state):
+        """
+        Return the safe card that leaves the bot the largest territory.
 
-        # Se for colidir com alguém também retorna
-        temp_group = all_riders.copy()
-        temp_group.remove(self)
+        Each safe card is played on a copy of the state, and the territory of the
+        bot is measured with the rest of its hand for the next move. The other
+        riders' hands are hidden, so they may play any vector. Ties go to the
+        card that leaves the largest rival with less.
 
-        for enemy in temp_group:
-            if utilities.check_riders_collision(self, enemy) and len(self._path) != 2:
-                return False
+        Parameters
+        ----------
+        state : GameState
+            The state of the match, with this bot to move.
 
-        # Se não colidir com nada, a carta é válida
-        return True
+        Returns
+        -------
+        tuple or None
+            The vector of the card, or None if every card collides.
+        """
+        index = state.current
+        best = None
+        choices = []
+
+        for card in sorted(set(state.hands[index])):
+            if state.collision(card):
+                continue
+
+            after = state.clone()
+
+            # O deck é embaralhado com outro gerador, para não mudar a partida
+            after.step(card, random.Random(0))
+
+            if after.territory is None:
+                after.territory = TerritoryMap.from_state(after)
+
+            rest = state.hands[index].copy()
+            rest.remove(card)
+
+            territory = after.territory.evaluate(after, {index: rest})
+            rivals = [size for other, size in enumerate(territory) if other != index]
+            score = (territory[index] - max(rivals, default=0),)
+
+            if best is None or score > best:
+                best = score
+                choices = [card]
+            elif score == best:
+                choices.append(card)
+
+        return self._rng.choice(choices) if choices else None
+
+    def __search_report(self, stats):
+        """
+        Return a line with the statistics of a search, for debugging.
+
+        Parameters
+        ----------
+        stats : dict
+            The statistics returned by think.
+
+        Returns
+        -------
+        str
+            The playouts, time and throughput of the search and of each worker.
+        """
+        report = "bot {}: {} playouts in {:.1f} ms ({:.0f}/s)".format(
+            self._number, stats["playouts"], stats["elapsed"] * 1000, stats["playouts_per_second"]
+        )
+
+        if "table_hit_rate" in stats:
+            report += ", {:.0%} table hits".format(stats["table_hit_rate"])
+
+        for worker in stats.get("workers", []):
+            report += "; worker {}: {} ({:.0f}/s)".format(
+                worker["worker"], worker["playouts"], worker["playouts_per_second"]
+            )
+
+        return report
+
+    def __endgame_report(self, stats):
+        """
+        Return a line with the statistics of an endgame solve, for debugging.
+
+        Parameters
+        ----------
+        stats : dict
+            The statistics returned by EndgameSolver.solve.
+
+        Returns
+        -------
+        str
+            The nodes, time, depth and value of the solve.
+        """
+        return "bot {}: endgame {} nodes in {:.1f} ms, depth {}{}, value {}".format(
+            self._number,
+            stats["nodes"],
+            stats["elapsed"] * 1000,
+            stats["depth"],
+            " (exact)" if stats["exact"] else "",
+            "?" if stats["value"] is None else "{:.2f}".format(stats["value"]),
+        )
@@ -0,0 +1,108 @@
+import pygame
+
+from config import *
+
+
+class FrameScheduler:
+    """
+    Frame scheduler shared by the menus and the game loop.
+
+    It caps the frame rate, sleeps on the event queue while nothing happens
+    and debounces actions without blocking the loop.
+
+    Attributes
+    ----------
+    clock : pygame.time.Clock
+        The clock used to cap the frame rate.
+
+    Methods
+    -------
+    tick(self, fps)
+        Wait for the next frame and return the elapsed time.
+    wait_events(self, timeout)
+        Sleep until an event arrives or the timeout expires.
+    debounce(self, name, delay=CLICK_DEBOUNCE)
+        Check if an action may happen again.
+    """
+
+    def __init__(self):
+        """
+        Initialize the FrameScheduler object.
+
+        Returns
+        -------
+        None
+        """
+        self.clock = pygame.time.Clock()
+
+        # Último instante, em ms, de cada ação com debounce
+        self.__last_action = {}
+
+    def tick(self, fps):
+        """
+        Wait for the next frame and return the elapsed time.
+
+        Parameters
+        ----------
+        fps : int
+            The maximum frame rate.
+
+        Returns
+        -------
+        int
+            The milliseconds elapsed since the previous frame.
+        """
+        return self.clock.tick(fps)
+
+    def wait_events(self, timeout):
+        """
+        Sleep until an event arrives or the timeout expires.
+
+        Parameters
+        ----------
+        timeout : int
+            The maximum time to sleep, in milliseconds. If 0, does not sleep.
+
+        Returns
+        -------
+        list
+            The pending events, empty if the timeout expired.
+        """
+        events = []
+
+        # Dorme na fila de eventos em vez de girar o laço
+        if timeout:
+            event = pygame.event.wait(timeout)
+
+            if event.type != pygame.NOEVENT:
+                events.append(event)
+
+        events.extend(pygame.event.get())
+
+        return events
+
+    def debounce(self, name, delay=CLICK_DEBOUNCE):
+        """
+        Check if an action may happen again, without blocking.
+
+        Parameters
+        ----------
+        name : str
+            The name of the action.
+        delay : int, optional
+            The minimum time between two actions, in milliseconds. Defaults to CLICK_DEBOUNCE.
+
+        Returns
+        -------
+        bool
+            True if the action may happen (and it is registered), False otherwise.
+        """
+        now = pygame.time.get_ticks()
+        last = self.__last_action.get(name)
+
+        if last is not None and now - last < delay:
+            return False
+
+        self.__last_action[name] = now
+
+        return True
@@ -0,0 +1,579 @@
+import math
+import multiprocessing
+import os
+import pickle
+import random
+import threading
+import time
+
+import zobrist
+from config import *
+
+# Pool de processos da busca paralela, criado na thread principal, com a
+# memória onde cada estado é escrito uma vez e o sinal que para os workers
+__pool = None
+__shared_state = None
+__shared_stop = None
+
+# Em cada processo da busca paralela: sua tabela de transposição, a memória
+# do estado e o sinal de parada recebidos ao ser criado
+__worker_table = None
+__worker_state = None
+__worker_stop = None
+
+
+class DecisionNode:
+    """
+    Node of the search tree where a rider chooses a card.
+
+    The hands of the other riders are unknown, so a card is not always
+    available when the node is visited. Each child counts how many times it
+    could have been chosen, which replaces the parent's visits in UCB.
+
+    Attributes
+    ----------
+    children : dict
+        The ChanceNode reached by each card vector.
+    visits : int
+        The number of playouts through the node.
+    """
+
+    __slots__ = ("children", "visits")
+
+    def __init__(self):
+        """
+        Initialize the DecisionNode object.
+
+        Returns
+        -------
+        None
+        """
+        self.children = {}
+        self.visits = 0
+
+
+class ChanceNode:
+    """
+    Node of the search tree after a card is played, branching on the card drawn.
+
+    Attributes
+    ----------
+    children : dict
+        The DecisionNode reached by each card drawn (None when the rider died).
+    visits : int
+        The number of playouts through the node.
+    available : int
+        The number of times the card could have been chosen in its parent.
+    reward : list
+        The sum of the rewards of each rider over the playouts.
+    """
+
+    __slots__ = ("children", "visits", "available", "reward")
+
+    def __init__(self, rider_count):
+        """
+        Initialize the ChanceNode object.
+
+        Parameters
+        ----------
+        rider_count : int
+            The number of riders in the match.
+
+        Returns
+        -------
+        None
+        """
+        self.children = {}
+        self.visits = 0
+        self.available = 0
+        self.reward = [0.0] * rider_count
+
+
+def monte_carlo_search(
+    state, rng=random, budget=SEARCH_BUDGET, iterations=None, cancel=None, table=None
+):
+    """
+    Choose a card for the current rider with Monte Carlo tree search.
+
+    Each iteration deals the unknown cards at random (the deck order and the
+    other riders' hands), walks down the tree choosing cards by UCB and the
+    drawn cards by what the deal gives, and ends with a random playout. Every
+    rider maximizes its own chance of winning.
+
+    Parameters
+    ----------
+    state : GameState
+        The state of the match, which is not changed.
+    rng : random.Random, optional
+        The random number generator of the search. Defaults to the random module.
+    budget : float, optional
+        The wall-clock time, in seconds, of the search. Defaults to SEARCH_BUDGET.
+    iterations : int, optional
+        A fixed number of playouts instead of the time budget, which makes the
+        search reproducible. Defaults to None.
+    cancel : threading.Event, optional
+        An event that stops the search early when set, as when it runs in the
+        background and the state changes. Defaults to None.
+    table : TranspositionTable, optional
+        A table that keeps the collisions found in the playouts, by the Zobrist
+        hash of their states, across searches. Defaults to None.
+
+    Returns
+    -------
+    tuple
+        The vector of the chosen card and the statistics of the search (playouts,
+        elapsed time, playouts per second and, with a table, its hit rate).
+    """
+    visits, stats = __search(state, rng, budget, iterations, cancel, table)
+
+    return __best_card(state.hands[state.current], visits), stats
+
+
+def parallel_search(state, rng=random, budget=SEARCH_BUDGET, cancel=None, table=None):
+    """
+    Choose a card for the current rider with root-parallel Monte Carlo tree search.
+
+    Each process of the pool grows its own tree from the state for the whole
+    budget, with its own seed, and the visits of the root cards are added up
+    before choosing. The state is written once to memory shared with the pool,
+    and each worker only receives its seed. Without a pool (SEARCH_WORKERS is 1,
+    the caller is itself a pool worker, as in tournament.py, or the pool was not
+    created on the main thread) or when the state does not fit in
+    SEARCH_STATE_SIZE bytes, it is monte_carlo_search.
+
+    Parameters
+    ----------
+    state : GameState
+        The state of the match, which is not changed.
+    rng : random.Random, optional
+        The random number generator that seeds the workers. Defaults to the random module.
+    budget : float, optional
+        The wall-clock time, in seconds, of the search. Defaults to SEARCH_BUDGET.
+    cancel : threading.Event, optional
+        An event that stops the search early. It is polled every THINK_POLL
+        seconds while the workers run and passed on to them. Defaults to None.
+    table : TranspositionTable, optional
+        The table of a search in this process. Each worker keeps its own. Defaults to None.
+
+    Returns
+    -------
+    tuple
+        The vector of the chosen card and the statistics of the search, which also
+        list the playouts and playouts per second of each worker.
+    """
+    pool = worker_pool()
+
+    # Cancelada antes de começar, a busca local para na hora
+    if pool is None or (cancel is not None and cancel.is_set()):
+        return monte_carlo_search(state, rng, budget, cancel=cancel, table=table)
+
+    # Os workers não precisam do mapa de território
+    payload = pickle.dumps(state.clone(territory=False), pickle.HIGHEST_PROTOCOL)
+
+    if len(payload) > SEARCH_STATE_SIZE:
+        return monte_carlo_search(state, rng, budget, cancel=cancel, table=table)
+
+    start = time.perf_counter()
+
+    # Nenhum worker lê a memória entre uma busca e outra, então ela pode ser reescrita
+    memoryview(__shared_state).cast("B")[: len(payload)] = payload
+    __shared_stop.clear()
+
+    # Parte do tempo fica para ler o estado e devolver as árvores
+    tasks = [
+        (len(payload), rng.getrandbits(64), max(budget - SEARCH_MARGIN, 0.0))
+        for foo in range(SEARCH_WORKERS)
+    ]
+    pending = pool.map_async(__root_search, tasks, chunksize=1)
+
+    # Enquanto os workers buscam, o cancelamento é repassado a eles
+    while not pending.ready():
+        if cancel is not None and cancel.is_set():
+            __shared_stop.set()
+
+        pending.wait(THINK_POLL)
+
+    results = pending.get()
+    elapsed = time.perf_counter() - start
+
+    # Junta as visitas de cada carta na raiz
+    visits = {}
+
+    for worker_visits, worker_stats in results:
+        for card, count in worker_visits.items():
+            visits[card] = visits.get(card, 0) + count
+
+    playouts = sum(worker_stats["playouts"] for foo, worker_stats in results)
+
+    return __best_card(state.hands[state.current], visits), {
+        "playouts": playouts,
+        "elapsed": elapsed,
+        "playouts_per_second": playouts / elapsed if elapsed else 0.0,
+        "workers": [worker_stats for foo, worker_stats in results],
+    }
+
+
+def worker_pool():
+    """
+    Return the process pool of the parallel search, creating it on first use.
+
+    The pool is only created on the main thread, with the "fork" start method
+    where it exists, and lives until close_pool, so its processes are started
+    once and reused by every search of every match.
+
+    Returns
+    -------
+    multiprocessing.pool.Pool or None
+        The pool, or None if the search runs in a single process.
+    """
+    global __pool, __shared_state, __shared_stop
+
+    # Processos de um Pool não podem ter filhos
+    if SEARCH_WORKERS <= 1 or multiprocessing.current_process().daemon:
+        return None
+
+    # Criado na thread do Thinker, o pool herdaria um processo com outras threads no meio
+    if __pool is None and threading.current_thread() is threading.main_thread():
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+
+        __shared_state = context.RawArray("B", SEARCH_STATE_SIZE)
+        __shared_stop = context.Event()
+        __pool = context.Pool(
+            SEARCH_WORKERS, initializer=__start_worker, initargs=(__shared_state, __shared_stop)
+        )
+
+    return __pool
+
+
+def close_pool():
+    """
+    Stop the processes of the parallel search, if they were created.
+
+    Returns
+    -------
+    None
+    """
+    global __pool, __shared_state, __shared_stop
+
+    if __pool is None:
+        return
+
+    __pool.close()
+    __pool.join()
+
+    __pool = None
+    __shared_state = None
+    __shared_stop = None
+
+
+def __start_worker(shared_state, shared_stop):
+    """
+    Keep, in a new worker process, what it shares with the searching process.
+
+    Parameters
+    ----------
+    shared_state : multiprocessing.sharedctypes.RawArray
+        The memory where the state of each search is written.
+    shared_stop : multiprocessing.Event
+        The event set when a search is cancelled.
+
+    Returns
+    -------
+    None
+    """
+    global __worker_table, __worker_state, __worker_stop
+
+    # A tabela fica no processo e serve a todas as buscas que ele fizer
+    __worker_table = zobrist.TranspositionTable()
+    __worker_state = memoryview(shared_state).cast("B")
+    __worker_stop = shared_stop
+
+
+def __root_search(task):
+    """
+    Grow a search tree inside a worker process.
+
+    Parameters
+    ----------
+    task : tuple
+        The size of the state in the shared memory, the seed of the worker and
+        its time budget.
+
+    Returns
+    -------
+    tuple
+        The visits of each root card and the statistics of the worker, with its
+        process id.
+    """
+    size, seed, budget = task
+    state = pickle.loads(__worker_state[:size])
+
+    visits, stats = __search(
+        state, random.Random(seed), budget, cancel=__worker_stop, table=__worker_table
+    )
+    stats["worker"] = os.getpid()
+
+    return visits, stats
+
+
+def __search(state, rng, budget=SEARCH_BUDGET, iterations=None, cancel=None, table=None):
+    """
+    Grow a search tree from a state and return the visits of its root cards.
+
+    Parameters
+    ----------
+    state : GameState
+        The state of the root, which is not changed.
+    rng : random.Random
+        The random number generator.
+    budget : float, optional
+        The wall-clock time, in seconds, of the search. Defaults to SEARCH_BUDGET.
+    iterations : int, optional
+        A fixed number of playouts instead of the time budget. Defaults to None.
+    cancel : threading.Event or multiprocessing.Event, optional
+        An event that stops the search early. Defaults to None.
+    table : TranspositionTable, optional
+        The table of the collisions found in the playouts. Defaults to None.
+
+    Returns
+    -------
+    tuple
+        The visits of each card tried at the root and the statistics of the search.
+    """
+    root = DecisionNode()
+    player = state.current
+
+    # Estatísticas da tabela antes da busca, que pode já vir com entradas
+    if table is not None:
+        probes, hits = table.probes, table.hits
+
+    start = time.perf_counter()
+    deadline = start + budget
+    playouts = 0
+
+    while True:
+        if cancel is not None and cancel.is_set():
+            break
+
+        if iterations is not None:
+            if playouts >= iterations:
+                break
+        elif playouts and time.perf_counter() >= deadline:
+            break
+
+        __iterate(root, determinize(state, player, rng), rng, table)
+        playouts += 1
+
+    elapsed = time.perf_counter() - start
+    visits = {card: chance.visits for card, chance in root.children.items()}
+    stats = {
+        "playouts": playouts,
+        "elapsed": elapsed,
+        "playouts_per_second": playouts / elapsed if elapsed else 0.0,
+    }
+
+    if table is not None:
+        probes = table.probes - probes
+        stats["table_hit_rate"] = (table.hits - hits) / probes if probes else 0.0
+
+    return visits, stats
+
+
+def __best_card(hand, visits):
+    """
+    Return the card of a hand most visited at the root.
+
+    Parameters
+    ----------
+    hand : list
+        The vectors in the hand of the rider to move.
+    visits : dict
+        The visits of each card tried at the root.
+
+    Returns
+    -------
+    tuple
+        The vector of the card. The most visited is the most reliable.
+    """
+    return max(sorted(set(hand)), key=lambda card: visits.get(card, -1))
+
+
+def determinize(state, player, rng=random):
+    """
+    Return a copy of a state with the cards a rider cannot see dealt at random.
+
+    Parameters
+    ----------
+    state : GameState
+        The state.
+    player : int
+        The rider whose hand is known.
+    rng : random.Random, optional
+        The random number generator. Defaults to the random module.
+
+    Returns
+    -------
+    GameState
+        The copy, with the deck and the other riders' hands shuffled together.
+    """
+    state = state.clone(territory=False)
+    others = [index for index in range(len(state.hands)) if index != player and state.alive[index]]
+
+    unknown = state.deck.copy()
+
+    for index in others:
+        unknown.extend(state.hands[index])
+
+    rng.shuffle(unknown)
+
+    for index in others:
+        size = len(state.hands[index])
+        state.hands[index] = unknown[:size]
+        unknown = unknown[size:]
+
+    state.deck = unknown
+
+    return state
+
+
+def playout(state, rng=random, max_turns=SEARCH_PLAYOUT_TURNS, table=None):
+    """
+    Play a state until the end with random cards, avoiding the ones that kill at once.
+
+    Parameters
+    ----------
+    state : GameState
+        The state, which is changed.
+    rng : random.Random, optional
+        The random number generator. Defaults to the random module.
+    max_turns : int, optional
+        The number of turns after which the playout stops. Defaults to SEARCH_PLAYOUT_TURNS.
+    table : TranspositionTable, optional
+        A table where the collisions are kept. Defaults to None.
+
+    Returns
+    -------
+    list
+        The reward of each rider: 1 for the winner, or the win shared among the
+        riders still alive when the playout stops.
+    """
+    last_turn = state.turn + max_turns
+
+    while not state.finished() and state.turn < last_turn:
+        hand = state.hands[state.current]
+        safe = [card for card in hand if not state.collision(card, table=table)]
+
+        state.step(rng.choice(safe or hand), rng, table=table)
+
+    return reward(state)
+
+
+def reward(state):
+    """
+    Return the reward of each rider in a state.
+
+    Parameters
+    ----------
+    state : GameState
+        The state.
+
+    Returns
+    -------
+    list
+        1 for the winner, the win shared among the riders alive if there are
+        many, and 0 for the dead.
+    """
+    alive = state.alive.count(True)
+
+    if not alive:
+        return [0.0] * len(state.alive)
+
+    return [1 / alive if flag else 0.0 for flag in state.alive]
+
+
+def __iterate(root, state, rng, table=None):
+    """
+    Run one iteration of the search: selection, expansion, playout and backpropagation.
+
+    Parameters
+    ----------
+    root : DecisionNode
+        The root of the tree.
+    state : GameState
+        A determinized copy of the state of the root, which is changed.
+    rng : random.Random
+        The random number generator.
+    table : TranspositionTable, optional
+        The table of the collisions. Defaults to None.
+
+    Returns
+    -------
+    None
+    """
+    node = root
+    path = []
+
+    while not state.finished():
+        rider = state.current
+        cards = set(state.hands[rider])
+
+        for card in cards:
+            if card in node.children:
+                node.children[card].available += 1
+
+        # Expande uma carta ainda não tentada, ou escolhe pelo UCB
+        untried = [card for card in cards if card not in node.children]
+
+        if untried:
+            card = rng.choice(sorted(untried))
+            node.children[card] = ChanceNode(len(state.alive))
+            node.children[card].available = 1
+        else:
+            card = max(sorted(cards), key=lambda card: __ucb(node.children[card], rider))
+
+        chance = node.children[card]
+        collision = state.step(card, rng, table=table)
+
+        # O sorteio (a carta pescada) decide o próximo nó
+        drawn = None if collision else state.hands[rider][-1]
+        path.append((node, chance))
+
+        if drawn not in chance.children:
+            chance.children[drawn] = DecisionNode()
+            node = chance.children[drawn]
+            break
+
+        node = chance.children[drawn]
+
+    result = playout(state, rng, table=table)
+
+    for parent, chance in path:
+        parent.visits += 1
+        chance.visits += 1
+
+        for index, value in enumerate(result):
+            chance.reward[index] += value
+
+    node.visits += 1
+
+
+def __ucb(chance, rider):
+    """
+    Return the UCB score of a card for the rider that chooses it.
+
+    Parameters
+    ----------
+    chance : ChanceNode
+        The node reached by the card.
+    rider : int
+        The rider choosing.
+
+    Returns
+    -------
+    float
+        The mean reward plus the exploration bonus.
+    """
+    return chance.reward[rider] / chance.visits + SEARCH_EXPLORATION * math.sqrt(
+        math.log(chance.available) / chance.visits
+    )
@@ -0,0 +1,642 @@
+import random
+
+import bitboard
+import lattice
+import moves
+import zobrist
+from territory import TerritoryMap
+
+
+class GameState:
+    """
+    Plain-data model of a match, independent of sprites and of the display.
+
+    The riders are identified by their position in the turn order. Trails are
+    kept both as lattice paths and as bitboards, so testing a move is a few
+    integer operations and cloning only copies small lists.
+
+    Attributes
+    ----------
+    numbers : tuple
+        The number of each rider.
+    positions : list
+        The lattice vertex where each rider stands.
+    paths : list
+        The lattice path of each rider, like Rider._lattice_path.
+    vertices : list
+        The bits of the vertices covered by each rider's trail.
+    edges : list
+        The bits of the edges covered by each rider's trail.
+    older_vertices : list
+        The bits of the vertices covered by each trail without its last segment.
+    older_edges : list
+        The bits of the edges covered by each trail without its last segment.
+    hands : list
+        The vectors in each rider's hand, in the order they are shown.
+    deck : list
+        The vectors left in the deck, the next draw first.
+    drawn : list
+        The vectors drawn since the last shuffle.
+    last_cards : list
+        The vector of each rider's previous move.
+    alive : list
+        Whether each rider is still playing.
+    turn : int
+        The current turn.
+    current : int
+        The rider that moves next.
+    zobrist : int
+        The Zobrist hash of the board: the riders' positions, trail edges, last
+        cards and alive flags, who moves next and whether it is the first turn.
+        It is updated with each move, never recomputed.
+    trail_keys : list
+        The part of the hash from each rider's trail, removed when it dies.
+    territory : TerritoryMap or None
+        The moves still open on the board, kept up to date with each move when
+        present. Only the state of the match has one, as the searches do not use it.
+
+    Methods
+    -------
+    capture(cls, riders, deck, turn=0)
+        Build the state of riders and a deck already on the board.
+    clone(self, territory=True)
+        Return an independent copy of the state.
+    finished(self)
+        Check if at most one rider is left.
+    winner(self)
+        Return the number of the winner.
+    key(self)
+        Return a hashable summary of the state.
+    collision(self, card, timed=False, table=None)
+        Find the collision of a move of the current rider.
+    step(self, card, rng=random, timed=False, table=None)
+        Play a card with the current rider.
+    __move(self, index, card)
+        Commit a segment to a rider's trail.
+    __kill(self, index)
+        Remove a rider and its trail from the match.
+    __full_hash(self)
+        Compute the Zobrist hash of the state from scratch.
+    __trail_key(index, path)
+        Return the part of the Zobrist hash from a rider's trail.
+    __advance(self, index)
+        Pass the turn to the next rider alive after another one.
+    __first_turn_collision(self)
+        Kill the riders that ended the first turn on a trail.
+    __vector(card)
+        Return the vector of a card as a tuple.
+    """
+
+    __slots__ = (
+        "numbers",
+        "positions",
+        "paths",
+        "vertices",
+        "edges",
+        "older_vertices",
+        "older_edges",
+        "hands",
+        "deck",
+        "drawn",
+        "last_cards",
+        "alive",
+        "turn",
+        "current",
+        "zobrist",
+        "trail_keys",
+        "territory",
+    )
+
+    def __init__(self, numbers, paths, hands, deck, drawn, last_cards, turn=0):
+        """
+        Initialize the GameState object.
+
+        Parameters
+        ----------
+        numbers : iterable
+            The number of each rider.
+        paths : iterable
+            The lattice path of each rider.
+        hands : iterable
+            The vectors in each rider's hand.
+        deck : iterable
+            The vectors left in the deck, the next draw first.
+        drawn : iterable
+            The vectors drawn since the last shuffle.
+        last_cards : iterable
+            The vector of each rider's previous move.
+        turn : int, optional
+            The current turn. Defaults to 0.
+
+        Returns
+        -------
+        None
+        """
+        self.numbers = tuple(numbers)
+        self.paths = [list(path) for path in paths]
+        self.positions = [path[-1] for path in self.paths]
+        self.hands = [[self.__vector(card) for card in hand] for hand in hands]
+        self.deck = [self.__vector(card) for card in deck]
+        self.drawn = [self.__vector(card) for card in drawn]
+        self.last_cards = [self.__vector(card) for card in last_cards]
+        self.alive = [True] * len(self.numbers)
+        self.turn = turn
+        self.current = 0
+
+        # Monta os bitboards a partir dos caminhos
+        self.vertices = []
+        self.edges = []
+        self.older_vertices = []
+        self.older_edges = []
+
+        for path in self.paths:
+            board = bitboard.TrailBoard()
+
+            for start, end in zip(path[1:], path[2:]):
+                board.push(start, end)
+
+            self.vertices.append(board.vertices())
+            self.edges.append(board.edges())
+            self.older_vertices.append(board.vertices(skip_last=True))
+            self.older_edges.append(board.edges(skip_last=True))
+
+        self.trail_keys = [
+            self.__trail_key(index, path) for index, path in enumerate(self.paths)
+        ]
+        self.zobrist = self.__full_hash()
+        self.territory = None
+
+    @classmethod
+    def capture(cls, riders, deck, turn=0):
+        """
+        Build the state of riders and a deck already on the board.
+
+        Parameters
+        ----------
+        riders : list
+            The riders, in turn order.
+        deck : Deck
+            The deck the riders draw from.
+        turn : int, optional
+            The current turn. Defaults to 0.
+
+        Returns
+        -------
+        GameState
+            The state, with its territory map.
+        """
+        state = cls(
+            [rider._number for rider in riders],
+            [rider._lattice_path for rider in riders],
+            [rider._hand.sprites() for rider in riders],
+            deck.cards,
+            deck.drawn_cards,
+            [rider._last_card for rider in riders],
+            turn,
+        )
+        state.territory = TerritoryMap.from_state(state)
+
+        return state
+
+    def clone(self, territory=True):
+        """
+        Return an independent copy of the state.
+
+        Parameters
+        ----------
+        territory : bool, optional
+            Whether the territory map is copied too. Without it the copy plays
+            faster, as no map is updated. Defaults to True.
+
+        Returns
+        -------
+        GameState
+            The copy.
+        """
+        state = GameState.__new__(GameState)
+
+        # Tuplas e inteiros são imutáveis, então só as listas são copiadas
+        state.numbers = self.numbers
+        state.positions = self.positions.copy()
+        state.paths = [path.copy() for path in self.paths]
+        state.vertices = self.vertices.copy()
+        state.edges = self.edges.copy()
+        state.older_vertices = self.older_vertices.copy()
+        state.older_edges = self.older_edges.copy()
+        state.hands = [hand.copy() for hand in self.hands]
+        state.deck = self.deck.copy()
+        state.drawn = self.drawn.copy()
+        state.last_cards = self.last_cards.copy()
+        state.alive = self.alive.copy()
+        state.turn = self.turn
+        state.current = self.current
+        state.zobrist = self.zobrist
+        state.trail_keys = self.trail_keys.copy()
+
+        if territory and self.territory is not None:
+            state.territory = self.territory.copy()
+        else:
+            state.territory = None
+
+        return state
+
+    def finished(self):
+        """
+        Check if at most one rider is left.
+
+        Returns
+        -------
+        bool
+            True if the match is over, False otherwise.
+        """
+        return self.alive.count(True) <= 1
+
+    def winner(self):
+        """
+        Return the number of the winner.
+
+        Returns
+        -------
+        int
+            The number of the only rider left, or 0 if the match is not over or nobody won.
+        """
+        if self.alive.count(True) != 1:
+            return 0
+
+        return self.numbers[self.alive.index(True)]
+
+    def key(self):
+        """
+        Return a hashable summary of the state.
+
+        Two states with the same key play on identically, so it tells if a result
+        computed on a copy of a state still holds.
+
+        Returns
+        -------
+        tuple
+            The Zobrist hash of the board, the turn, the hands and the deck.
+        """
+        return (
+            self.zobrist,
+            self.turn,
+            tuple(tuple(hand) for hand in self.hands),
+            tuple(self.deck),
+            tuple(self.drawn),
+        )
+
+    def collision(self, card, timed=False, table=None):
+        """
+        Find the collision of a move of the current rider.
+
+        Without timed, the bitboards only tell who dies: the cause is exact when
+        there is a single one, and the time is left out.
+
+        Parameters
+        ----------
+        card : tuple
+            The vector of the move.
+        timed : bool, optional
+            Whether to find the exact time and cause, with the lattice geometry.
+            Defaults to False.
+        table : TranspositionTable, optional
+            A table where the results without timed are kept by the hash of the
+            state and the card, so they are found once. Defaults to None.
+
+        Returns
+        -------
+        tuple or None
+            The time (None unless timed), cause and rider hit, if any, as in
+            moves.first_collision. None if the move is safe.
+        """
+        index = self.current
+        card = self.__vector(card)
+
+        # O resultado só depende do que entra no hash, então pode ser reaproveitado
+        if table is not None and not timed:
+            key = self.zobrist ^ zobrist.move_key(card)
+            entry = table.get(key)
+
+            if entry is None:
+                entry = (self.collision(card),)
+                table.put(key, entry)
+
+            return entry[0]
+
+        if timed:
+            enemies = [
+                (other, True, self.paths[other])
+                for other in range(len(self.numbers))
+                if other != index and self.alive[other]
+            ]
+
+            return moves.first_collision(
+                self.paths[index],
+                card,
+                self.last_cards[index],
+                enemies,
+                rider=index,
+                lines=bool(self.turn),
+            )
+
+        start = self.positions[index]
+        end = (start[0] + card[0], start[1] + card[1])
+
+        if abs(end[0]) > bitboard.RADIUS or abs(end[1]) > bitboard.RADIUS:
+            border = True
+        else:
+            border = False
+
+        # No turno zero todos partem do centro e só a fronteira conta
+        if not self.turn:
+            return (None, moves.BORDER, None) if border else None
+
+        vertices, edges, crossings = bitboard.move_masks(start, card)
+        trail = None
+        bodies = []
+
+        for other in range(len(self.numbers)):
+            if other == index or not self.alive[other]:
+                continue
+
+            if self.vertices[other] & vertices or self.edges[other] & crossings:
+                trail = other
+
+            if bitboard.vertex_bit(self.positions[other]) & vertices:
+                bodies.append(other)
+
+        if self.older_vertices[index] & vertices or self.older_edges[index] & crossings:
+            trail = index
+
+        reverse = lattice.last_vector_collision(card, self.last_cards[index])
+
+        # Quem está no caminho só morre junto se for a primeira colisão
+        if bodies:
+            return self.collision(card, timed=True)
+
+        if reverse:
+            return (None, moves.REVERSE, None)
+
+        if trail is not None:
+            return (None, moves.TRAIL, trail)
+
+        if border:
+            return (None, moves.BORDER, None)
+
+        return None
+
+    def step(self, card, rng=random, timed=False, table=None):
+        """
+        Play a card with the current rider.
+
+        A safe move commits the segment and refills the hand from the deck, which is
+        shuffled back like Deck's when it runs out. A collision kills the rider (and
+        the one it ran into) and removes their trails. Then the turn passes to the
+        next rider alive, and at the end of the first turn the riders standing on
+        a trail are killed.
+
+        Parameters
+        ----------
+        card : tuple
+            The vector played, which should be in the rider's hand.
+        rng : random.Random, optional
+            The generator used to shuffle the deck. Defaults to the random module.
+        timed : bool, optional
+            Whether the collision is found with its exact time. Defaults to False.
+        table : TranspositionTable, optional
+            The table passed to collision. Defaults to None.
+
+        Returns
+        -------
+        tuple or None
+            The collision of the move, as returned by collision.
+        """
+        index = self.current
+        card = self.__vector(card)
+        collision = self.collision(card, timed, table)
+
+        if collision:
+            self.__kill(index)
+
+            if collision[1] == moves.RIDER:
+                self.__kill(collision[2])
+        else:
+            self.__move(index, card)
+
+            # Repõe a carta usada com a próxima do deck
+            if not self.deck:
+                rng.shuffle(self.drawn)
+                self.deck = self.drawn
+                self.drawn = []
+
+            self.hands[index].remove(card)
+            self.hands[index].append(self.deck.pop(0))
+            self.drawn.append(self.hands[index][-1])
+
+        self.__advance(index)
+
+        return collision
+
+    def __move(self, index, card):
+        """
+        Commit a segment to a rider's trail.
+
+        Parameters
+        ----------
+        index : int
+            The rider.
+        card : tuple
+            The vector of the segment.
+
+        Returns
+        -------
+        None
+        """
+        start = self.positions[index]
+        end = (start[0] + card[0], start[1] + card[1])
+        vertices, edges, crossings = bitboard.move_masks(start, card)
+
+        # O hash muda junto com o caminho: sai a posição e a última carta antigas
+        segment = zobrist.segment_key(index, start, card)
+        self.trail_keys[index] ^= segment
+        self.zobrist ^= (
+            zobrist.position_key(index, start)
+            ^ zobrist.position_key(index, end)
+            ^ zobrist.last_card_key(index, self.last_cards[index])
+            ^ zobrist.last_card_key(index, card)
+            ^ segment
+        )
+
+        self.older_vertices[index] = self.vertices[index]
+        self.older_edges[index] = self.edges[index]
+        self.vertices[index] |= vertices
+        self.edges[index] |= edges
+
+        self.paths[index].append(end)
+        self.positions[index] = end
+        self.last_cards[index] = card
+
+        if self.territory is not None:
+            self.territory.add_segment(start, card)
+
+    def __kill(self, index):
+        """
+        Remove a rider and its trail from the match.
+
+        Parameters
+        ----------
+        index : int
+            The rider.
+
+        Returns
+        -------
+        None
+        """
+        if not self.alive[index]:
+            return
+
+        # Um rider morto deixa de contar no hash, com sua linha
+        self.zobrist ^= (
+            zobrist.alive_key(index)
+            ^ zobrist.position_key(index, self.positions[index])
+            ^ zobrist.last_card_key(index, self.last_cards[index])
+            ^ self.trail_keys[index]
+        )
+        self.trail_keys[index] = 0
+
+        self.alive[index] = False
+        self.vertices[index] = 0
+        self.edges[index] = 0
+        self.older_vertices[index] = 0
+        self.older_edges[index] = 0
+
+        # Linhas não são removidas do mapa aos poucos, então ele é refeito
+        if self.territory is not None:
+            self.territory = TerritoryMap.from_state(self)
+
+    def __advance(self, index):
+        """
+        Pass the turn to the next rider alive after another one.
+
+        Parameters
+        ----------
+        index : int
+            The rider that has just played.
+
+        Returns
+        -------
+        None
+        """
+        self.zobrist ^= zobrist.current_key(self.current)
+
+        for other in range(index + 1, len(self.numbers)):
+            if self.alive[other]:
+                self.current = other
+                self.zobrist ^= zobrist.current_key(other)
+                return
+
+        # Todos jogaram: começa o próximo turno
+        self.turn += 1
+
+        if self.turn == 1:
+            self.zobrist ^= zobrist.first_turn_key()
+            self.__first_turn_collision()
+
+        self.current = self.alive.index(True) if True in self.alive else 0
+        self.zobrist ^= zobrist.current_key(self.current)
+
+    def __first_turn_collision(self):
+        """
+        Kill the riders that ended the first turn on a trail.
+
+        Returns
+        -------
+        None
+        """
+        # Todos são testados antes de remover as linhas de quem morreu
+        dead = []
+
+        for index, position in enumerate(self.positions):
+            if not self.alive[index]:
+                continue
+
+            bit = bitboard.vertex_bit(position)
+            others = any(
+                self.vertices[other] & bit
+                for other in range(len(self.numbers))
+                if other != index
+            )
+
+            if others or self.older_vertices[index] & bit:
+                dead.append(index)
+
+        for index in dead:
+            self.__kill(index)
+
+    def __full_hash(self):
+        """
+        Compute the Zobrist hash of the state from scratch.
+
+        Returns
+        -------
+        int
+            The hash, as kept in zobrist.
+        """
+        key = zobrist.current_key(self.current)
+
+        if not self.turn:
+            key ^= zobrist.first_turn_key()
+
+        for index in range(len(self.numbers)):
+            if not self.alive[index]:
+                continue
+
+            key ^= (
+                zobrist.alive_key(index)
+                ^ zobrist.position_key(index, self.positions[index])
+                ^ zobrist.last_card_key(index, self.last_cards[index])
+                ^ self.trail_keys[index]
+            )
+
+        return key
+
+    @staticmethod
+    def __trail_key(index, path):
+        """
+        Return the part of the Zobrist hash from a rider's trail.
+
+        Parameters
+        ----------
+        index : int
+            The rider.
+        path : list
+            The lattice path of the rider.
+
+        Returns
+        -------
+        int
+            The XOR of the keys of its segments.
+        """
+        key = 0
+
+        for start, end in zip(path[1:], path[2:]):
+            key ^= zobrist.segment_key(index, start, (end[0] - start[0], end[1] - start[1]))
+
+        return key
+
+    @staticmethod
+    def __vector(card):
+        """
+        Return the vector of a card as a tuple.
+
+        Parameters
+        ----------
+        card : Card or tuple
+            The card.
+
+        Returns
+        -------
+        tuple
+            The vector (x, y).
+        """
+        return (card[0], card[1])
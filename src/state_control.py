@@ -1,15 +1,26 @@
 import pygame
+import queue
+import sys
+import threading
+import time
 
 from menu import *
 from game import *
 from deck import *
 from config import *
+from scheduler import FrameScheduler
+from textures import TextureCache, to_display_format
+import bundle
+import search
 
 
 class StateControl:
     """
     Class that controls the state of the game and manages the game loop.
 
+    The screens and the game are only created the first time they are used, and
+    the game textures are loaded by a background thread while the menus run.
+
     Attributes
     ----------
     running : bool
@@ -28,10 +39,12 @@ class StateControl:
         Flag indicating if the escape key is pressed.
     BUTTON_CLICKED : bool
         Flag indicating if a button is clicked.
+    MOUSE_CLICKED : bool
+        Flag indicating if the left mouse button was pressed.
     screen : pygame.Surface
         The game screen.
-    fps_clock : pygame.time.Clock
-        The clock used to control the game's frame rate.
+    scheduler : FrameScheduler
+        The scheduler that caps the frame rate of the menus and the game.
     main_menu : MainMenu
         The main menu of the game.
     options_menu : OptionsMenu
@@ -44,6 +57,8 @@ class StateControl:
         The current menu being displayed.
     game_run : GridGame
         The game instance.
+    startup_times : dict
+        The time, in seconds, at which each startup event happened.
 
     Methods
     -------
@@ -55,8 +70,41 @@ class StateControl:
         Reset the key flags to their initial state.
     start(self)
         Start the game by displaying the main menu and entering the game loop.
+    mark(self, event)
+        Save the time elapsed since startup when an event first happens.
+    startup_report(self)
+        Return the startup timings.
+    finish_assets(self, limit=None)
+        Convert the textures decoded by the loader thread and store them in the cache.
+    quit(self)
+        Stop the search processes, close the window and exit.
     """
 
+    # Telas do jogo, criadas apenas no primeiro uso
+    _SCREENS = {
+        "main_menu": (MainMenu, "vectrun_logo.png", (WIDTH / 2, HEIGHT / 5), (LOGO_X, LOGO_Y)),
+        "options_menu": (
+            OptionsMenu,
+            "options_button.png",
+            (WIDTH / 2, (HEIGHT / 6 - 50)),
+            (2 * BUTTON_X, 2 * BUTTON_Y),
+        ),
+        "credits_menu": (
+            CreditsMenu,
+            "credits_button.png",
+            (WIDTH / 2, (HEIGHT / 6 - 50)),
+            (2 * BUTTON_X, 2 * BUTTON_Y),
+        ),
+        "win_screen": (ResultScreen, "you_win.png", (WIDTH / 2, HEIGHT / 5), (LOGO_X, LOGO_Y)),
+        "lose_screen": (ResultScreen, "you_lose.png", (WIDTH / 2, HEIGHT / 5), (LOGO_X, LOGO_Y)),
+        "tutorial_screen": (
+            TutorialScreen,
+            "tutorial_text.png",
+            (WIDTH / 2, HEIGHT / 6 - 50),
+            (2 * BUTTON_X, 2 * BUTTON_Y),
+        ),
+    }
+
     def __init__(self):
         """
         Initialize the StateControl object.
@@ -69,6 +117,10 @@ class StateControl:
         -------
         None
         """
+        # Tempos de inicialização, para medir o tempo até o primeiro quadro
+        self.__start_time = time.perf_counter()
+        self.startup_times = {}
+
         # Iniciação das variáveis de controle
         self.running, self.playing = True, False
         self.UP_KEY, self.DOWN_KEY, self.START_KEY, self.BACK_KEY, self.ESC_KEY = (
@@ -79,72 +131,263 @@ class StateControl:
             False,
         )
         self.BUTTON_CLICKED = False
+        self.MOUSE_CLICKED = False
         self.first_time = True
 
+        # Os processos da busca paralela são criados aqui, na thread principal
+        # e antes da janela, e não pela thread do Thinker na primeira busca
+        if BOT_POLICY == "mcts":
+            search.worker_pool()
+            self.mark("search_pool")
+
         # Cria a tela do jogo
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption("Vectrun")
         pygame.display.set_icon(pygame.image.load(TEXTURE_PATH + "icon.png"))
+        self.mark("display")
 
-        # Cria o relógio interno do FPS
-        self.fps_clock = pygame.time.Clock()
-
-        # Cria um objeto para cada uma das telas
-        self.main_menu = MainMenu(
-            self,
-            (TEXTURE_MENU_PATH + "vectrun_logo.png"),
-            (WIDTH / 2, HEIGHT / 5),
-            (LOGO_X, LOGO_Y),
-        )
-        self.options_menu = OptionsMenu(
-            self,
-            (TEXTURE_MENU_PATH + "options_button.png"),
-            (WIDTH / 2, (HEIGHT / 6 - 50)),
-            (2 * BUTTON_X, 2 * BUTTON_Y),
-        )
-        self.credits_menu = CreditsMenu(
-            self,
-            (TEXTURE_MENU_PATH + "credits_button.png"),
-            (WIDTH / 2, (HEIGHT / 6 - 50)),
-            (2 * BUTTON_X, 2 * BUTTON_Y),
-        )
-
-        # Cria a tela de vitória e derrota
-        self.win_screen = ResultScreen(
-            self,
-            (TEXTURE_MENU_PATH + "you_win.png"),
-            (WIDTH / 2, HEIGHT / 5),
-            (LOGO_X, LOGO_Y),
-        )
-        self.lose_screen = ResultScreen(
-            self,
-            (TEXTURE_MENU_PATH + "you_lose.png"),
-            (WIDTH / 2, HEIGHT / 5),
-            (LOGO_X, LOGO_Y),
-        )
+        # Cria o controle da taxa de quadros
+        self.scheduler = FrameScheduler()
         self.winner = 0
 
-        # Tela do tutorial
-        self.tutorial_screen = TutorialScreen(
-            self,
-            (TEXTURE_MENU_PATH + "tutorial_text.png"),
-            (WIDTH / 2, HEIGHT / 6 - 50),
-            (2 * BUTTON_X, 2 * BUTTON_Y),
-        )
+        # Exibe logo um quadro de carregamento
+        self.__load_progress = 0
+        self.__load_total = 0
+        self.__load_done = 0
+        self.__decoded = queue.Queue()
+        self.__draw_loading()
 
-        # Define a tela inicial
+        # Define a tela inicial (as telas são criadas no primeiro uso)
         self.curr_menu = self.main_menu
 
+        # Só então carrega as texturas do jogo em segundo plano
+        self.__loader = threading.Thread(target=self.__load_assets, daemon=True)
+        self.__loader.start()
+
         # Carrega a música pra memória
         self.volume = VOLUME_START
         self.__change_music("title.ogg", self.volume)
         pygame.mixer.music.play(-1, 0, 2)
 
-        # Cria o jogo
-        self.game_run = GridGame(
-            TEXTURE_PATH + "grid.png", (0, 0), (GRID_X, GRID_Y), 3, self.volume, self
+    def __getattr__(self, name):
+        """
+        Create a screen or the game the first time it is used.
+
+        Parameters
+        ----------
+        name : str
+            The name of the attribute.
+
+        Returns
+        -------
+        Menu or GridGame
+            The screen, which is then saved as a regular attribute.
+        """
+        if name in self._SCREENS:
+            screen_class, image, x_y, scale_size = self._SCREENS[name]
+            screen = screen_class(self, TEXTURE_MENU_PATH + image, x_y, scale_size)
+        elif name == "game_run":
+            screen = self.__create_game()
+        else:
+            raise AttributeError(name)
+
+        setattr(self, name, screen)
+
+        return screen
+
+    def __create_game(self):
+        """
+        Create a new match once the game assets are loaded.
+
+        Returns
+        -------
+        GridGame
+            The new game.
+        """
+        # Espera as texturas terminarem de carregar
+        self.__show_loading()
+
+        # O jogador é um singleton: se já existir, o reinicia com o novo deck
+        restart_player = Player.instance is not None
+
+        game = GridGame(
+            TEXTURE_PATH + "grid.png",
+            (0, 0),
+            (GRID_X, GRID_Y),
+            3,
+            self.volume,
+            self,
+            seed=GAME_SEED,
         )
 
+        if restart_player:
+            game.restart_player()
+
+        return game
+
+    def __load_assets(self):
+        """
+        Read and decode the textures of the game.
+
+        Runs in a background thread, using the asset bundle when available.
+        Surfaces are not thread-safe, so the thread only reads the files; the
+        textures are converted and stored on the main thread by finish_assets.
+
+        Returns
+        -------
+        None
+        """
+        entries = bundle.bundle_entries()
+        entries.append((TEXTURE_PATH + "grid.png", (GRID_X, GRID_Y)))
+        entries.append((CARDS_PATH + "card_back.png", (0, 0)))
+
+        textures = bundle.read_bundle()
+        bundled = {image_path for image_path, scale_size, pixels in textures}
+        self.__load_total = len(textures) + len(
+            [entry for entry in entries if entry[0] not in bundled]
+        )
+
+        # Primeiro os pixels do pacote, prontos
+        for texture in textures:
+            self.__decoded.put(texture)
+
+        # Depois as imagens avulsas, só decodificadas
+        for image_path, scale_size in entries:
+            if image_path not in bundled:
+                self.__decoded.put((image_path, scale_size, pygame.image.load(image_path)))
+
+    def finish_assets(self, limit=None):
+        """
+        Convert the textures decoded by the loader thread and store them in the cache.
+
+        Called on the main thread, every menu frame and while the loading screen
+        is shown.
+
+        Parameters
+        ----------
+        limit : int, optional
+            The maximum number of textures to finish. Defaults to None, which
+            finishes all the ones already decoded.
+
+        Returns
+        -------
+        bool
+            True if every texture of the game is in the cache, False otherwise.
+        """
+        while limit is None or limit > 0:
+            try:
+                image_path, scale_size, data = self.__decoded.get_nowait()
+            except queue.Empty:
+                break
+
+            if isinstance(data, pygame.Surface):
+                surface = pygame.transform.smoothscale(to_display_format(data), scale_size)
+            else:
+                surface = bundle.bundle_surface(data, scale_size)
+
+            TextureCache().insert(image_path, scale_size, surface)
+
+            self.__load_done += 1
+            self.__load_progress = self.__load_done / max(self.__load_total, 1)
+
+            if limit is not None:
+                limit -= 1
+
+        done = not self.__loader.is_alive() and self.__decoded.empty()
+
+        if done:
+            self.mark("assets_loaded")
+
+        return done
+
+    def __show_loading(self):
+        """
+        Display the loading screen until the game assets are loaded.
+
+        Returns
+        -------
+        None
+        """
+        while not self.finish_assets():
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.quit()
+
+            self.__draw_loading()
+            self.scheduler.tick(MENU_FPS)
+
+        self.__loader.join()
+
+    def __draw_loading(self):
+        """
+        Draw a minimal loading screen with a progress bar.
+
+        Returns
+        -------
+        None
+        """
+        self.screen.fill(BLACK)
+
+        # Desenha uma barra de progresso simples
+        bar = pygame.Rect(0, 0, WIDTH / 2, 20)
+        bar.center = (WIDTH / 2, HEIGHT / 2)
+        filled = bar.copy()
+        filled.width = bar.width * self.__load_progress
+
+        pygame.draw.rect(self.screen, RED, filled)
+        pygame.draw.rect(self.screen, WHITE, bar, width=2)
+
+        pygame.display.update()
+        self.mark("first_frame")
+
+    def mark(self, event):
+        """
+        Save the time elapsed since startup when an event first happens.
+
+        Parameters
+        ----------
+        event : str
+            The name of the event.
+
+        Returns
+        -------
+        None
+        """
+        if event not in self.startup_times:
+            self.startup_times[event] = self.__elapsed()
+
+            # Quando o menu aparecer, mostra os tempos se pedido
+            if event == "first_menu_frame" and SHOW_STARTUP_TIMES:
+                print(self.startup_report())
+
+    def startup_report(self):
+        """
+        Return the startup timings.
+
+        Returns
+        -------
+        dict
+            The time, in seconds, of each startup event (such as "first_frame"
+            and "first_menu_frame"), and whether the menu was shown within STARTUP_BUDGET.
+        """
+        report = dict(self.startup_times)
+
+        if "first_menu_frame" in report:
+            report["within_budget"] = report["first_menu_frame"] <= STARTUP_BUDGET
+
+        return report
+
+    def __elapsed(self):
+        """
+        Return the time elapsed since the StateControl was created.
+
+        Returns
+        -------
+        float
+            The elapsed time, in seconds.
+        """
+        return time.perf_counter() - self.__start_time
+
     def game_loop(self):
         """
         Main game loop that updates and renders the game until the game is no longer being played.
@@ -172,7 +415,7 @@ class StateControl:
 
             # Enfim mostra o diplay
             pygame.display.update()
-            self.fps_clock.tick(30)
+            self.scheduler.tick(GAME_FPS)
 
         # Se o jogador não saiu no meio da partida então alguém venceu
         if self.winner:
@@ -186,19 +429,23 @@ class StateControl:
             # Reinicia o estado para exibir a tela
             self.start()
 
-    def check_events(self):
+    def check_events(self, events=None):
         """
         Check for user events such as key presses or window close events.
 
         Parameters
         ----------
-        None
+        events : list, optional
+            The events to check. Defaults to None, which takes them from the queue.
 
         Returns
         -------
         None
         """
-        for event in pygame.event.get():
+        if events is None:
+            events = pygame.event.get()
+
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running, self.playing = False, False
                 self.curr_menu.run_display = False
@@ -214,6 +461,8 @@ class StateControl:
                     self.DOWN_KEY = True
                 if event.key == pygame.K_UP:
                     self.UP_KEY = True
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.MOUSE_CLICKED = True
 
     def reset_keys(self):
         """
@@ -235,6 +484,7 @@ class StateControl:
             False,
         )
         self.BUTTON_CLICKED = False
+        self.MOUSE_CLICKED = False
 
     def start(self):
         """
@@ -264,27 +514,31 @@ class StateControl:
             self.restart()
             self.start()
 
+    def quit(self):
+        """
+        Stop the search processes, close the window and exit.
+
+        Returns
+        -------
+        None
+        """
+        search.close_pool()
+        pygame.quit()
+        sys.exit()
+
     def restart(self):
         # Volta para o menu principal
         self.curr_menu = self.main_menu
         self.__change_music("title.ogg", self.volume)
         pygame.mixer.music.play(-1, 0, 2)
 
-        # Cria um novo jogo
-        if not self.game_run._player:
-            self.game_run._player.restart(self.game_run._deck)
-
-        self.game_run = GridGame(
-            TEXTURE_PATH + "grid.png", (0, 0), (GRID_X, GRID_Y), 3, self.volume, self
-        )
+        # Se o jogador morreu, o recria para que o novo jogo possa usá-lo
+        if "game_run" in vars(self):
+            if not self.game_run._player:
+                self.game_run._player.restart(self.game_run._deck)
 
-        # E reinicia a posição do jogador
-        self.game_run._player.restart(self.game_run._deck)
-        temp_riders = self.game_run._all_riders.sprites()
-        self.game_run._all_riders = pygame.sprite.OrderedUpdates(
-            self.game_run._player, temp_riders
-        )
-        self.game_run._mov_stage = -1
+            # O novo jogo será criado quando a partida começar
+            del self.game_run
 
     @staticmethod
     def __change_music(title, volume):
@@ -0,0 +1,406 @@
+import functools
+import math
+
+import bitboard
+import lattice
+import moves
+from config import *
+
+# Vetores do baralho, que limitam os movimentos depois do primeiro
+VECTORS = tuple(tuple(vector) for vector in moves.CARD_VECTORS.tolist())
+
+
+def __patterns():
+    """
+    Return the vertices and crossed edges of each vector's move from the central vertex.
+
+    Returns
+    -------
+    tuple
+        For each vector, the offsets of the vertices it passes through, and a
+        dict with the offsets of the edges it properly crosses by their direction.
+    """
+    vertices = []
+    crossings = []
+
+    for card in VECTORS:
+        steps = math.gcd(card[0], card[1])
+        step = (card[0] // steps, card[1] // steps)
+        vertices.append(tuple((index * step[0], index * step[1]) for index in range(steps + 1)))
+
+        # Decodifica os bits das arestas cruzadas em (vértice, direção)
+        crossed = {}
+        mask = bitboard.move_crossings(card)
+
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+
+            vertex, direction = divmod(bit.bit_length() - 1, len(bitboard.DIRECTIONS))
+            offset = (
+                vertex // bitboard.WIDTH - bitboard.RADIUS - bitboard.PADDING,
+                vertex % bitboard.WIDTH - bitboard.RADIUS - bitboard.PADDING,
+            )
+            crossed.setdefault(direction, []).append(offset)
+
+        crossings.append({direction: tuple(offsets) for direction, offsets in crossed.items()})
+
+    return tuple(vertices), tuple(crossings)
+
+
+# Vértices e arestas cruzadas de cada vetor, a partir do vértice central
+PATTERNS, CROSSINGS = __patterns()
+
+# Deslocamento do bit de um vértice ao andar com cada vetor
+SHIFTS = tuple(card[0] * bitboard.SIDE + card[1] for card in VECTORS)
+
+
+class TerritoryMap:
+    """
+    Lattice moves still open on the board, used to find the territory of each rider.
+
+    For each vector of the deck the map keeps the bits of the vertices a move
+    with it may start from: the move stays inside the board and touches no
+    trail. Adding a segment only closes the moves that run into it, so the map
+    follows the match without being rebuilt. The territory of a rider is the
+    set of vertices it reaches in fewer moves than every other rider, like the
+    Voronoi regions of classic Tron bots.
+
+    Attributes
+    ----------
+    starts : list
+        For each vector in VECTORS, the bits of the vertices where its move is open.
+
+    Methods
+    -------
+    from_state(cls, state)
+        Build the map of the trails of a game state.
+    copy(self)
+        Return an independent copy of the map.
+    add_segment(self, start, card)
+        Close every move that runs into a new trail segment.
+    first_moves(self, state, index, hand=None)
+        Return the vertices a rider reaches with its next move.
+    evaluate(self, state, hands=None)
+        Return the size of the territory of each rider.
+    __spread(self, vertices)
+        Return the vertices reached from a set of vertices with one open move.
+    __open_moves()
+        Return the moves that stay inside the board.
+    __through_vertex(vertex)
+        Return the moves that pass through a vertex.
+    __crossing_edge(vertex, direction)
+        Return the moves that properly cross an edge.
+    """
+
+    __slots__ = ("starts",)
+
+    def __init__(self):
+        """
+        Initialize the TerritoryMap object, with an empty board.
+
+        Returns
+        -------
+        None
+        """
+        self.starts = list(self.__open_moves())
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Build the map of the trails of a game state.
+
+        Parameters
+        ----------
+        state : GameState
+            The state.
+
+        Returns
+        -------
+        TerritoryMap
+            The map with the trails of the riders alive.
+        """
+        territory = cls()
+
+        for index, path in enumerate(state.paths):
+            if not state.alive[index]:
+                continue
+
+            for start, end in zip(path[1:], path[2:]):
+                territory.add_segment(start, (end[0] - start[0], end[1] - start[1]))
+
+        return territory
+
+    def copy(self):
+        """
+        Return an independent copy of the map.
+
+        Returns
+        -------
+        TerritoryMap
+            The copy.
+        """
+        territory = TerritoryMap.__new__(TerritoryMap)
+        territory.starts = self.starts.copy()
+
+        return territory
+
+    def add_segment(self, start, card):
+        """
+        Close every move that runs into a new trail segment.
+
+        Parameters
+        ----------
+        start : tuple
+            The vertex where the segment starts.
+        card : tuple
+            The vector of the segment.
+
+        Returns
+        -------
+        None
+        """
+        steps = math.gcd(card[0], card[1])
+
+        if not steps:
+            return
+
+        step = (card[0] // steps, card[1] // steps)
+        starts = self.starts
+
+        # Direção canônica das arestas, como no bitboard
+        forward = step in bitboard.DIRECTION_INDEX
+        direction = bitboard.DIRECTION_INDEX[step if forward else (-step[0], -step[1])]
+
+        for index in range(steps + 1):
+            vertex = (start[0] + index * step[0], start[1] + index * step[1])
+
+            # Fecha os movimentos que passam pelo vértice
+            for card_index, mask in self.__through_vertex(vertex):
+                starts[card_index] &= ~mask
+
+            if index == steps:
+                break
+
+            # E os que cruzam a aresta até o próximo vértice
+            edge = vertex if forward else (vertex[0] + step[0], vertex[1] + step[1])
+
+            for card_index, mask in self.__crossing_edge(edge, direction):
+                starts[card_index] &= ~mask
+
+    def first_moves(self, state, index, hand=None):
+        """
+        Return the vertices a rider reaches with its next move.
+
+        The move follows the rules of GameState.collision, other than the riders
+        standing in the way: on the first turn only the border counts.
+
+        Parameters
+        ----------
+        state : GameState
+            The state.
+        index : int
+            The rider.
+        hand : iterable, optional
+            The vectors the rider may play. Defaults to None, which allows every
+            vector of the deck.
+
+        Returns
+        -------
+        int
+            The bits of the vertices.
+        """
+        position = state.positions[index]
+        last_card = state.last_cards[index]
+
+        if state.turn:
+            vertices = state.older_vertices[index]
+            edges = state.older_edges[index]
+
+            for other in range(len(state.numbers)):
+                if other != index and state.alive[other]:
+                    vertices |= state.vertices[other]
+                    edges |= state.edges[other]
+        else:
+            vertices = edges = 0
+
+        ends = 0
+
+        for card in set(VECTORS if hand is None else hand):
+            end = bitboard.vertex_bit((position[0] + card[0], position[1] + card[1]))
+
+            if not end or lattice.last_vector_collision(card, last_card):
+                continue
+
+            move_vertices, move_edges, crossings = bitboard.move_masks(position, card)
+
+            if not (move_vertices & vertices or crossings & edges):
+                ends |= end
+
+        return ends
+
+    def evaluate(self, state, hands=None):
+        """
+        Return the size of the territory of each rider.
+
+        Every rider alive spreads from its position at the same pace, one move
+        per step: the first move with its hand, the others with any vector of the
+        deck. A vertex belongs to the only rider that reaches it first; vertices
+        reached by several riders at once belong to no one and stop spreading.
+
+        Parameters
+        ----------
+        state : GameState
+            The state, whose trails must be the ones added to the map.
+        hands : dict, optional
+            The vectors each rider may play next, by rider. Riders left out, or
+            all if None, may play any vector, as their hands are hidden.
+
+        Returns
+        -------
+        list
+            The number of vertices of each rider's territory (0 for the dead).
+        """
+        hands = hands or {}
+        riders = [index for index in range(len(state.numbers)) if state.alive[index]]
+        frontiers = {index: self.first_moves(state, index, hands.get(index)) for index in riders}
+        territory = [0] * len(state.numbers)
+
+        # Os vértices onde os riders estão já foram ocupados
+        visited = 0
+
+        for index in riders:
+            visited |= bitboard.vertex_bit(state.positions[index])
+
+        while any(frontiers.values()):
+            reached = 0
+            contested = 0
+
+            for index in riders:
+                frontiers[index] &= ~visited
+                contested |= reached & frontiers[index]
+                reached |= frontiers[index]
+
+            visited |= reached
+
+            # Cada um avança a partir do que conquistou neste passo
+            for index in riders:
+                conquered = frontiers[index] & ~contested
+                territory[index] += conquered.bit_count()
+                frontiers[index] = self.__spread(conquered)
+
+        return territory
+
+    def __spread(self, vertices):
+        """
+        Return the vertices reached from a set of vertices with one open move.
+
+        Parameters
+        ----------
+        vertices : int
+            The bits of the vertices.
+
+        Returns
+        -------
+        int
+            The bits of the vertices reached.
+        """
+        reached = 0
+
+        if not vertices:
+            return reached
+
+        for starts, shift in zip(self.starts, SHIFTS):
+            moving = vertices & starts
+
+            if moving:
+                reached |= moving << shift if shift > 0 else moving >> -shift
+
+        return reached
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def __open_moves():
+        """
+        Return the moves that stay inside the board.
+
+        Returns
+        -------
+        tuple
+            For each vector, the bits of the vertices its move may start from.
+        """
+        starts = []
+
+        for card in VECTORS:
+            mask = 0
+
+            for x in range(-bitboard.RADIUS, bitboard.RADIUS + 1):
+                for y in range(-bitboard.RADIUS, bitboard.RADIUS + 1):
+                    if bitboard.vertex_bit((x + card[0], y + card[1])):
+                        mask |= bitboard.vertex_bit((x, y))
+
+            starts.append(mask)
+
+        return tuple(starts)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def __through_vertex(vertex):
+        """
+        Return the moves that pass through a vertex, including their ends.
+
+        Parameters
+        ----------
+        vertex : tuple
+            The integer vertex (i, j).
+
+        Returns
+        -------
+        tuple
+            The index of each vector and the bits of the vertices where its
+            moves through the vertex start.
+        """
+        moves_through = []
+
+        for card_index, pattern in enumerate(PATTERNS):
+            mask = 0
+
+            for offset in pattern:
+                mask |= bitboard.vertex_bit((vertex[0] - offset[0], vertex[1] - offset[1]))
+
+            if mask:
+                moves_through.append((card_index, mask))
+
+        return tuple(moves_through)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def __crossing_edge(vertex, direction):
+        """
+        Return the moves that properly cross an edge.
+
+        Parameters
+        ----------
+        vertex : tuple
+            The vertex the edge leaves in its canonical direction.
+        direction : int
+            The index of the direction in bitboard.DIRECTIONS.
+
+        Returns
+        -------
+        tuple
+            The index of each vector and the bits of the vertices where its
+            moves crossing the edge start.
+        """
+        moves_crossing = []
+
+        for card_index, crossed in enumerate(CROSSINGS):
+            mask = 0
+
+            for offset in crossed.get(direction, ()):
+                mask |= bitboard.vertex_bit((vertex[0] - offset[0], vertex[1] - offset[1]))
+
+            if mask:
+                moves_crossing.append((card_index, mask))
+
+        return tuple(moves_crossing)
@@ -0,0 +1,222 @@
+import threading
+
+import pygame
+
+import utilities
+
+
+def to_display_format(surface):
+    """
+    Convert a surface to the pixel format of the display, if there is one.
+
+    Without a display mode (as in headless matches) the surface is returned as is.
+
+    Parameters
+    ----------
+    surface : pygame.Surface
+        The surface to convert.
+
+    Returns
+    -------
+    pygame.Surface
+        The converted surface.
+    """
+    if pygame.display.get_surface() is None:
+        return surface
+
+    return surface.convert_alpha()
+
+
+@utilities.Singleton
+class TextureCache:
+    """
+    Process-wide cache of loaded and scaled textures.
+
+    Every surface is decoded from disk and scaled only once per key, so rebuilding
+    entities (a new match, a new menu) does no disk or decode work after the first time.
+    Surfaces returned by the cache are shared and must not be drawn upon.
+    The cache may be filled from a background thread while the game runs.
+
+    Attributes
+    ----------
+    hits : int
+        Number of requests served from the cache.
+    misses : int
+        Number of requests that had to load the texture from disk.
+
+    Methods
+    -------
+    load(self, image_path, scale_size, flip=False)
+        Return the texture, loading it if needed.
+    insert(self, image_path, scale_size, surface, flip=False)
+        Store an already scaled texture.
+    preload(self, entries)
+        Load several textures ahead of time.
+    evict(self, image_path=None)
+        Remove textures from the cache.
+    stats(self)
+        Return the cache counters.
+    """
+
+    def __init__(self):
+        """
+        Initialize the TextureCache object.
+
+        Returns
+        -------
+        None
+        """
+        # Superfícies indexadas por (caminho, tamanho, virada)
+        self.__surfaces = {}
+        self.__lock = threading.Lock()
+
+        # Contadores de uso
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """
+        Return the number of cached textures.
+
+        Returns
+        -------
+        int
+            The number of cached textures.
+        """
+        return len(self.__surfaces)
+
+    def __contains__(self, key):
+        """
+        Check if a texture is already cached.
+
+        Parameters
+        ----------
+        key : tuple
+            The key (image_path, scale_size, flip) of the texture.
+
+        Returns
+        -------
+        bool
+            True if the texture is cached, False otherwise.
+        """
+        return key in self.__surfaces
+
+    def load(self, image_path, scale_size, flip=False):
+        """
+        Return the texture, loading it if needed.
+
+        Parameters
+        ----------
+        image_path : str
+            The path to the image file.
+        scale_size : tuple
+            The width and height to scale the image.
+        flip : bool, optional
+            Whether the image is mirrored horizontally. Defaults to False.
+
+        Returns
+        -------
+        pygame.Surface
+            The shared scaled surface.
+        """
+        key = (image_path, tuple(scale_size), flip)
+
+        # Se já estiver na memória, apenas a retorna
+        with self.__lock:
+            surface = self.__surfaces.get(key)
+
+            if surface is not None:
+                self.hits += 1
+                return surface
+
+            self.misses += 1
+
+        # A versão virada é derivada da original, que também fica salva
+        if flip:
+            surface = pygame.transform.flip(self.load(image_path, scale_size), True, False)
+        else:
+            surface = to_display_format(pygame.image.load(image_path))
+            surface = pygame.transform.smoothscale(surface, key[1])
+
+        # Decodifica fora da trava; se outra thread chegou antes, usa a dela
+        with self.__lock:
+            return self.__surfaces.setdefault(key, surface)
+
+    def insert(self, image_path, scale_size, surface, flip=False):
+        """
+        Store an already scaled texture, such as one read from the asset bundle.
+
+        Parameters
+        ----------
+        image_path : str
+            The path to the original image file.
+        scale_size : tuple
+            The width and height of the surface.
+        surface : pygame.Surface
+            The scaled surface.
+        flip : bool, optional
+            Whether the surface is mirrored horizontally. Defaults to False.
+
+        Returns
+        -------
+        None
+        """
+        with self.__lock:
+            self.__surfaces[(image_path, tuple(scale_size), flip)] = surface
+
+    def preload(self, entries):
+        """
+        Load several textures ahead of time.
+
+        Parameters
+        ----------
+        entries : iterable
+            Tuples (image_path, scale_size) or (image_path, scale_size, flip).
+
+        Returns
+        -------
+        None
+        """
+        for entry in entries:
+            self.load(*entry)
+
+    def evict(self, image_path=None):
+        """
+        Remove textures from the cache.
+
+        Parameters
+        ----------
+        image_path : str, optional
+            Only textures loaded from this path are removed. Defaults to None,
+            which empties the whole cache.
+
+        Returns
+        -------
+        int
+            The number of textures removed.
+        """
+        with self.__lock:
+            # Sem caminho, esvazia tudo
+            if image_path is None:
+                count = len(self.__surfaces)
+                self.__surfaces.clear()
+
+                return count
+
+            keys = [key for key in self.__surfaces if key[0] == image_path]
+
+            for key in keys:
+                del self.__surfaces[key]
+
+            return len(keys)
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns
+        -------
+        dict
+            The number of hits, misses and cached textures.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.__surfaces)}
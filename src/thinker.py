@@ -0,0 +1,132 @@
+import concurrent.futures
+import threading
+
+from config import *
+
+
+class Thinker:
+    """
+    Worker thread that chooses a bot's card while the game keeps drawing frames.
+
+    A search is started as soon as the state the bot will face is known, such
+    as while the previous move is animated or while the human hovers a card.
+    Each search is tied to the key of its state: starting one for another state
+    cancels the previous search, and its result is only handed back for the
+    same state.
+
+    Methods
+    -------
+    start(self, bot, state, rng)
+        Start searching the card of a bot in the background.
+    result(self, state, timeout=THINK_POLL)
+        Return the card found for a state, if the search is over.
+    cancel(self)
+        Stop the current search and forget it.
+    shutdown(self)
+        Cancel the search and stop the worker thread.
+    """
+
+    def __init__(self):
+        """
+        Initialize the Thinker object.
+
+        Returns
+        -------
+        None
+        """
+        self.__executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="thinker"
+        )
+
+        # Busca em andamento: a chave do estado, o resultado futuro e o sinal de parada
+        self.__key = None
+        self.__future = None
+        self.__stop = None
+
+    def start(self, bot, state, rng):
+        """
+        Start searching the card of a bot in the background.
+
+        Nothing happens if the same state is already being searched.
+
+        Parameters
+        ----------
+        bot : Bot
+            The bot to move in the state.
+        state : GameState
+            The state the bot will face, which is copied.
+        rng : random.Random
+            The random number generator of the search, used only by the worker.
+
+        Returns
+        -------
+        None
+        """
+        key = state.key()
+
+        if key == self.__key:
+            return
+
+        self.cancel()
+
+        self.__key = key
+        self.__stop = threading.Event()
+        self.__future = self.__executor.submit(bot.think, state.clone(), rng, self.__stop)
+
+    def result(self, state, timeout=THINK_POLL):
+        """
+        Return the card found for a state, if the search is over.
+
+        Parameters
+        ----------
+        state : GameState
+            The state of the match, with the bot to move.
+        timeout : float, optional
+            How long to wait for the search to end, in seconds. Defaults to THINK_POLL.
+
+        Returns
+        -------
+        tuple or None
+            The vector and statistics returned by Bot.think, or None if the search
+            is not over or was made for another state.
+        """
+        if self.__future is None or self.__key != state.key():
+            return None
+
+        try:
+            thought = self.__future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            return None
+
+        self.__key = None
+        self.__future = None
+        self.__stop = None
+
+        return thought
+
+    def cancel(self):
+        """
+        Stop the current search and forget it.
+
+        Returns
+        -------
+        None
+        """
+        # A busca confere o sinal a cada simulação, então para quase na hora
+        if self.__stop is not None:
+            self.__stop.set()
+
+        self.__key = None
+        self.__future = None
+        self.__stop = None
+
+    def shutdown(self):
+        """
+        Cancel the search and stop the worker thread.
+
+        Returns
+        -------
+        None
+        """
+        self.cancel()
+        self.__executor.shutdown(wait=False)
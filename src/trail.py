@@ -0,0 +1,259 @@
+import pygame
+
+from config import *
+
+# Margem, em pixels, que cobre a espessura das linhas
+LINE_MARGIN = 6
+
+
+class TrailLayer:
+    """
+    Off-screen layer with the board and every committed trail segment.
+
+    Each segment is drawn only once, when the rider commits it, so drawing the
+    board costs the same no matter how long the match is. When a segment is
+    retracted (in the death animation) only the area it covered is redrawn.
+
+    Attributes
+    ----------
+    surface : pygame.Surface
+        The board with the committed trails drawn on it.
+
+    Methods
+    -------
+    track(self, rider)
+        Start drawing the trail of a rider.
+    untrack(self, rider)
+        Stop drawing the trail of a rider.
+    segment_added(self, rider, start, end)
+        Draw a newly committed segment.
+    segment_removed(self, rider, start, end)
+        Erase a retracted segment from the layer.
+    draw(self, screen, riders)
+        Draw the layer and the segments still being traveled.
+    """
+
+    def __init__(self, background, rect):
+        """
+        Initialize the TrailLayer object.
+
+        Parameters
+        ----------
+        background : pygame.Surface
+            The image of the board.
+        rect : pygame.Rect
+            The position of the board on the screen.
+
+        Returns
+        -------
+        None
+        """
+        self.__background = background
+        self.__rect = rect
+        self.__riders = []
+
+        self.surface = background.copy()
+
+    def track(self, rider):
+        """
+        Start drawing the trail of a rider.
+
+        Parameters
+        ----------
+        rider : Rider
+            The rider whose trail will be drawn.
+
+        Returns
+        -------
+        None
+        """
+        self.__riders.append(rider)
+        rider.trail_observers.append(self)
+
+        # Desenha o que o rider já tiver percorrido
+        self.__draw_path(rider)
+
+    def untrack(self, rider):
+        """
+        Stop drawing the trail of a rider.
+
+        Parameters
+        ----------
+        rider : Rider
+            The rider whose trail will be erased.
+
+        Returns
+        -------
+        None
+        """
+        if rider in self.__riders:
+            self.__riders.remove(rider)
+            rider.trail_observers.remove(self)
+            self.__rebuild()
+
+    def segment_added(self, rider, start, end):
+        """
+        Draw a newly committed segment.
+
+        Parameters
+        ----------
+        rider : Rider
+            The rider that committed the segment.
+        start : tuple
+            The start point of the segment.
+        end : tuple
+            The end point of the segment.
+
+        Returns
+        -------
+        None
+        """
+        self.__draw_segment(rider._color, start, end)
+
+    def segment_removed(self, rider, start, end):
+        """
+        Erase a retracted segment from the layer.
+
+        The board is restored under the segment, and the segments that cross
+        its area are drawn again there, so the rest of the layer is untouched.
+
+        Parameters
+        ----------
+        rider : Rider
+            The rider that retracted the segment.
+        start : tuple
+            The start point of the segment.
+        end : tuple
+            The end point of the segment.
+
+        Returns
+        -------
+        None
+        """
+        dirty = self.__segment_rect(start, end).clip(self.surface.get_rect())
+        segments = []
+
+        for tracked in self.__riders:
+            path = tracked._path
+
+            for index in range(1, len(path)):
+                if dirty.colliderect(self.__segment_rect(path[index - 1], path[index])):
+                    segments.append((tracked._color, path[index - 1], path[index]))
+
+        # As linhas são desenhadas inteiras numa cópia do fundo, pois cortadas
+        # pelas bordas da superfície não teriam os mesmos pixels
+        area = dirty.unionall([self.__segment_rect(*segment[1:]) for segment in segments])
+        area = area.clip(self.surface.get_rect())
+        patch = self.__background.subsurface(area).copy()
+        offset = (self.__rect.left + area.left, self.__rect.top + area.top)
+
+        for color, segment_start, segment_end in segments:
+            pygame.draw.line(
+                patch,
+                color,
+                (segment_start[0] - offset[0], segment_start[1] - offset[1]),
+                (segment_end[0] - offset[0], segment_end[1] - offset[1]),
+                width=6,
+            )
+
+        # Só a área do segmento retirado volta para a camada
+        self.surface.blit(patch, dirty, dirty.move(-area.left, -area.top))
+
+    def draw(self, screen, riders):
+        """
+        Draw the layer and the segments still being traveled.
+
+        Parameters
+        ----------
+        screen : pygame.Surface
+            The surface to draw on.
+        riders : iterable
+            The riders whose current segment must be drawn.
+
+        Returns
+        -------
+        None
+        """
+        screen.blit(self.surface, self.__rect)
+
+        # Apenas o trecho em movimento é desenhado a cada quadro
+        for rider in riders:
+            pygame.draw.line(
+                screen, rider._color, rider._path[-1], rider.rect.center, width=6
+            )
+
+    def __rebuild(self):
+        """
+        Redraw the whole layer from the riders' paths.
+
+        Returns
+        -------
+        None
+        """
+        self.surface = self.__background.copy()
+
+        for rider in self.__riders:
+            self.__draw_path(rider)
+
+    def __draw_path(self, rider):
+        """
+        Draw every committed segment of a rider.
+
+        Parameters
+        ----------
+        rider : Rider
+            The rider whose path will be drawn.
+
+        Returns
+        -------
+        None
+        """
+        for index in range(1, len(rider._path)):
+            self.__draw_segment(rider._color, rider._path[index - 1], rider._path[index])
+
+    def __segment_rect(self, start, end):
+        """
+        Return the area of the layer covered by a segment.
+
+        Parameters
+        ----------
+        start : tuple
+            The start point, in screen coordinates.
+        end : tuple
+            The end point, in screen coordinates.
+
+        Returns
+        -------
+        pygame.Rect
+            The area, in layer coordinates, with a margin for the line width.
+        """
+        offset = self.__rect.topleft
+        left = int(min(start[0], end[0]) - offset[0]) - LINE_MARGIN
+        top = int(min(start[1], end[1]) - offset[1]) - LINE_MARGIN
+        right = int(max(start[0], end[0]) - offset[0]) + LINE_MARGIN + 1
+        bottom = int(max(start[1], end[1]) - offset[1]) + LINE_MARGIN + 1
+
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def __draw_segment(self, color, start, end):
+        """
+        Draw a segment on the layer.
+
+        Parameters
+        ----------
+        color : str
+            The color of the segment.
+        start : tuple
+            The start point, in screen coordinates.
+        end : tuple
+            The end point, in screen coordinates.
+
+        Returns
+        -------
+        None
+        """
+        offset = self.__rect.topleft
+        start = (start[0] - offset[0], start[1] - offset[1])
+        end = (end[0] - offset[0], end[1] - offset[1])
+
+        pygame.draw.line(self.surface, color, start, end, width=6)
@@ -0,0 +1,416 @@
+import functools
+import math
+
+import bitboard
+from config import *
+
+# Tipos de característica que entram no hash
+POSITION = 0
+EDGE = 1
+LAST_CARD = 2
+ALIVE = 3
+CURRENT = 4
+FIRST_TURN = 5
+MOVE = 6
+HAND = 7
+POOL = 8
+
+# Máscara de 64 bits
+MASK = (1 << 64) - 1
+
+
+@functools.lru_cache(maxsize=None)
+def position_key(rider, vertex):
+    """
+    Return the key of a rider standing on a lattice vertex.
+
+    Parameters
+    ----------
+    rider : int
+        The rider, by its position in the turn order.
+    vertex : tuple
+        The integer vertex (i, j).
+
+    Returns
+    -------
+    int
+        The 64-bit key.
+    """
+    return __feature_key(POSITION, rider, (vertex[0] + 64) * 128 + vertex[1] + 64)
+
+
+@functools.lru_cache(maxsize=None)
+def segment_key(rider, start, card):
+    """
+    Return the key of the trail edges covered by a move.
+
+    The trails never share an edge, as that is a collision, so the key of a
+    trail is the XOR of the keys of its segments.
+
+    Parameters
+    ----------
+    rider : int
+        The rider, by its position in the turn order.
+    start : tuple
+        The vertex where the move starts.
+    card : tuple
+        The vector of the move.
+
+    Returns
+    -------
+    int
+        The XOR of the keys of the edges of the move.
+    """
+    steps = math.gcd(card[0], card[1])
+
+    if not steps:
+        return 0
+
+    step = (card[0] // steps, card[1] // steps)
+    key = 0
+
+    for index in range(steps):
+        vertex = (start[0] + index * step[0], start[1] + index * step[1])
+        edge = bitboard.edge_bit(vertex, step)
+
+        # Arestas fora do tabuleiro não têm bit, mas ainda são únicas
+        if edge:
+            key ^= __feature_key(EDGE, rider, edge.bit_length())
+        else:
+            key ^= __feature_key(EDGE, rider, -((vertex[0] + 64) * 128 + vertex[1] + 64))
+
+    return key
+
+
+@functools.lru_cache(maxsize=None)
+def last_card_key(rider, card):
+    """
+    Return the key of the vector of a rider's previous move.
+
+    Parameters
+    ----------
+    rider : int
+        The rider, by its position in the turn order.
+    card : tuple
+        The vector of the move.
+
+    Returns
+    -------
+    int
+        The 64-bit key.
+    """
+    return __feature_key(LAST_CARD, rider, (card[0] + 8) * 16 + card[1] + 8)
+
+
+@functools.lru_cache(maxsize=None)
+def alive_key(rider):
+    """
+    Return the key of a rider being alive.
+
+    Parameters
+    ----------
+    rider : int
+        The rider, by its position in the turn order.
+
+    Returns
+    -------
+    int
+        The 64-bit key.
+    """
+    return __feature_key(ALIVE, rider)
+
+
+@functools.lru_cache(maxsize=None)
+def current_key(rider):
+    """
+    Return the key of a rider being the next to move.
+
+    Parameters
+    ----------
+    rider : int
+        The rider, by its position in the turn order.
+
+    Returns
+    -------
+    int
+        The 64-bit key.
+    """
+    return __feature_key(CURRENT, rider)
+
+
+@functools.lru_cache(maxsize=None)
+def first_turn_key():
+    """
+    Return the key of the match being in its first turn, when only the border collides.
+
+    Returns
+    -------
+    int
+        The 64-bit key.
+    """
+    return __feature_key(FIRST_TURN, 0)
+
+
+@functools.lru_cache(maxsize=None)
+def move_key(card):
+    """
+    Return the key of a move about to be played, to tell apart the results of
+    each card in the same state.
+
+    Parameters
+    ----------
+    card : tuple
+        The vector of the move.
+
+    Returns
+    -------
+    int
+        The 64-bit key.
+    """
+    return __feature_key(MOVE, 0, (card[0] + 8) * 16 + card[1] + 8)
+
+
+@functools.lru_cache(maxsize=None)
+def hand_key(rider, card):
+    """
+    Return the key of a card in a rider's hand.
+
+    The cards of a deck are all different, so the key of a hand is the XOR of
+    the keys of its cards.
+
+    Parameters
+    ----------
+    rider : int
+        The rider, by its position in the turn order.
+    card : tuple or None
+        The vector of the card, or None for a card drawn but not yet known.
+
+    Returns
+    -------
+    int
+        The 64-bit key.
+    """
+    value = 0 if card is None else (card[0] + 8) * 16 + card[1] + 8 + 1
+
+    return __feature_key(HAND, rider, value)
+
+
+@functools.lru_cache(maxsize=None)
+def pool_key(card):
+    """
+    Return the key of a card that may still be drawn.
+
+    Parameters
+    ----------
+    card : tuple
+        The vector of the card.
+
+    Returns
+    -------
+    int
+        The 64-bit key.
+    """
+    return __feature_key(POOL, 0, (card[0] + 8) * 16 + card[1] + 8)
+
+
+class TranspositionTable:
+    """
+    Bounded table of values found for game states, indexed by their Zobrist hash.
+
+    Each hash falls in a bucket with two entries. The first keeps the entry with
+    the greatest depth (the work spent to compute it) and the second always
+    takes the newest entry, so a deep result is not thrown away by shallow ones
+    and recent states still find room.
+
+    Attributes
+    ----------
+    size : int
+        The number of buckets.
+    probes : int
+        The number of lookups.
+    hits : int
+        The number of lookups that found their hash.
+    stores : int
+        The number of entries stored.
+    replacements : int
+        The number of stores that removed another hash from the table.
+
+    Methods
+    -------
+    get(self, key)
+        Return the value stored for a hash.
+    put(self, key, value, depth=0)
+        Store the value of a hash.
+    clear(self)
+        Remove every entry and reset the statistics.
+    stats(self)
+        Return the statistics of the table.
+    """
+
+    def __init__(self, size=TRANSPOSITION_SIZE):
+        """
+        Initialize the TranspositionTable object.
+
+        Parameters
+        ----------
+        size : int, optional
+            The number of buckets. Defaults to TRANSPOSITION_SIZE.
+
+        Returns
+        -------
+        None
+        """
+        self.size = size
+        self.clear()
+
+    def get(self, key):
+        """
+        Return the value stored for a hash.
+
+        Parameters
+        ----------
+        key : int
+            The Zobrist hash.
+
+        Returns
+        -------
+        object or None
+            The value, or None if the hash is not in the table.
+        """
+        self.probes += 1
+        slot = (key % self.size) * 2
+
+        for index in (slot, slot + 1):
+            if self.__keys[index] == key:
+                self.hits += 1
+                return self.__values[index]
+
+        return None
+
+    def put(self, key, value, depth=0):
+        """
+        Store the value of a hash.
+
+        Parameters
+        ----------
+        key : int
+            The Zobrist hash.
+        value : object
+            The value, which should not be None.
+        depth : int, optional
+            The work spent on the value, which decides which entry is kept. Defaults to 0.
+
+        Returns
+        -------
+        None
+        """
+        self.stores += 1
+        slot = (key % self.size) * 2
+
+        # O mesmo hash é atualizado onde estiver
+        if self.__keys[slot + 1] == key:
+            self.__keys[slot + 1] = None
+
+        if self.__keys[slot] == key or self.__keys[slot] is None or depth >= self.__depths[slot]:
+            # O antigo mais profundo passa para a entrada de substituição
+            if self.__keys[slot] not in (None, key):
+                self.__store(slot + 1, self.__keys[slot], self.__values[slot], self.__depths[slot])
+
+            self.__keys[slot] = key
+            self.__values[slot] = value
+            self.__depths[slot] = depth
+        else:
+            self.__store(slot + 1, key, value, depth)
+
+    def clear(self):
+        """
+        Remove every entry and reset the statistics.
+
+        Returns
+        -------
+        None
+        """
+        self.__keys = [None] * (2 * self.size)
+        self.__values = [None] * (2 * self.size)
+        self.__depths = [0] * (2 * self.size)
+
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def stats(self):
+        """
+        Return the statistics of the table.
+
+        Returns
+        -------
+        dict
+            The lookups, hits, hit rate, stores, replacements and number of
+            entries in use.
+        """
+        return {
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+            "stores": self.stores,
+            "replacements": self.replacements,
+            "entries": 2 * self.size - self.__keys.count(None),
+        }
+
+    def __store(self, index, key, value, depth):
+        """
+        Write an entry, counting whether it removes another hash.
+
+        Parameters
+        ----------
+        index : int
+            The entry.
+        key : int
+            The Zobrist hash.
+        value : object
+            The value.
+        depth : int
+            The work spent on the value.
+
+        Returns
+        -------
+        None
+        """
+        if self.__keys[index] not in (None, key):
+            self.replacements += 1
+
+        self.__keys[index] = key
+        self.__values[index] = value
+        self.__depths[index] = depth
+
+
+def __feature_key(kind, rider, value=0):
+    """
+    Return the key of a feature of a state.
+
+    The keys are the splitmix64 mix of the feature, so every process (like the
+    workers of the parallel search) finds the same hash for the same state.
+
+    Parameters
+    ----------
+    kind : int
+        The type of the feature, such as POSITION.
+    rider : int
+        The rider it belongs to.
+    value : int, optional
+        What identifies the feature among the ones of its type. Defaults to 0.
+
+    Returns
+    -------
+    int
+        The 64-bit key.
+    """
+    state = ((value * 16 + rider) * 16 + kind + ZOBRIST_SEED) & MASK
+
+    # splitmix64
+    state = (state + 0x9E3779B97F4A7C15) & MASK
+    state = ((state ^ (state >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    state = ((state ^ (state >> 27)) * 0x94D049BB133111EB) & MASK
+
+    return state ^ (state >> 31)
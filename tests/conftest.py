@@ -0,0 +1,152 @@
+import os
+import random
+import sys
+import types
+
+import pytest
+
+# Os testes rodam a partir da raiz, como os scripts, com src/ no PYTHONPATH,
+# pois os caminhos dos assets são relativos a ela
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.chdir(ROOT)
+
+# Nenhum teste abre janela nem toca som
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import bitboard
+import moves
+from state import GameState
+
+# Todos os vetores do baralho
+VECTORS = [tuple(vector) for vector in moves.CARD_VECTORS.tolist()]
+
+
+def new_state(riders, rng):
+    """
+    Build the state of a match that is about to start.
+
+    Parameters
+    ----------
+    riders : int
+        The number of riders.
+    rng : random.Random
+        The generator that shuffles the deck.
+
+    Returns
+    -------
+    GameState
+        The state, with every rider at the center and three cards in each hand.
+    """
+    deck = VECTORS.copy()
+    rng.shuffle(deck)
+
+    hands = [[deck.pop() for foo in range(3)] for foo in range(riders)]
+    drawn = [card for hand in hands for card in hand]
+
+    return GameState(
+        range(1, riders + 1),
+        [[(0, 0), (0, 0)]] * riders,
+        hands,
+        deck,
+        drawn,
+        [(0, 0)] * riders,
+    )
+
+
+def state_riders(state):
+    """
+    Build stand-ins for the alive riders of a state, with the attributes the
+    collision checks over rider groups read.
+
+    Parameters
+    ----------
+    state : GameState
+        The state.
+
+    Returns
+    -------
+    dict
+        The stand-in of each alive rider, by its position in the turn order.
+    """
+    riders = {}
+
+    for index, path in enumerate(state.paths):
+        if not state.alive[index]:
+            continue
+
+        board = bitboard.TrailBoard()
+
+        for start, end in zip(path[1:], path[2:]):
+            board.push(start, end)
+
+        riders[index] = types.SimpleNamespace(
+            _lattice_path=path,
+            _board=board,
+            _last_card=state.last_cards[index],
+            clicked_card=None,
+        )
+
+    return riders
+
+
+def inside(state, card):
+    """
+    Check if the move of the current rider with a card ends inside the board.
+    """
+    start = state.positions[state.current]
+
+    return (
+        abs(start[0] + card[0]) <= bitboard.RADIUS
+        and abs(start[1] + card[1]) <= bitboard.RADIUS
+    )
+
+
+def play_states(seed, riders=4, turns=80):
+    """
+    Play a match with random cards and return every state a card was chosen in.
+
+    The riders avoid the cards that kill them at once, when they can, so the
+    matches last long enough to crowd the board.
+
+    Parameters
+    ----------
+    seed : int
+        The seed of the match.
+    riders : int, optional
+        The number of riders. Defaults to 4.
+    turns : int, optional
+        The turn limit of the match. Defaults to 80.
+
+    Returns
+    -------
+    list
+        The states, in the order they happened.
+    """
+    rng = random.Random(seed)
+    state = new_state(riders, rng)
+    states = []
+
+    while not state.finished() and state.turn < turns:
+        states.append(state.clone(territory=False))
+
+        hand = state.hands[state.current]
+        safe = [card for card in hand if not state.collision(card)]
+
+        state.step(rng.choice(safe or hand), rng)
+
+    return states
+
+
+@pytest.fixture(scope="session")
+def played_states():
+    """
+    Return the states of a few random matches of two to four riders.
+    """
+    return [
+        state
+        for seed in range(30)
+        for state in play_states(seed, riders=2 + seed % 3)
+    ]
@@ -0,0 +1,37 @@
+import bitboard
+from conftest import VECTORS, inside, state_riders
+
+
+def test_move_collision_matches_the_state(played_states):
+    for state in played_states:
+        if not state.turn:
+            continue
+
+        riders = state_riders(state)
+        group = list(riders.values())
+
+        for card in VECTORS:
+            if not inside(state, card):
+                continue
+
+            found = bitboard.check_move_collision(group, riders[state.current], card)
+
+            assert found == (state.collision(card) is not None), (state.key(), card)
+
+
+def test_riders_stand_on_free_vertices(played_states):
+    for state in played_states[::5]:
+        if not state.turn:
+            continue
+
+        riders = state_riders(state)
+        group = list(riders.values())
+
+        for rider in group:
+            assert not bitboard.check_vertex_collision(group, rider)
+
+
+def test_segment_masks_are_the_move_masks_without_crossings():
+    for start in [(0, 0), (3, -2), (bitboard.RADIUS, 1), (-bitboard.RADIUS, -bitboard.RADIUS)]:
+        for card in VECTORS:
+            assert bitboard.segment_masks(start, card) == bitboard.move_masks(start, card)[:2]
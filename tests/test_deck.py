@@ -0,0 +1,78 @@
+import math
+import random
+
+import pytest
+
+from conftest import VECTORS
+from deck import DrawDistribution
+
+
+def total_probability(distribution):
+    """
+    Add up the chances of drawing each vector of the deck.
+    """
+    return sum(distribution.vector_probability(value) for value in VECTORS)
+
+
+def test_probabilities_sum_to_one():
+    rng = random.Random(0)
+    pile = VECTORS.copy()
+    distribution = DrawDistribution(pile)
+
+    assert math.isclose(total_probability(distribution), 1.0)
+
+    # Tira as cartas uma a uma até sobrar só uma
+    rng.shuffle(pile)
+
+    while len(pile) > 1:
+        distribution.remove(pile.pop())
+
+        assert len(distribution) == len(pile)
+        assert math.isclose(total_probability(distribution), 1.0)
+
+
+def test_empty_pile_has_no_chances():
+    distribution = DrawDistribution()
+
+    assert distribution.vector_probability((1, 0)) == 0.0
+    assert total_probability(distribution) == 0.0
+
+
+def test_tracked_sets_follow_the_pile():
+    rng = random.Random(1)
+    pile = VECTORS.copy()
+    distribution = DrawDistribution(pile)
+
+    distribution.track("right", [value for value in VECTORS if value[0] > 0])
+    distribution.track("left", [value for value in VECTORS if value[0] < 0])
+    distribution.track("vertical", [value for value in VECTORS if value[0] == 0])
+
+    rng.shuffle(pile)
+
+    while pile:
+        # Os conjuntos separam o deck, então suas chances somam 1
+        total = sum(distribution.probability(name) for name in ("right", "left", "vertical"))
+
+        assert math.isclose(total, 1.0)
+        assert math.isclose(
+            distribution.probability("right"),
+            sum(distribution.vector_probability(value) for value in pile if value[0] > 0),
+        )
+
+        distribution.remove(pile.pop())
+
+    assert distribution.probability("right") == 0.0
+
+
+@pytest.mark.parametrize("removed", [0, 10, 79])
+def test_reset_counts_the_pile_again(removed):
+    distribution = DrawDistribution(VECTORS)
+    distribution.track("all", VECTORS)
+
+    for value in VECTORS[:removed]:
+        distribution.remove(value)
+
+    distribution.reset(VECTORS)
+
+    assert distribution.total == len(VECTORS)
+    assert distribution.probability("all") == 1.0
@@ -0,0 +1,116 @@
+import threading
+
+import bitboard
+import endgame
+from state import GameState
+
+# Cantos opostos do tabuleiro
+CORNER = (bitboard.RADIUS, bitboard.RADIUS)
+OPPOSITE = (-bitboard.RADIUS, -bitboard.RADIUS)
+
+# Cartas que tiram do tabuleiro quem está no canto OPPOSITE
+DEADLY = [(-2, -1), (-1, -2), (-3, -3), (-1, 0), (-2, 0), (-3, 0), (-4, 0), (-1, 1)]
+
+
+def cornered(hand, rival_hand, deck):
+    """
+    Build a two-rider state with the solving rider and its rival in opposite corners.
+
+    Parameters
+    ----------
+    hand : list
+        The hand of the solving rider, which moves first, from CORNER.
+    rival_hand : list
+        The hand of the rival, in OPPOSITE.
+    deck : list
+        The cards left in the deck.
+
+    Returns
+    -------
+    GameState
+        The state, past the first turn.
+    """
+    return GameState(
+        (1, 2),
+        [[CORNER, CORNER], [OPPOSITE, OPPOSITE]],
+        [hand, rival_hand],
+        deck,
+        [],
+        [(0, 0), (0, 0)],
+        turn=1,
+    )
+
+
+def test_finds_the_only_winning_card():
+    # Só (-1, -1) fica no tabuleiro, e qualquer carta do rival o tira dele
+    state = cornered([(-1, -1), (1, 1), (2, 2)], DEADLY[:3], DEADLY[3:])
+    best, stats = endgame.EndgameSolver().solve(state)
+
+    assert best == [(-1, -1)]
+    assert stats["exact"]
+    assert stats["value"] == endgame.WIN
+
+
+def test_no_card_is_chosen_in_a_lost_position():
+    state = cornered([(1, 0), (1, 1), (0, 1)], DEADLY[:3], DEADLY[3:])
+    best, stats = endgame.EndgameSolver().solve(state)
+
+    assert best == []
+    assert stats["exact"]
+    assert stats["value"] == endgame.LOSS
+
+
+def test_rival_hand_stays_hidden():
+    safe = [(1, 1), (2, 2), (1, 2)]
+    hand = [(-1, -1), (0, -1), (-1, 0)]
+
+    # As mesmas cartas não vistas, com o rival segurando as seguras ou as mortais
+    states = [
+        cornered(hand, safe, DEADLY[:5]),
+        cornered(hand, DEADLY[:3], DEADLY[3:5] + safe),
+    ]
+    results = [
+        endgame.EndgameSolver(node_limit=3000, budget=60.0).solve(state) for state in states
+    ]
+
+    assert results[0][0] == results[1][0]
+    assert results[0][1]["value"] == results[1][1]["value"]
+    assert results[0][1]["nodes"] == results[1][1]["nodes"]
+
+    # O rival só morre na hora se as três cartas da mão forem mortais
+    assert endgame.LOSS < results[0][1]["value"] < endgame.WIN
+
+
+def test_solve_does_not_change_the_state():
+    state = cornered([(-1, -1), (0, -1), (-1, 0)], [(1, 1), (2, 2), (1, 2)], DEADLY[:5])
+    key = state.key()
+
+    solver = endgame.EndgameSolver(node_limit=3000, budget=60.0)
+    first = solver.solve(state)
+
+    assert state.key() == key
+
+    # A tabela guardada da primeira resolução não muda a resposta
+    second = solver.solve(state)
+
+    assert second[0] == first[0]
+    assert second[1]["value"] == first[1]["value"]
+
+
+def test_cancel_stops_the_solve():
+    state = cornered([(-1, -1), (0, -1), (-1, 0)], [(1, 1), (2, 2), (1, 2)], DEADLY[:5])
+    cancel = threading.Event()
+    cancel.set()
+
+    best, stats = endgame.EndgameSolver(node_limit=10**9, budget=60.0).solve(state, cancel)
+
+    # Cada carta da mão para no seu primeiro nó, sem terminar nenhuma profundidade
+    assert best == []
+    assert stats["depth"] == 0
+    assert stats["nodes"] == 3
+
+
+def test_crowded_needs_two_riders_left(played_states):
+    for state in played_states:
+        if state.alive.count(True) != 2:
+            assert not endgame.crowded(state)
@@ -0,0 +1,38 @@
+import lattice
+from conftest import VECTORS, inside, state_riders
+
+
+def test_move_collision_matches_the_state(played_states):
+    for state in played_states:
+        if not state.turn:
+            continue
+
+        riders = state_riders(state)
+        group = list(riders.values())
+
+        for card in VECTORS:
+            if not inside(state, card):
+                continue
+
+            found = lattice.check_move_collision(group, riders[state.current], card)
+
+            assert found == (state.collision(card) is not None), (state.key(), card)
+
+
+def test_riders_stand_on_free_vertices(played_states):
+    for state in played_states[::5]:
+        if not state.turn:
+            continue
+
+        riders = state_riders(state)
+        group = list(riders.values())
+
+        for rider in group:
+            assert not lattice.check_vertex_collision(group, rider)
+
+
+def test_segments_touch_ignores_a_shared_vertex():
+    assert lattice.segments_touch((0, 0), (2, 1), (0, 0), (0, 3))
+    assert not lattice.segments_touch((0, 0), (2, 1), (0, 0), (0, 3), ignore=(0, 0))
+    assert lattice.segments_touch((0, 0), (2, 0), (1, -1), (1, 1), ignore=(0, 0))
+    assert not lattice.segments_touch((0, 0), (2, 0), (0, 1), (2, 1))
@@ -0,0 +1,40 @@
+import lattice
+import reference
+from conftest import VECTORS, inside
+
+
+def test_state_follows_the_pixel_rules(played_states):
+    for state in played_states[::8]:
+        if not state.turn:
+            continue
+
+        index = state.current
+        paths = [[lattice.to_pixel(vertex) for vertex in path] for path in state.paths]
+        masks = [reference.path_masks(path) for path in paths]
+        enemy_masks = [
+            masks[other][0]
+            for other in range(len(paths))
+            if other != index and state.alive[other]
+        ]
+
+        for card in VECTORS:
+            if not inside(state, card):
+                continue
+
+            position = state.positions[index]
+            end = lattice.to_pixel((position[0] + card[0], position[1] + card[1]))
+            line = reference.line_mask(paths[index][-1], end)
+
+            found = reference.check_line_cross(
+                line, masks[index], enemy_masks, card, state.last_cards[index]
+            )
+
+            assert found == (state.collision(card) is not None), (state.key(), card)
+
+
+def test_last_vector_rules_agree():
+    for card in VECTORS:
+        for last_card in VECTORS + [(0, 0)]:
+            assert reference.last_vector_collision(card, last_card) == bool(
+                lattice.last_vector_collision(card, last_card)
+            )
@@ -0,0 +1,107 @@
+import moves
+import zobrist
+from conftest import VECTORS
+
+
+def full_hash(state):
+    """
+    Compute the Zobrist hash of a state from scratch, with the keys of zobrist.
+    """
+    key = zobrist.current_key(state.current)
+
+    if not state.turn:
+        key ^= zobrist.first_turn_key()
+
+    for index, path in enumerate(state.paths):
+        if not state.alive[index]:
+            continue
+
+        key ^= (
+            zobrist.alive_key(index)
+            ^ zobrist.position_key(index, state.positions[index])
+            ^ zobrist.last_card_key(index, state.last_cards[index])
+        )
+
+        for start, end in zip(path[1:], path[2:]):
+            key ^= zobrist.segment_key(index, start, (end[0] - start[0], end[1] - start[1]))
+
+    return key
+
+
+def exact_collision(state, card):
+    """
+    Find the collision of a move with moves.first_collision over the lattice paths.
+    """
+    index = state.current
+    enemies = [
+        (other, True, state.paths[other])
+        for other in range(len(state.paths))
+        if other != index and state.alive[other]
+    ]
+
+    return moves.first_collision(
+        state.paths[index],
+        card,
+        state.last_cards[index],
+        enemies,
+        rider=index,
+        lines=bool(state.turn),
+    )
+
+
+def test_collision_matches_first_collision(played_states):
+    for state in played_states:
+        for card in VECTORS:
+            found = state.collision(card)
+            expected = exact_collision(state, card)
+
+            # Os bitboards dizem quem morre: o rider, e o outro só se bater nele
+            assert (found is None) == (expected is None), (state.key(), card)
+
+            if expected is not None:
+                assert (found[1] == moves.RIDER) == (expected[1] == moves.RIDER)
+
+                if expected[1] == moves.RIDER:
+                    assert found[2] == expected[2]
+
+
+def test_timed_collision_is_first_collision(played_states):
+    for state in played_states[::10]:
+        for card in VECTORS:
+            assert state.collision(card, timed=True) == exact_collision(state, card)
+
+
+def test_collision_table_keeps_the_same_results(played_states):
+    table = zobrist.TranspositionTable()
+
+    # Duas passadas: a segunda lê tudo da tabela
+    for foo in range(2):
+        for state in played_states[::5]:
+            for card in VECTORS:
+                assert state.collision(card, table=table) == state.collision(card)
+
+    assert table.hits
+
+
+def test_incremental_hash_matches_full_hash(played_states):
+    for state in played_states:
+        assert state.zobrist == full_hash(state)
+
+
+def test_hash_follows_every_step(played_states):
+    for state in played_states[::7]:
+        state = state.clone(territory=False)
+
+        for card in sorted(set(state.hands[state.current])):
+            after = state.clone(territory=False)
+            after.step(card)
+
+            assert after.zobrist == full_hash(after)
+
+
+def test_clone_keeps_the_hash(played_states):
+    for state in played_states[::3]:
+        copy = state.clone()
+
+        assert copy.zobrist == state.zobrist
+        assert copy.key() == state.key()
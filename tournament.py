@@ -0,0 +1,286 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+# Adiciona a pasta /src/ pro PYTHONPATH
+sys.path.append("src/")
+
+import headless
+import search
+from config import *
+
+# Valor crítico da normal para intervalos de 95%
+Z_95 = 1.959964
+
+
+def wilson_interval(wins, total, z=Z_95):
+    """
+    Compute the Wilson score confidence interval of a win rate.
+
+    Parameters
+    ----------
+    wins : int
+        The number of wins.
+    total : int
+        The number of matches.
+    z : float, optional
+        The critical value of the normal distribution. Defaults to Z_95.
+
+    Returns
+    -------
+    tuple
+        The lower and upper bounds of the interval, between 0 and 1.
+    """
+    if not total:
+        return (0.0, 1.0)
+
+    rate = wins / total
+    denominator = 1 + z**2 / total
+    center = (rate + z**2 / (2 * total)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / total + z**2 / (4 * total**2)) / denominator
+
+    return (max(0.0, center - margin), min(1.0, center + margin))
+
+
+def play(task):
+    """
+    Run a single match inside a worker process.
+
+    Parameters
+    ----------
+    task : tuple
+        The seed, number of bots, turn limit and seat policies of the match.
+
+    Returns
+    -------
+    dict
+        The result of the match, as returned by headless.run_match.
+    """
+    seed, bot_number, max_turns, policies = task
+    result = headless.run_match(seed, bot_number, max_turns, policies)
+    result["policies"] = policies
+    result["worker"] = os.getpid()
+
+    return result
+
+
+def seat_policies(policies, bot_number, offset):
+    """
+    Assign the policies to the seats of a match, rotated by an offset.
+
+    Rotating the assignment from one match to the next puts every policy in
+    every seat equally often, so the advantage of a seat is not counted as the
+    strength of the policy that sits there.
+
+    Parameters
+    ----------
+    policies : list
+        The policies, repeated over the seats.
+    bot_number : int
+        The number of seats.
+    offset : int
+        How many places the policies are rotated.
+
+    Returns
+    -------
+    list
+        The policy of each seat.
+    """
+    return [policies[(seat + offset) % len(policies)] for seat in range(bot_number)]
+
+
+def record(results, path):
+    """
+    Write the result of each match to a file as soon as it arrives.
+
+    Parameters
+    ----------
+    results : iterable
+        The results of the matches, in the order they end.
+    path : str
+        The path of the file, with one JSON line per match.
+
+    Returns
+    -------
+    list
+        The results that were written.
+    """
+    written = []
+
+    with open(path, "w") as file:
+        for result in results:
+            file.write(json.dumps(result) + "\n")
+            file.flush()
+            written.append(result)
+
+    return written
+
+
+def summarize(results, bot_number):
+    """
+    Aggregate the win rate of each seat over all matches.
+
+    Parameters
+    ----------
+    results : list
+        The results of the matches.
+    bot_number : int
+        The number of seats in each match.
+
+    Returns
+    -------
+    dict
+        For each seat (0 being matches without a winner), the wins, win rate and its interval.
+    """
+    total = len(results)
+    wins = dict.fromkeys(range(bot_number + 1), 0)
+
+    for result in results:
+        wins[result["winner"]] += 1
+
+    summary = {}
+
+    for seat, count in wins.items():
+        lower, upper = wilson_interval(count, total)
+        summary[seat] = {
+            "wins": count,
+            "rate": count / total if total else 0.0,
+            "low": lower,
+            "high": upper,
+        }
+
+    return summary
+
+
+def summarize_policies(results):
+    """
+    Aggregate the win rate of each policy over all matches.
+
+    The rate counts the wins of a policy over the seats it played, so policies
+    that fill more seats of a match are not favored.
+
+    Parameters
+    ----------
+    results : list
+        The results of the matches, with the policy of each seat.
+
+    Returns
+    -------
+    dict
+        For each policy, the wins, seats played, win rate and its interval.
+    """
+    seats = {}
+    wins = {}
+
+    for result in results:
+        for policy in result["policies"]:
+            seats[policy] = seats.get(policy, 0) + 1
+            wins.setdefault(policy, 0)
+
+        if result["winner"]:
+            wins[result["policies"][result["winner"] - 1]] += 1
+
+    summary = {}
+
+    for policy, count in wins.items():
+        lower, upper = wilson_interval(count, seats[policy])
+        summary[policy] = {
+            "wins": count,
+            "seats": seats[policy],
+            "rate": count / seats[policy],
+            "low": lower,
+            "high": upper,
+        }
+
+    return summary
+
+
+def main():
+    """
+    Spread bot-only matches across a process pool and report the win rate of each seat and policy.
+
+    Each match streams one JSON line to the output file as soon as it ends.
+
+    Returns
+    -------
+    None
+    """
+    parser = argparse.ArgumentParser(description="Run a tournament of headless Vectrun matches.")
+    parser.add_argument("-n", "--matches", type=int, default=1000, help="number of matches")
+    parser.add_argument("-b", "--bots", type=int, default=4, help="number of bots (2 to 4)")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the first match")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("-o", "--output", default="tournament.jsonl", help="file with the result of each match")
+    parser.add_argument("--max-turns", type=int, default=1000, help="turn limit of each match")
+    parser.add_argument("-p", "--policy", nargs="+", choices=("safe", "territory", "mcts"), help="policy of each seat")
+    args = parser.parse_args()
+
+    # Cada partida tem sua própria semente, e pode ser repetida com headless.py -s
+    # e -p com as políticas de cada posição, que giram de uma partida para a outra
+    tasks = [
+        (
+            args.seed + index,
+            args.bots,
+            args.max_turns,
+            seat_policies(args.policy or [BOT_POLICY], args.bots, index),
+        )
+        for index in range(args.matches)
+    ]
+
+    start = time.perf_counter()
+
+    # Com um único processo as partidas rodam neste, que pode criar o pool da
+    # busca MCTS; os processos de um Pool não podem ter filhos
+    if args.jobs == 1:
+        headless.init_headless()
+        results = record(map(play, tasks), args.output)
+        search.close_pool()
+
+    else:
+        # Cada processo inicializa o pygame sem janela uma única vez
+        with multiprocessing.Pool(args.jobs, initializer=headless.init_headless) as pool:
+            results = record(pool.imap_unordered(play, tasks, chunksize=4), args.output)
+
+            # O SDL dos processos ignora o SIGTERM de terminate(), então eles são
+            # encerrados pela fila antes de sair do bloco
+            pool.close()
+            pool.join()
+
+    elapsed = time.perf_counter() - start
+
+    print(
+        "{} matches in {:.1f} s ({:.0f} matches/min) on {} workers".format(
+            len(results), elapsed, 60 * len(results) / elapsed, args.jobs
+        )
+    )
+
+    for seat, stats in summarize(results, args.bots).items():
+        print(
+            "{}: {:5d} wins, {:6.2%} [{:6.2%}, {:6.2%}]".format(
+                "seat " + str(seat) if seat else "no winner",
+                stats["wins"],
+                stats["rate"],
+                stats["low"],
+                stats["high"],
+            )
+        )
+
+    for policy, stats in summarize_policies(results).items():
+        print(
+            "policy {}: {:5d} wins in {} seats, {:6.2%} [{:6.2%}, {:6.2%}]".format(
+                policy,
+                stats["wins"],
+                stats["seats"],
+                stats["rate"],
+                stats["low"],
+                stats["high"],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()